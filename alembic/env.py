@@ -42,13 +42,24 @@ IGNORE_TABLES = [
     "pgqueuer_statistics",
 ]
 
+# Partitions of the tables partitioned outside the models (e.g. the monthly
+# partitions of tb_asset_change, created by AssetChangeService), must be
+# ignored too
+IGNORE_PARTITIONS_OF = ["tb_asset_change"]
+
+
+def is_partition(name: str) -> bool:
+    return any(name.startswith(f"{parent}_") for parent in IGNORE_PARTITIONS_OF)
+
 
 def include_object(object, name, type_, reflected, compare_to):
     """
     Should you include this table or not?
     """
     if type_ == "table" and (
-        name in IGNORE_TABLES or object.info.get("skip_autogenerate", False)
+        name in IGNORE_TABLES
+        or is_partition(name)
+        or object.info.get("skip_autogenerate", False)
     ):
         return False
     elif type_ == "column" and object.info.get("skip_autogenerate", False):
@@ -0,0 +1,34 @@
+"""add max_workers to ingestion for parallel collection
+
+Revision ID: 3b8f0c6e1d27
+Revises: 5c1e7a9d2b40
+Create Date: 2026-10-16 09:12:40.118530
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "3b8f0c6e1d27"
+down_revision: Union[str, None] = "5c1e7a9d2b40"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "tb_database_provider_ingestion",
+        sa.Column(
+            "max_workers",
+            sa.Integer(),
+            nullable=False,
+            server_default=sa.text("1"),
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("tb_database_provider_ingestion", "max_workers")
@@ -0,0 +1,37 @@
+"""table column unique name
+
+Revision ID: 5c1e7a9d2b40
+Revises: ea577de8fb62
+Create Date: 2026-10-16 09:12:41.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e7a9d2b40'
+down_revision: Union[str, None] = 'ea577de8fb62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Remove duplicated columns (same table and name) before creating the
+    # constraint, keeping one of them.
+    op.execute("""
+        DELETE FROM tb_table_column a
+        USING tb_table_column b
+        WHERE a.table_id = b.table_id AND a.name = b.name AND a.id < b.id
+    """)
+    op.create_unique_constraint(
+        'inx_uq_table_column', 'tb_table_column', ['table_id', 'name']
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint(
+        'inx_uq_table_column', 'tb_table_column', type_='unique'
+    )
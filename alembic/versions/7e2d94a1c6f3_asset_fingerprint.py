@@ -0,0 +1,29 @@
+"""add fingerprint to asset
+
+Revision ID: 7e2d94a1c6f3
+Revises: 3b8f0c6e1d27
+Create Date: 2026-10-16 11:03:27.540912
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "7e2d94a1c6f3"
+down_revision: Union[str, None] = "3b8f0c6e1d27"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "tb_asset",
+        sa.Column("fingerprint", sa.String(length=64), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("tb_asset", "fingerprint")
@@ -0,0 +1,60 @@
+"""add ingestion checkpoint
+
+Revision ID: 9a4c1f7e2b85
+Revises: 7e2d94a1c6f3
+Create Date: 2026-10-17 09:12:44.301275
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "9a4c1f7e2b85"
+down_revision: Union[str, None] = "7e2d94a1c6f3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "tb_database_provider_ingestion_execution",
+        sa.Column("resumed_from_id", sa.Integer(), nullable=True),
+    )
+    op.create_foreign_key(
+        "fk_database_provider_ingestion_execution_resumed_from_id",
+        "tb_database_provider_ingestion_execution",
+        "tb_database_provider_ingestion_execution",
+        ["resumed_from_id"],
+        ["id"],
+        ondelete="set null",
+    )
+    op.create_table(
+        "tb_database_provider_ingestion_checkpoint",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("scope", sa.String(length=1000), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("execution_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["execution_id"],
+            ["tb_database_provider_ingestion_execution.id"],
+            name="fk_database_provider_ingestion_checkpoint_execution_id",
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "execution_id", "scope", name="inx_uq_ingestion_checkpoint"
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("tb_database_provider_ingestion_checkpoint")
+    op.drop_constraint(
+        "fk_database_provider_ingestion_execution_resumed_from_id",
+        "tb_database_provider_ingestion_execution",
+        type_="foreignkey",
+    )
+    op.drop_column("tb_database_provider_ingestion_execution", "resumed_from_id")
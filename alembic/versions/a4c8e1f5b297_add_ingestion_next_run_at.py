@@ -0,0 +1,67 @@
+"""add ingestion next run at
+
+Revision ID: a4c8e1f5b297
+Revises: f7d2a9c4b316
+Create Date: 2026-10-17 18:41:53.617204
+
+"""
+
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+from croniter import croniter
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "a4c8e1f5b297"
+down_revision: Union[str, None] = "f7d2a9c4b316"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "tb_database_provider_ingestion",
+        sa.Column("next_run_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index(
+        op.f("ix_tb_database_provider_ingestion_next_run_at"),
+        "tb_database_provider_ingestion",
+        ["next_run_at"],
+        unique=False,
+    )
+
+    # Schedule the next run of the existing ingestions (naive UTC, with the
+    # cron expression evaluated in the local timezone of the server).
+    now = datetime.now(timezone.utc).astimezone()
+    connection = op.get_bind()
+    rows = connection.execute(
+        sa.text(
+            "SELECT id, scheduling FROM tb_database_provider_ingestion "
+            "WHERE scheduling_type = 'CRON' AND NOT deleted"
+        )
+    ).all()
+    for row in rows:
+        if row.scheduling and croniter.is_valid(row.scheduling):
+            next_run_at = (
+                croniter(row.scheduling, now)
+                .get_next(datetime)
+                .astimezone(timezone.utc)
+                .replace(tzinfo=None)
+            )
+            connection.execute(
+                sa.text(
+                    "UPDATE tb_database_provider_ingestion "
+                    "SET next_run_at = :next_run_at WHERE id = :id"
+                ),
+                {"id": row.id, "next_run_at": next_run_at},
+            )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        op.f("ix_tb_database_provider_ingestion_next_run_at"),
+        table_name="tb_database_provider_ingestion",
+    )
+    op.drop_column("tb_database_provider_ingestion", "next_run_at")
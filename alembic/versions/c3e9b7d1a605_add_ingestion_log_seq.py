@@ -0,0 +1,49 @@
+"""add ingestion log seq
+
+Revision ID: c3e9b7d1a605
+Revises: a4c8e1f5b297
+Create Date: 2026-10-17 21:07:36.518204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "c3e9b7d1a605"
+down_revision: Union[str, None] = "a4c8e1f5b297"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "tb_database_provider_ingestion_log",
+        sa.Column("seq", sa.Integer(), nullable=True),
+    )
+    # The existing chunks were written in the order of their ids.
+    op.execute(
+        "UPDATE tb_database_provider_ingestion_log l SET seq = o.seq "
+        "FROM (SELECT id, ROW_NUMBER() OVER "
+        "(PARTITION BY execution_id ORDER BY id) - 1 AS seq "
+        "FROM tb_database_provider_ingestion_log) o WHERE l.id = o.id"
+    )
+    op.alter_column(
+        "tb_database_provider_ingestion_log", "seq", nullable=False
+    )
+    op.create_unique_constraint(
+        "inx_uq_ingestion_log_seq",
+        "tb_database_provider_ingestion_log",
+        ["execution_id", "seq"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint(
+        "inx_uq_ingestion_log_seq",
+        "tb_database_provider_ingestion_log",
+        type_="unique",
+    )
+    op.drop_column("tb_database_provider_ingestion_log", "seq")
@@ -0,0 +1,37 @@
+"""add ingestion execution plan
+
+Revision ID: c3f81d6a5e92
+Revises: 9a4c1f7e2b85
+Create Date: 2026-10-17 11:03:27.518204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "c3f81d6a5e92"
+down_revision: Union[str, None] = "9a4c1f7e2b85"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "tb_database_provider_ingestion_execution",
+        sa.Column(
+            "dry_run", sa.Boolean(), server_default="False", nullable=False
+        ),
+    )
+    op.add_column(
+        "tb_database_provider_ingestion_execution",
+        sa.Column("plan", postgresql.JSON(astext_type=sa.Text()), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("tb_database_provider_ingestion_execution", "plan")
+    op.drop_column("tb_database_provider_ingestion_execution", "dry_run")
@@ -0,0 +1,83 @@
+"""add asset change
+
+Revision ID: e5b27c9d4f18
+Revises: c3f81d6a5e92
+Create Date: 2026-10-17 14:26:51.730418
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "e5b27c9d4f18"
+down_revision: Union[str, None] = "c3f81d6a5e92"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "tb_asset_change",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column(
+            "kind",
+            sa.Enum(
+                "CREATED",
+                "UPDATED",
+                "DISABLED",
+                "COLUMN_ADDED",
+                "COLUMN_REMOVED",
+                "COLUMN_UPDATED",
+                name="AssetChangeKindEnumType",
+            ),
+            nullable=False,
+        ),
+        sa.Column("field", sa.String(length=500), nullable=True),
+        sa.Column("old_value", sa.Text(), nullable=True),
+        sa.Column("new_value", sa.Text(), nullable=True),
+        sa.Column("asset_id", sa.UUID(), nullable=False),
+        sa.Column("provider_id", sa.UUID(), nullable=True),
+        sa.Column("execution_id", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["asset_id"],
+            ["tb_asset.id"],
+            name="fk_asset_change_asset_id",
+            ondelete="CASCADE",
+        ),
+        sa.ForeignKeyConstraint(
+            ["provider_id"],
+            ["tb_database_provider.id"],
+            name="fk_asset_change_provider_id",
+            ondelete="CASCADE",
+        ),
+        sa.ForeignKeyConstraint(
+            ["execution_id"],
+            ["tb_database_provider_ingestion_execution.id"],
+            name="fk_asset_change_execution_id",
+            ondelete="set null",
+        ),
+        sa.PrimaryKeyConstraint("id", "created_at"),
+        postgresql_partition_by="RANGE (created_at)",
+    )
+    op.create_index(
+        "inx_asset_change_asset", "tb_asset_change", ["asset_id", "id"]
+    )
+    op.create_index(
+        "inx_asset_change_provider", "tb_asset_change", ["provider_id", "id"]
+    )
+    # Receives the changes of months without a partition (monthly
+    # partitions are created by the retention job).
+    op.execute(
+        "CREATE TABLE tb_asset_change_default "
+        "PARTITION OF tb_asset_change DEFAULT"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("tb_asset_change")
+    postgresql.ENUM(name="AssetChangeKindEnumType").drop(op.get_bind())
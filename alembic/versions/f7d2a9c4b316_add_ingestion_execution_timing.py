@@ -0,0 +1,32 @@
+"""add ingestion execution timing
+
+Revision ID: f7d2a9c4b316
+Revises: e5b27c9d4f18
+Create Date: 2026-10-17 16:12:08.204915
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "f7d2a9c4b316"
+down_revision: Union[str, None] = "e5b27c9d4f18"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "tb_database_provider_ingestion_execution",
+        sa.Column(
+            "timing", postgresql.JSON(astext_type=sa.Text()), nullable=True
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("tb_database_provider_ingestion_execution", "timing")
@@ -2,6 +2,7 @@ from typing import List
 from abc import ABC, abstractmethod
 import typing
 
+from app.collector.utils.name_filter import NameFilter
 from app.schemas import (
     DatabaseCreateSchema,
     DatabaseProviderConnectionItemSchema,
@@ -39,6 +40,13 @@ class Collector(ABC):
         """Return all tables in a database provider."""
         pass
 
+    def list_tables(
+        self, database_name: str, schema_name: str
+    ) -> List[str]:
+        """Return the names of the tables selected by the table filter,
+        without reading their metadata, if the provider allows it."""
+        return [t.name for t in self.get_tables(database_name, schema_name)]
+
     @abstractmethod
     def get_samples(self, database_name: str,
                     schema_name: str, table: DatabaseTableCreateSchema
@@ -46,6 +54,39 @@ class Collector(ABC):
         """Return the samples from a column."""
         pass
 
+    def get_table_filter(self) -> NameFilter:
+        """ Returns the include/exclude rules of the ingestion for tables.
+        Collectors may apply them before reading the metadata of the tables.
+        """
+        if self.ingestion is None:
+            return NameFilter(None, None)
+        return NameFilter(
+            self.ingestion.include_table, self.ingestion.exclude_table
+        )
+
+    def get_schema_filter(self) -> NameFilter:
+        """ Returns the include/exclude rules of the ingestion for schemas.
+        Collectors may apply them before reading the metadata of the
+        schemas.
+        """
+        if self.ingestion is None:
+            return NameFilter(None, None)
+        return NameFilter(
+            self.ingestion.include_schema, self.ingestion.exclude_schema
+        )
+
+    def estimate_reflection_queries(self, n_tables: int) -> int:
+        """ Returns the number of queries used to read the metadata of the
+        n_tables tables of a schema (get_tables), for the plan estimates.
+        """
+        return n_tables
+
+    def close(self):
+        """ Releases the resources (e.g. connections) kept by the collector,
+        at the end of the collection.
+        """
+        pass
+
     def supports_schema(self) -> bool:
         """ Indicates if the provider supports the concept of schema """
         return False
@@ -54,6 +95,12 @@ class Collector(ABC):
         """ Indicates if the provider supports the concept of database """
         return True
 
+    def supports_parallelism(self) -> bool:
+        """ Indicates if the collector methods can be called concurrently,
+        from several threads, during the same collection.
+        """
+        return True
+
     def get_ignorable_schemas(self) -> typing.Set[str]:
         """ Returns the list of schema names to be ignored. In general, they
         are internal schemas.
@@ -1,121 +1,103 @@
+import typing
+
+# Column fields whose change breaks the consumers of a table (major version).
+BREAKING_COLUMN_FIELDS = {"data_type", "array_data_type"}
+
+
+class ChangeSet:
+    """Changes between the current version of an object (in the catalog)
+    and the new one (read from the source). Changed fields keep the pair
+    (current value, new value); elements of the list (columns) are
+    identified by their name."""
+
+    def __init__(self):
+        self.fields: typing.Dict[str, typing.Tuple[typing.Any, typing.Any]] = {}
+        self.added: typing.Dict[str, typing.Dict[str, typing.Any]] = {}
+        self.removed: typing.Dict[str, typing.Dict[str, typing.Any]] = {}
+        self.modified: typing.Dict[
+            str, typing.Dict[str, typing.Tuple[typing.Any, typing.Any]]
+        ] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self.fields or self.added or self.removed or self.modified)
+
+    def bump(self, version: typing.Optional[str]) -> str:
+        """Return the semantic version after the changes: major if elements
+        were removed or their type changed, minor if elements were added or
+        changed and patch if only the fields of the object changed."""
+        parts = (str(version or "").split(".") + ["0", "0", "0"])[:3]
+        major, minor, patch = (int(p) if p.isdigit() else 0 for p in parts)
+        if self.removed or any(
+            BREAKING_COLUMN_FIELDS.intersection(fields)
+            for fields in self.modified.values()
+        ):
+            major, minor, patch = major + 1, 0, 0
+        elif self.added or self.modified:
+            minor, patch = minor + 1, 0
+        elif self.fields:
+            patch += 1
+        return f"{major}.{minor}.{patch}"
+
+
 class DataCollectionDiffChecker:
-    """Class to implement the collection data engine."""
+    """Class to compare the metadata collected with the catalog."""
 
     def __init__(self, log):
         self.log = log
 
-    def _diff_list(self, k, new_dict, current_dict, obj_type):
-        """Method to do a diff check between two list objects."""
-        diff = False
-
-        # Iterate over the new values and search for their match in the old values.
-        for new in new_dict[k]:
-            match = False
-            for current in current_dict[k]:
-                # Find the elements with the same name.
-                if new["name"] == current["name"]:
-                    match = True
-                    for n in new.keys():
-                        # Check if there was any difference.
-                        if new[n] != current[n]:
-                            diff = True
-                            # Log the difference found.
-                            self.log.log_diff_list_element(
-                                obj_type,
-                                current_dict["id"],
-                                current_dict["fully_qualified_name"],
-                                k,
-                                n,
-                                current[n],
-                                new[n],
-                            )
-
-            if match is False:
-                # If there is no match, an new element was added.
-                diff = True
-
-                # Log the difference found.
-                self.log.log_element_added(
-                    obj_type,
-                    current_dict["id"],
-                    current_dict["fully_qualified_name"],
-                    k,
-                    new["name"],
-                )
-
-        # Iterate over the old values and search for their match in
-        # the new values.
-        for current in current_dict[k]:
-            match = any(new["name"] == current["name"] for new in new_dict[k])
-
-            if match is False:
-                # If there is no match, an new element was removed.
-                diff = True
-
-                # Log the difference found.
-                self.log.log_element_removed(
-                    obj_type,
-                    current_dict["id"],
-                    current_dict["fully_qualified_name"],
-                    k,
-                    current["name"],
+    def diff(
+        self,
+        new_dict: typing.Dict[str, typing.Any],
+        current_dict: typing.Dict[str, typing.Any],
+        obj_type: str,
+        list_key: str = "columns",
+    ) -> ChangeSet:
+        """Compare the fields informed in new_dict with current_dict and the
+        elements of the list (indexed by name, so the time is linear in the
+        number of elements). Fields not informed in new_dict are not
+        compared."""
+        changes = ChangeSet()
+        obj_id = current_dict.get("id")
+        fqn = current_dict.get("fully_qualified_name")
+
+        for k, new_value in new_dict.items():
+            if k == list_key:
+                continue
+            current_value = current_dict.get(k)
+            if new_value != current_value:
+                changes.fields[k] = (current_value, new_value)
+                self.log.log_diff_field(
+                    obj_type, obj_id, fqn, k, current_value, new_value
                 )
 
-        return diff
-
-    def _diff_element(self, k, new_dict, current_dict, obj_type):
-        """Method to do a diff check between two elements."""
-        new_value = new_dict[k]
-        diff = False
-        if "_id" in k:
-            # If it is an id object, access the object to get its id.
-            key_obj = k.replace("_id", "")
-            if key_obj not in current_dict:
-                return False
-            current_value = current_dict[key_obj]["id"]
-        else:
-            current_value = current_dict[k]
-
-        if new_value != current_value:
-            diff = True
-            # Log the difference found.
-            self.log.log_diff_field(
-                obj_type,
-                current_dict["id"],
-                current_dict["fully_qualified_name"],
-                k,
-                current_value,
-                new_value,
-            )
-
-        return diff
-
-    def diff_objects(self, new_dict, current_dict, obj_type):
-        """Method to do a diff check between two objects, and return the object
-        with the new values replaced."""
-        result_dict = current_dict
-
-        diff = False
-        for k in new_dict.keys():
-            new_value = new_dict[k]
-
-            if isinstance(new_dict[k], list):
-                # If the element is a list, check a list diff
-                diff |= self._diff_list(k, new_dict, current_dict, obj_type)
-            else:
-                # If the element is an _element, check a _element diff
-                diff |= self._diff_element(k, new_dict, current_dict, obj_type)
-
-            # Always overwrite the current value with the new value.
-            result_dict[k] = new_value
-
-        if diff:
-            # If there was a difference, increment the version of the object
-            current_version = result_dict["version"]
-            version_arr = current_version.split(".")
-            new_version = ".".join(
-                [str(int(version_arr[0]) + 1), version_arr[1], version_arr[2]]
-            )
-            result_dict["version"] = new_version
-
-        return result_dict
+        if list_key not in new_dict:
+            return changes
+
+        current_items = {
+            item["name"]: item for item in current_dict.get(list_key) or []
+        }
+        for new in new_dict[list_key] or []:
+            name = new["name"]
+            current = current_items.pop(name, None)
+            if current is None:
+                changes.added[name] = new
+                self.log.log_element_added(obj_type, obj_id, fqn, list_key, name)
+                continue
+            fields = {
+                n: (current.get(n), value)
+                for n, value in new.items()
+                if value != current.get(n)
+            }
+            if fields:
+                changes.modified[name] = fields
+                for n, (old_value, new_value) in fields.items():
+                    self.log.log_diff_list_element(
+                        obj_type, obj_id, fqn, list_key, f"{name}.{n}",
+                        old_value, new_value,
+                    )
+        # Elements not found in the new version were removed.
+        for name, current in current_items.items():
+            changes.removed[name] = current
+            self.log.log_element_removed(obj_type, obj_id, fqn, list_key, name)
+
+        return changes
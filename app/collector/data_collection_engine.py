@@ -1,42 +1,50 @@
-import datetime
-import os
+import contextlib
+import hashlib
+import json
 import re
+import threading
 import typing
-import uuid
-import requests
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
 from app.collector.collector import Collector
-import app.collector.utils.constants_utils as constants
 from app.collector.collector_factory import CollectorFactory
-from app.collector.data_collection_diff_checker import DataCollectionDiffChecker
-from app.collector.data_collection_logging import DataCollectionLogging
-from app.collector.utils.api_client import (
-    AssetApiClient,
-    DatabaseApiClient,
-    DatabaseTableApiClient,
-    DatabaseProviderApiClient,
+from app.collector.data_collection_diff_checker import (
+    ChangeSet,
+    DataCollectionDiffChecker,
 )
+from app.collector.data_collection_logging import DataCollectionLogging
+from app.collector.data_collection_pipeline import DataCollectionPipeline
+from app.collector.data_collection_sink import DataCollectionSink, create_sink
+from app.collector.utils.api_client import DatabaseProviderApiClient
 from app.collector.utils.cron_utils import check_if_cron_is_today
+from app.collector.utils.logging_config import with_log_context
+from app.collector.utils.name_filter import NameFilter
 from app.collector.utils.request_utils import (
-    get_request,
-    options_request,
-    patch_request,
-    post_request,
     custom_serializer,
+    reset_http_stats,
 )
+from app.collector.utils.semantic_client import get_semantic_classifier
+from app.collector.utils import timing
+from app.models import AssetChangeKind, MAX_INGESTION_WORKERS
 from app.schemas import (
+    AssetChangeCreateSchema,
+    AssetReconcileSchema,
     DatabaseCreateSchema,
     DatabaseItemSchema,
     DatabaseProviderConnectionItemSchema,
     DatabaseProviderIngestionItemSchema,
+    DatabaseProviderIngestionPlanItemSchema,
+    DatabaseProviderIngestionPlanSchema,
     DatabaseProviderItemSchema,
     DatabaseSchemaCreateSchema,
     DatabaseSchemaItemSchema,
+    DatabaseTableChangeSetSchema,
     DatabaseTableCreateSchema,
-    DatabaseTableItemSchema,
+    DatabaseTableFingerprintSchema,
     DatabaseTableSampleCreateSchema,
-    DatabaseTableSampleItemSchema,
+    DatabaseTableUpdateSchema,
+    TableColumnChangeSchema,
 )
 
 FQN_PREFIXES = {
@@ -46,13 +54,98 @@ FQN_PREFIXES = {
     "Table": "tb",
 }
 
+# Max number of tables sent in a single bulk request.
+TABLE_BATCH_SIZE = 200
+
+# Max number of asset changes kept in memory before they are recorded.
+CHANGE_BATCH_SIZE = 1000
+
+# Table fields considered by the metadata fingerprint of a table.
+FINGERPRINT_TABLE_FIELDS = {
+    "name",
+    "display_name",
+    "description",
+    "notes",
+    "type",
+    "query",
+}
+
+# Column fields considered by the metadata fingerprint of a table.
+FINGERPRINT_COLUMN_FIELDS = {
+    "name",
+    "display_name",
+    "description",
+    "data_type",
+    "array_data_type",
+    "size",
+    "precision",
+    "scale",
+    "position",
+    "primary_key",
+    "nullable",
+    "unique",
+    "is_metadata",
+    "default_value",
+}
+
+# Max number of schemas waiting between two stages of the collection.
+PIPELINE_QUEUE_SIZE = 2
+
+# Queries used to read the sample of a table (reflection and select).
+SAMPLE_QUERIES_PER_TABLE = 2
+
+# Rows read by the sample of a table.
+SAMPLE_ROWS = 10
+
+
+class CollectedUnit:
+    """Tables of a schema (or of a database, if the provider does not
+    support schemas) flowing through the collection pipeline."""
+
+    def __init__(
+        self,
+        database: DatabaseItemSchema,
+        schema: typing.Optional[DatabaseSchemaItemSchema],
+        tables: typing.List[DatabaseTableCreateSchema],
+    ):
+        self.database = database
+        self.schema = schema
+        self.tables = tables
+        self.batch: typing.List[
+            typing.Tuple[
+                DatabaseTableCreateSchema,
+                typing.Optional[DatabaseTableSampleCreateSchema],
+            ]
+        ] = []
+        # FQNs of the tables found in the source and not ignored by the rules.
+        self.valid_tbs: typing.List[str] = []
+        self.ignored_tbs: typing.List[str] = []
+
 
 class DataCollectionEngine:
     """Class to implement the collection data engine."""
 
-    def __init__(self):
+    def __init__(self, sink: typing.Optional[DataCollectionSink] = None):
         self.log = DataCollectionLogging()
+        # Destination of the collected metadata (API or database).
+        self.sink = sink or create_sink()
         self.diff = DataCollectionDiffChecker(self.log)
+        self.semantic = get_semantic_classifier()
+        # Fingerprints of the tables already in the catalog, by FQN.
+        self._fingerprints: typing.Dict[str, DatabaseTableFingerprintSchema] = {}
+        # Execution whose progress is checkpointed (None disables it).
+        self._execution_id: typing.Optional[int] = None
+        # Scopes (FQN of databases and schemas) already completed.
+        self._completed: typing.Set[str] = set()
+        # Number of units not uploaded yet, by FQN of the database.
+        self._pending_units: typing.Dict[str, int] = {}
+        self._pending_lock = threading.Lock()
+        # Changes detected in the assets, recorded in batches.
+        self._provider_id = None
+        self._changes: typing.List[AssetChangeCreateSchema] = []
+        self._changes_lock = threading.Lock()
+        # Time spent by the phases of the last collection.
+        self.timer = timing.DataCollectionTimer()
 
     def _format_fqn(self, asset_type: str, list_values: typing.List):
         """Format the fully qualified name."""
@@ -61,49 +154,136 @@ class DataCollectionEngine:
         ]
         return f"{FQN_PREFIXES[asset_type]}." + ".".join(fully_qualified_name)
 
-    def _process_sample(self, 
-                        database_table_sample: DatabaseTableSampleCreateSchema):
-        response_code, response = get_request(constants.SAMPLE_ROUTE,f"table/{database_table_sample.database_table_id}")
+    @staticmethod
+    def _get_metadata(table) -> typing.Dict[str, typing.Any]:
+        """Return the metadata of a table read from the source. Fields
+        filled by the engine (ids, FQN, semantic types) are not included."""
+        return table.model_dump(
+            mode="json",
+            include={
+                **{field: True for field in FINGERPRINT_TABLE_FIELDS},
+                "columns": {"__all__": FINGERPRINT_COLUMN_FIELDS},
+            },
+        )
+
+    def _get_fingerprint(self, table: DatabaseTableCreateSchema) -> str:
+        """Return a stable hash of the metadata read from the source."""
+        data = self._get_metadata(table)
+        return hashlib.sha256(
+            json.dumps(data, sort_keys=True).encode("utf-8")
+        ).hexdigest()
 
-        if response_code == 404:
-            return post_request(constants.SAMPLE_ROUTE, database_table_sample.model_dump()) 
-        elif response_code == 200:
-            response = DatabaseTableSampleItemSchema.model_validate(response)
-            return patch_request(
-                constants.SAMPLE_ROUTE, str(response.id), database_table_sample.model_dump()
-            )
-        else:
-            raise Exception(f"Invalid status {response_code}")
+    @staticmethod
+    def _format_value(value) -> typing.Optional[str]:
+        if value is None or isinstance(value, str):
+            return value
+        return json.dumps(value)
 
-    def _process_object(
+    def _record_change(
         self,
-        route: str,
-        fqn: str,
-        new_asset: typing.Union[
-            DatabaseProviderItemSchema,
-            DatabaseCreateSchema,
-            DatabaseSchemaCreateSchema,
-            DatabaseTableCreateSchema,
-        ],
+        asset_id,
+        kind: AssetChangeKind,
+        field: typing.Optional[str] = None,
+        old_value=None,
+        new_value=None,
     ):
-        """Process an object generically using the Limoeiro API."""
-
-        # Get the object by the fully qualified name.
-        response_code, _ = options_request(constants.ASSET_ROUTE, fqn)
-
-        if response_code == 404:
-            # If the object does not exist, create it using a post request.
-            return post_request(route, new_asset.model_dump())
-        elif response_code == 200:
-            # If the object already exists, update it using a patch request.
-            # FIXME result_dict = self.diff.diff_objects(new_asset, current_dict, route)
-            new_asset.version = "1"
-            new_asset.updated_at = datetime.datetime.utcnow()
-            return patch_request(
-                route, new_asset.fully_qualified_name, new_asset.model_dump()
+        """Keep a change detected in an asset, to be recorded in a batch."""
+        change = AssetChangeCreateSchema(
+            asset_id=asset_id,
+            provider_id=self._provider_id,
+            execution_id=self._execution_id,
+            kind=kind,
+            field=field,
+            old_value=self._format_value(old_value),
+            new_value=self._format_value(new_value),
+        )
+        with self._changes_lock:
+            self._changes.append(change)
+            full = len(self._changes) >= CHANGE_BATCH_SIZE
+        if full:
+            self._flush_changes()
+
+    def _record_table_changes(self, table_id, changes: ChangeSet):
+        for field, (old_value, new_value) in changes.fields.items():
+            self._record_change(
+                table_id, AssetChangeKind.UPDATED, field, old_value, new_value
             )
-        else:
-            raise Exception(f"Invalid status {response_code}")
+        for name in changes.added:
+            self._record_change(table_id, AssetChangeKind.COLUMN_ADDED, name)
+        for name in changes.removed:
+            self._record_change(table_id, AssetChangeKind.COLUMN_REMOVED, name)
+        for name, fields in changes.modified.items():
+            for field, (old_value, new_value) in fields.items():
+                self._record_change(
+                    table_id,
+                    AssetChangeKind.COLUMN_UPDATED,
+                    f"{name}.{field}",
+                    old_value,
+                    new_value,
+                )
+
+    def _flush_changes(self):
+        """Record the changes kept in memory."""
+        with self._changes_lock:
+            changes, self._changes = self._changes, []
+        if changes:
+            self.sink.add_changes(changes)
+
+    def _get_change_set(
+        self, table: DatabaseTableCreateSchema, current_id
+    ) -> typing.Tuple[ChangeSet, DatabaseTableChangeSetSchema]:
+        """Compare the table with its version in the catalog and return the
+        changes and a change set with only the changed fields and columns,
+        with the version bumped accordingly (see ChangeSet.bump)."""
+        current_table = self.sink.get_table(str(current_id))
+        current = self._get_metadata(current_table)
+        current.update(
+            id=str(current_table.id),
+            fully_qualified_name=current_table.fully_qualified_name,
+        )
+        changes = self.diff.diff(self._get_metadata(table), current, "table")
+
+        modified = {
+            name: {field: new for field, (_, new) in fields.items()}
+            for name, fields in changes.modified.items()
+        }
+        # Semantic types are sent when classified (as in the bulk upsert),
+        # but they are not metadata of the source (and keep the version).
+        current_columns = {c.name: c for c in current_table.columns or []}
+        for column in table.columns or []:
+            current_column = current_columns.get(column.name)
+            if (
+                current_column is not None
+                and "semantic_type" in column.model_fields_set
+                and column.semantic_type != current_column.semantic_type
+            ):
+                modified.setdefault(column.name, {})[
+                    "semantic_type"
+                ] = column.semantic_type
+
+        return changes, DatabaseTableChangeSetSchema(
+            fields=DatabaseTableUpdateSchema(
+                **{field: new for field, (_, new) in changes.fields.items()},
+                version=changes.bump(current_table.version),
+                fingerprint=table.fingerprint,
+            ),
+            added_columns=[
+                column
+                for column in table.columns or []
+                if column.name in changes.added
+            ],
+            modified_columns=[
+                TableColumnChangeSchema(name=name, **fields)
+                for name, fields in modified.items()
+            ],
+            removed_columns=list(changes.removed),
+        )
+
+    def _process_sample(
+        self, database_table_sample: DatabaseTableSampleCreateSchema
+    ):
+        """Create or replace the sample of a table."""
+        return self.sink.upsert_sample(database_table_sample)
 
     def _process_database(
         self,
@@ -117,11 +297,8 @@ class DataCollectionEngine:
         database.provider_id = provider.id
 
         self.log.log_obj_collecting("database", database.name)
-
-        result: typing.Dict[str, typing.Any] = self._process_object(
-            constants.DATABASE_ROUTE, fqn=fqn, new_asset=database
-        )
-        return DatabaseItemSchema(**result)
+        with timing.span("api_write"):
+            return self.sink.upsert_database(database)
 
     def _process_schema(
         self,
@@ -136,18 +313,17 @@ class DataCollectionEngine:
         schema.fully_qualified_name = fqn
         schema.database_id = database.id
         self.log.log_obj_collecting("schema", schema.name)
-        return DatabaseSchemaItemSchema(
-            **self._process_object(constants.SCHEMA_ROUTE, fqn, schema)
-        )
+        with timing.span("api_write"):
+            return self.sink.upsert_schema(schema)
 
-    def _process_table(
+    def _prepare_table(
         self,
         table: DatabaseTableCreateSchema,
         provider: DatabaseProviderItemSchema,
         database: DatabaseItemSchema,
         schema: typing.Optional[DatabaseSchemaItemSchema],
-    ):
-        """Process the object table."""
+    ) -> DatabaseTableCreateSchema:
+        """Prepare the object table to be sent in a batch."""
         list_values = [
             provider.name,
             database.name,
@@ -167,22 +343,91 @@ class DataCollectionEngine:
             table.database_schema_id = schema.id
 
         self.log.log_obj_collecting("table", table.name)
-        return DatabaseTableItemSchema.model_validate(self._process_object(constants.TABLE_ROUTE, fqn, table))
+        return table
 
-    def execute_collection(
+    def _process_tables(
         self,
-        provider: DatabaseProviderItemSchema,
-        connection: DatabaseProviderConnectionItemSchema,
-        ingestion: DatabaseProviderIngestionItemSchema,
+        items: typing.List[
+            typing.Tuple[
+                DatabaseTableCreateSchema,
+                typing.Optional[DatabaseTableSampleCreateSchema],
+            ]
+        ],
     ):
-        """Execute the collection for the database provider."""
-        
-        # Create the collector.
-        collector = CollectorFactory.create_collector(
-            provider, ingestion, connection
-        )
+        """Create or update the tables (and their samples) in batches, using
+        a single request per batch instead of one request per table.
+        Tables already collected, whose metadata changed, are updated with
+        only their changes (see _get_change_set)."""
+        changed, created = [], []
+        for item in items:
+            current = self._fingerprints.get(item[0].fully_qualified_name)
+            if (
+                current is not None
+                and current.fingerprint
+                and not current.deleted
+            ):
+                changed.append((item, current.id))
+            else:
+                # New, disabled or collected before the fingerprints.
+                created.append(item)
+        timing.count("api_write", updated=len(changed))
+
+        for (table, database_table_sample), table_id in changed:
+            changes, change_set = self._get_change_set(table, table_id)
+            self.sink.apply_changes(str(table_id), change_set)
+            self._record_table_changes(table_id, changes)
+            if database_table_sample:
+                database_table_sample.database_table_id = table_id
+                self._process_sample(database_table_sample)
+
+        for i in range(0, len(created), TABLE_BATCH_SIZE):
+            batch = created[i : i + TABLE_BATCH_SIZE]
+            result = self.sink.upsert_tables([table for table, _ in batch])
+            ids = {r.fully_qualified_name: r.id for r in result}
+            created_count = sum(1 for r in result if r.created)
+            timing.count(
+                "api_write",
+                created=created_count,
+                updated=len(result) - created_count,
+            )
+            for r in result:
+                current = self._fingerprints.get(r.fully_qualified_name)
+                if r.created:
+                    self._record_change(r.id, AssetChangeKind.CREATED)
+                elif current is not None and current.deleted:
+                    self._record_change(
+                        r.id, AssetChangeKind.UPDATED, "deleted", True, False
+                    )
+
+            for table, database_table_sample in batch:
+                if database_table_sample:
+                    database_table_sample.database_table_id = ids[
+                        table.fully_qualified_name
+                    ]
+                    self._process_sample(database_table_sample)
+
+    def _get_max_workers(
+        self,
+        collector: Collector,
+        ingestion: DatabaseProviderIngestionItemSchema,
+    ) -> int:
+        """Return the number of workers of each collection stage. Collectors
+        that keep per-call state are always used by a single worker."""
+        if not collector.supports_parallelism():
+            return 1
+        return max(1, min(MAX_INGESTION_WORKERS, ingestion.max_workers or 1))
+
+    def _select_databases(
+        self,
+        collector: Collector,
+        ingestion: DatabaseProviderIngestionItemSchema,
+    ) -> typing.Tuple[typing.List[DatabaseCreateSchema], typing.List[str]]:
+        """Return the databases of the provider selected by the rules and
+        the names of the ignored ones."""
         # Get the databases of the database provider.
-        database_list = collector.get_databases()
+        with timing.span("list_databases"):
+            database_list = collector.get_databases()
+        timing.count("list_databases", items=len(database_list))
         include_db_re = (
             re.compile(ingestion.include_database)
             if ingestion.include_database
@@ -193,29 +438,8 @@ class DataCollectionEngine:
             if ingestion.exclude_database
             else None
         )
-        include_sc_re = (
-            re.compile(ingestion.include_schema)
-            if ingestion.include_schema
-            else None
-        )
-        exclude_sc_re = (
-            re.compile(ingestion.exclude_schema)
-            if ingestion.exclude_schema
-            else None
-        )
-        include_tb_re = (
-            re.compile(ingestion.include_table)
-            if ingestion.include_table
-            else None
-        )
-        exclude_tb_re = (
-            re.compile(ingestion.exclude_table)
-            if ingestion.exclude_table
-            else None
-        )
-        # Iterate all databases.
         ignored_dbs = []
-        valid_dbs = []
+        selected_dbs = []
         for db in database_list:
             db_name = db.name
             if collector.supports_database():
@@ -232,232 +456,647 @@ class DataCollectionEngine:
             if ignore_db:
                 ignored_dbs.append(db_name)
             elif must_db:
-                # Process the object database
-                database = self._process_database(db, provider)
-                valid_dbs.append(db_name)
-                
-                # Get the schemas of the database.
-
-                if collector.supports_schema():
-                    schema_list = collector.get_schemas(db_name)
-
-                    ignorable = collector.get_ignorable_schemas()
-                    # Iterate all schemas.
-                    for schema in schema_list:
-                        schema_name = schema.name
-                        if schema_name in ignorable:
-                            continue
-                        
-                        must_not_sc = bool(exclude_sc_re and exclude_sc_re.match(schema_name))
-                        must_sc = bool(include_sc_re and include_sc_re.match(schema_name))
-                        ignore_sc = (include_sc_re is not None and not must_sc) or must_not_sc
-                        
-                        if ignore_sc:
-                            print(f"Schema '{schema_name}' ignored by rules.")
-                            continue
-                        
-                        # Process the object schema
-                        schema = self._process_schema(
-                            schema, provider, database
-                        )
-                        # Get the tables of the schema.
-                        table_list = collector.get_tables(db_name, schema_name)
-                    
-                        schema_ignored_tbs = []
-                        schema_valid_tbs = []
-
-                        for table in table_list:
-                            self._pre_process_table(
-                                table,
-                                provider,
-                                include_tb_re,
-                                exclude_tb_re,
-                                database,
-                                collector,
-                                ingestion,
-                                schema_ignored_tbs,  # ou ignored_tbs
-                                schema_valid_tbs,    # ou valid_tbs
-                                schema               # ou None se não houver schema
-                            )
-                        
-                        db_table_api_client = DatabaseTableApiClient()
-                        existing_tbs_in_database = db_table_api_client.find_by_database(str(database.id))
-                        
-                        existing_tbs_in_schema = [
-                            tb for tb in existing_tbs_in_database 
-                            if tb.database_schema and str(tb.database_schema.id) == str(schema.id)
-                        ]
-                        names_to_disable = []
-                        tb_ids_to_disable = []
-
-                        for tb in existing_tbs_in_schema:
-                            if tb.name not in schema_valid_tbs:
-                                tb_ids_to_disable.append(tb.id)
-                                names_to_disable.append(tb.name)
-                        if tb_ids_to_disable:
-                            self.log.log.info(
-                                "Tables(s) present in metadata under schema '%s' that will be disabled: [%s]",
-                                schema_name, ", ".join(names_to_disable),
-                            )
-                        AssetApiClient.disable_many(tb_ids_to_disable)
-
-                        if schema_ignored_tbs:
-                            self.log.log.info(
-                                "Table(s) under schema '%s' ignored by the rules: [%s]",
-                                schema_name, ", ".join(schema_ignored_tbs),
-                            )
-                                
-                else: 
-                    
-                    ignored_tbs = []
-                    valid_tbs = []
-                    # Get the tables of the schema.
-                    table_list = collector.get_tables(db_name, db_name) 
-                    for table in table_list:
-                        self._pre_process_table(
-                            table,
-                            provider,
-                            include_tb_re,
-                            exclude_tb_re,
-                            database,
-                            collector,
-                            ingestion,
-                            ignored_tbs,  
-                            valid_tbs,    
-                            None             
-                        )
-                    # Handle tables not found in database, but in metadata
-                    db_client = DatabaseTableApiClient()
-                    existing_tbs = db_client.find_by_database(str(database.id))
-                    names_to_disable = []
-                    tb_to_disable = []
-
-                    for tb in existing_tbs:
-                        if tb.name not in valid_tbs:
-                            tb_to_disable.append(tb.id)
-                            names_to_disable.append(tb.name)
-                    if tb_to_disable:
-                        self.log.log.info(
-                            "Tables(s) present in metadata that will be disabled: [%s]",
-                            ", ".join(names_to_disable),
-                        )
-                    AssetApiClient.disable_many(tb_to_disable)
-
-                    if ignored_tbs:
-                        self.log.log.info(
-                            "Table(s) ignored by the rules: [%s]",
-                            ", ".join(ignored_tbs),
-                        )
+                selected_dbs.append(db)
+        return selected_dbs, ignored_dbs
+
+    def _get_schema_rules(
+        self, ingestion: DatabaseProviderIngestionItemSchema
+    ) -> typing.Tuple[typing.Optional[re.Pattern], typing.Optional[re.Pattern]]:
+        """Return the include and exclude rules of the schemas."""
+        include_sc_re = (
+            re.compile(ingestion.include_schema)
+            if ingestion.include_schema
+            else None
+        )
+        exclude_sc_re = (
+            re.compile(ingestion.exclude_schema)
+            if ingestion.exclude_schema
+            else None
+        )
+        return include_sc_re, exclude_sc_re
+
+    def _select_schemas(
+        self,
+        db_name: str,
+        collector: Collector,
+        include_sc_re: typing.Optional[re.Pattern],
+        exclude_sc_re: typing.Optional[re.Pattern],
+    ) -> typing.Tuple[typing.List[DatabaseSchemaCreateSchema], typing.List[str]]:
+        """Return the schemas of the database selected by the rules and the
+        names of the ignored ones."""
+        # Get the schemas of the database.
+        with timing.span("list_schemas"):
+            schema_list = collector.get_schemas(db_name)
+        timing.count("list_schemas", items=len(schema_list))
+        ignorable = collector.get_ignorable_schemas()
+        selected, ignored = [], []
+        for schema in schema_list:
+            schema_name = schema.name
+            if schema_name in ignorable:
+                continue
+
+            must_not_sc = bool(exclude_sc_re and exclude_sc_re.match(schema_name))
+            must_sc = bool(include_sc_re and include_sc_re.match(schema_name))
+            ignore_sc = (include_sc_re is not None and not must_sc) or must_not_sc
+
+            if ignore_sc:
+                self.log.log.info(f"Schema '{schema_name}' ignored by rules.")
+                ignored.append(schema_name)
+                continue
+            selected.append(schema)
+        return selected, ignored
+
+    def _collect_database(
+        self,
+        db: DatabaseCreateSchema,
+        provider: DatabaseProviderItemSchema,
+        collector: Collector,
+        include_sc_re: typing.Optional[re.Pattern],
+        exclude_sc_re: typing.Optional[re.Pattern],
+    ) -> typing.List[
+        typing.Tuple[
+            DatabaseItemSchema, typing.Optional[DatabaseSchemaCreateSchema]
+        ]
+    ]:
+        """Process the object database and return the units (database and
+        schema) whose tables must be collected. If the provider does not
+        support schemas, the database itself is the only unit."""
+        db_name = db.name
+        # Process the object database
+        database = self._process_database(db, provider)
+        db_fqn = self._format_fqn("Database", [provider.name, db_name])
+
+        if not collector.supports_schema():
+            self._register_units(db_fqn, 1)
+            return [(database, None)]
+
+        schema_list, _ = self._select_schemas(
+            db_name, collector, include_sc_re, exclude_sc_re
+        )
+        units = []
+        for schema in schema_list:
+            schema_name = schema.name
+            schema_fqn = self._format_fqn(
+                "Schema", [provider.name, db_name, schema_name]
+            )
+            if schema_fqn in self._completed:
+                self.log.log.info(
+                    "Schema '%s' already collected, skipped.", schema_name
+                )
+                continue
+            units.append((database, schema))
+        self._register_units(db_fqn, len(units))
+        return units
+
+    def _register_units(self, db_fqn: str, count: int):
+        """Record the number of units of a database still to be uploaded.
+        A database without units is checkpointed immediately."""
+        if self._execution_id is None:
+            return
+        if count:
+            with self._pending_lock:
+                self._pending_units[db_fqn] = count
+        else:
+            self.sink.add_checkpoint(self._execution_id, db_fqn)
+
+    def _checkpoint(self, unit: "CollectedUnit", provider_name: str):
+        """Record the unit as completed. The database is completed when all
+        of its units are."""
+        if self._execution_id is None:
+            return
+        db_fqn = self._format_fqn(
+            "Database", [provider_name, unit.database.name]
+        )
+        if unit.schema is not None:
+            self.sink.add_checkpoint(
+                self._execution_id,
+                self._format_fqn(
+                    "Schema",
+                    [provider_name, unit.database.name, unit.schema.name],
+                ),
+            )
+        with self._pending_lock:
+            self._pending_units[db_fqn] -= 1
+            done = self._pending_units[db_fqn] == 0
+            if done:
+                del self._pending_units[db_fqn]
+        if done:
+            self.sink.add_checkpoint(self._execution_id, db_fqn)
+
+    def _reflect_tables(
+        self,
+        database: DatabaseItemSchema,
+        schema: typing.Optional[DatabaseSchemaCreateSchema],
+        provider: DatabaseProviderItemSchema,
+        collector: Collector,
+    ) -> CollectedUnit:
+        """Reflect the tables of a schema (or of a database, if the provider
+        does not support schemas)."""
+        db_name = database.name
+        schema_item = None
+        if schema is not None:
+            # Process the object schema
+            schema_item = self._process_schema(schema, provider, database)
+        with timing.span("reflect"):
+            table_list = collector.get_tables(
+                db_name, schema.name if schema is not None else db_name
+            )
+        timing.count("reflect", items=len(table_list))
+        return CollectedUnit(database, schema_item, table_list)
+
+    def _sample_tables(
+        self,
+        unit: CollectedUnit,
+        provider: DatabaseProviderItemSchema,
+        collector: Collector,
+        ingestion: DatabaseProviderIngestionItemSchema,
+        table_filter: NameFilter,
+        table_pool: ThreadPoolExecutor,
+    ) -> CollectedUnit:
+        """Apply the rules to the reflected tables and collect their samples.
+        Tables are pre-processed concurrently using table_pool."""
+
+        @with_log_context
+        def pre_process(table):
+            return self._pre_process_table(
+                table,
+                provider,
+                table_filter,
+                unit.database,
+                collector,
+                ingestion,
+                unit.ignored_tbs,
+                unit.valid_tbs,
+                unit.schema,
+            )
+
+        unit.batch = [
+            item for item in table_pool.map(pre_process, unit.tables) if item
+        ]
+        # Reflected tables are no longer needed, release them.
+        unit.tables = []
+        return unit
+
+    def _upload_tables(self, unit: CollectedUnit):
+        """Send the tables to the catalog and disable the ones that no longer
+        exist in the schema (or in the database)."""
+        database, schema_item = unit.database, unit.schema
+        with timing.span("api_write"):
+            self._process_tables(unit.batch)
+        timing.count("api_write", skipped=len(unit.valid_tbs) - len(unit.batch))
+        self.log.log.info(
+            "%d table(s) sent to the catalog, %d unchanged.",
+            len(unit.batch), len(unit.valid_tbs) - len(unit.batch),
+        )
+
+        # Handle tables not found in database, but in metadata
+        if schema_item is not None:
+            scope = {"database_schema_id": schema_item.id}
+        else:
+            scope = {"database_id": database.id}
+        with timing.span("reconcile"):
+            reconciled = self.sink.reconcile(
+                AssetReconcileSchema(
+                    fully_qualified_names=unit.valid_tbs, **scope
+                )
+            )
+        timing.count("reconcile", disabled=len(reconciled.disabled_ids))
+        names_to_disable = reconciled.disabled
+        for table_id in reconciled.disabled_ids:
+            self._record_change(table_id, AssetChangeKind.DISABLED)
+        with timing.span("api_write"):
+            self._flush_changes()
+
+        if schema_item is not None:
+            if names_to_disable:
+                self.log.log.info(
+                    "Tables(s) present in metadata under schema '%s' that were disabled: [%s]",
+                    schema_item.name, ", ".join(names_to_disable),
+                )
+            if unit.ignored_tbs:
+                self.log.log.info(
+                    "Table(s) under schema '%s' ignored by the rules: [%s]",
+                    schema_item.name, ", ".join(unit.ignored_tbs),
+                )
         else:
-            # Handle databases not found in provider, but in metadata
-            db_client = DatabaseApiClient()
-            existing_dbs = db_client.find_by_provider(str(provider.id))
-            names_to_disable = []
-            to_disable = []
-            for db in existing_dbs:
-                if db.name not in valid_dbs:
-                    to_disable.append(db.id)
-                    names_to_disable.append(db.name)
-            if to_disable:
+            if names_to_disable:
                 self.log.log.info(
-                    "Database(s) present in metadata that will be disabled: [%s]",
+                    "Tables(s) present in metadata that were disabled: [%s]",
                     ", ".join(names_to_disable),
                 )
-            AssetApiClient.disable_many(to_disable)
+            if unit.ignored_tbs:
+                self.log.log.info(
+                    "Table(s) ignored by the rules: [%s]",
+                    ", ".join(unit.ignored_tbs),
+                )
+
+    def execute_collection(
+        self,
+        provider: DatabaseProviderItemSchema,
+        connection: DatabaseProviderConnectionItemSchema,
+        ingestion: DatabaseProviderIngestionItemSchema,
+        execution_id: typing.Optional[int] = None,
+    ):
+        """Execute the collection for the database provider. If execution_id
+        is informed, the completed databases and schemas are checkpointed,
+        and the ones already completed by the execution (copied from the
+        failed execution it resumes) are skipped."""
+        self._execution_id = execution_id
+        self._provider_id = provider.id
+        self._pending_units = {}
+        self.timer = timing.DataCollectionTimer()
+        try:
+            # The engines of the collector are shared by the whole
+            # collection and only disposed (closed) at its end.
+            with timing.use_timer(self.timer), contextlib.closing(
+                CollectorFactory.create_collector(
+                    provider, ingestion, connection
+                )
+            ) as collector:
+                try:
+                    self._collect(provider, collector, ingestion)
+                finally:
+                    # Record the remaining asset changes.
+                    with timing.span("api_write"):
+                        self._flush_changes()
+        finally:
+            # Write pending changes (direct sink).
+            self.sink.close()
+            self.timer.stop()
+            for span in self.timer.get_spans():
+                self.log.log.info("%s", span)
+            for (server, route), stats in reset_http_stats().items():
+                self.log.log.info("HTTP %s %s: %s", server, route, stats)
+            if ingestion.collect_sample and ingestion.apply_semantic_analysis:
+                self.semantic.save()
+                self.log.log.info(
+                    "Semantic type cache: %d hit(s), %d miss(es).",
+                    *self.semantic.cache.reset_stats(),
+                )
+
+    def plan_collection(
+        self,
+        provider: DatabaseProviderItemSchema,
+        connection: DatabaseProviderConnectionItemSchema,
+        ingestion: DatabaseProviderIngestionItemSchema,
+    ) -> DatabaseProviderIngestionPlanSchema:
+        """Plan the collection for the database provider: list the
+        databases, schemas and tables selected by the rules (without reading
+        the metadata of the tables), compare them with the catalog and
+        estimate the cost of the execution. Nothing is written to the
+        catalog. Calls to the semantic type API are not estimated, because
+        they depend on the columns of the tables."""
+        try:
+            with contextlib.closing(
+                CollectorFactory.create_collector(
+                    provider, ingestion, connection
+                )
+            ) as collector:
+                return self._plan(provider, collector, ingestion)
+        finally:
+            self.sink.close()
+            for (server, route), stats in reset_http_stats().items():
+                self.log.log.info("HTTP %s %s: %s", server, route, stats)
+
+    def _plan_unit(
+        self,
+        provider: DatabaseProviderItemSchema,
+        collector: Collector,
+        db_name: str,
+        schema_name: typing.Optional[str],
+        exists: bool,
+    ) -> DatabaseProviderIngestionPlanItemSchema:
+        """Plan the tables of a schema (or of a database, if the provider
+        does not support schemas)."""
+        path = [provider.name, db_name] + (
+            [schema_name] if schema_name is not None else []
+        )
+        fqns = {
+            self._format_fqn("Table", path + [name])
+            for name in collector.list_tables(db_name, schema_name or db_name)
+        }
+        item = DatabaseProviderIngestionPlanItemSchema(
+            database=db_name,
+            schema_name=schema_name,
+            exists=exists,
+            tables=len(fqns),
+        )
+        for fqn in fqns:
+            current = self._fingerprints.get(fqn)
+            if current is None or current.deleted:
+                item.create += 1
+            else:
+                item.update += 1
+        # Tables of the scope in the catalog, but not found in the source.
+        prefix = self._format_fqn("Table", path) + "."
+        item.disable = sum(
+            1
+            for fqn, current in self._fingerprints.items()
+            if fqn.startswith(prefix)
+            and not current.deleted
+            and fqn not in fqns
+        )
+        return item
+
+    def _plan(
+        self,
+        provider: DatabaseProviderItemSchema,
+        collector: Collector,
+        ingestion: DatabaseProviderIngestionItemSchema,
+    ) -> DatabaseProviderIngestionPlanSchema:
+        self._fingerprints = self.sink.get_fingerprints(str(provider.id))
+        selected_dbs, ignored_dbs = self._select_databases(collector, ingestion)
+        include_sc_re, exclude_sc_re = self._get_schema_rules(ingestion)
+        max_workers = self._get_max_workers(collector, ingestion)
+        plan = DatabaseProviderIngestionPlanSchema(
+            databases=len(selected_dbs),
+            databases_ignored=ignored_dbs,
+            max_workers=max_workers,
+        )
+
+        # Units (database, schema and if it is in the catalog) to be planned.
+        units = []
+        for db in selected_dbs:
+            db_exists = self.sink.exists(
+                self._format_fqn("Database", [provider.name, db.name])
+            )
+            plan.databases_create += 0 if db_exists else 1
+            if not collector.supports_schema():
+                units.append((db.name, None, db_exists))
+                continue
+            schemas, ignored = self._select_schemas(
+                db.name, collector, include_sc_re, exclude_sc_re
+            )
+            plan.schemas_ignored += len(ignored)
+            for schema in schemas:
+                schema_exists = db_exists and self.sink.exists(
+                    self._format_fqn(
+                        "Schema", [provider.name, db.name, schema.name]
+                    )
+                )
+                plan.schemas += 1
+                plan.schemas_create += 0 if schema_exists else 1
+                units.append((db.name, schema.name, schema_exists))
+
+        with ThreadPoolExecutor(
+            max_workers, thread_name_prefix="collector-plan"
+        ) as pool:
+            plan.items = list(
+                pool.map(
+                    with_log_context(
+                        lambda unit: self._plan_unit(provider, collector, *unit)
+                    ),
+                    units,
+                )
+            )
+
+        for item in plan.items:
+            plan.tables += item.tables
+            plan.tables_create += item.create
+            plan.tables_update += item.update
+            plan.tables_disable += item.disable
+        if ingestion.collect_sample:
+            plan.sampled_tables = plan.tables
+            plan.sampled_rows = plan.tables * SAMPLE_ROWS
+
+        # List the databases, the schemas of each one and the tables (and
+        # views) of each schema, then read the tables (as estimated by the
+        # collector) and their samples.
+        plan.source_queries = (
+            1
+            + (plan.databases if collector.supports_schema() else 0)
+            + 2 * len(units)
+            + sum(
+                collector.estimate_reflection_queries(item.tables)
+                for item in plan.items
+            )
+            + SAMPLE_QUERIES_PER_TABLE * plan.sampled_tables
+        )
+        # Fingerprints and reconciliation of the provider; lookup and write
+        # of each database and schema; table batches and reconciliation of
+        # each unit; lookup and write of each sample.
+        plan.api_calls = (
+            2
+            + 2 * (plan.databases + plan.schemas)
+            + sum(
+                -(-item.tables // TABLE_BATCH_SIZE) + 1 for item in plan.items
+            )
+            + 2 * plan.sampled_tables
+        )
+        self.log.log.info(
+            "Plan: %d database(s), %d schema(s), %d table(s) "
+            "(%d to create, %d to update, %d to disable).",
+            plan.databases, plan.schemas, plan.tables,
+            plan.tables_create, plan.tables_update, plan.tables_disable,
+        )
+        return plan
+
+    def _collect(
+        self,
+        provider: DatabaseProviderItemSchema,
+        collector: Collector,
+        ingestion: DatabaseProviderIngestionItemSchema,
+    ):
+        # Preload the fingerprints of the tables already in the catalog.
+        self._fingerprints = self.sink.get_fingerprints(str(provider.id))
+        self._completed = (
+            self.sink.get_checkpoints(self._execution_id)
+            if self._execution_id is not None
+            else set()
+        )
+        # Select the databases to be processed.
+        valid, ignored_dbs = self._select_databases(collector, ingestion)
+        valid_dbs = [db.name for db in valid]
+        selected_dbs = []
+        for db in valid:
+            db_fqn = self._format_fqn("Database", [provider.name, db.name])
+            if db_fqn in self._completed:
+                self.log.log.info(
+                    "Database '%s' already collected, skipped.", db.name
+                )
+            else:
+                selected_dbs.append(db)
+        include_sc_re, exclude_sc_re = self._get_schema_rules(ingestion)
+        # Also applied by the collectors, before reading the tables.
+        table_filter = collector.get_table_filter()
+
+        # The collection is a pipeline (list schemas -> reflect -> sample ->
+        # upload) connected by bounded queues, so that uploading a schema
+        # overlaps with reflecting the next ones. Tables are sampled by a
+        # separate pool, shared by the sample workers.
+        max_workers = self._get_max_workers(collector, ingestion)
+        # Each stage (and the sampling pool) may use a connection.
+        self.sink.set_max_workers(max_workers * 4)
+        # Collectors that can not be used from several threads are only
+        # called by one stage at a time.
+        collector_lock = (
+            contextlib.nullcontext()
+            if collector.supports_parallelism()
+            else threading.Lock()
+        )
+
+        def list_schemas(db):
+            with collector_lock:
+                return self._collect_database(
+                    db, provider, collector, include_sc_re, exclude_sc_re
+                )
+
+        def reflect(unit):
+            with collector_lock:
+                return [self._reflect_tables(*unit, provider, collector)]
+
+        def upload(unit):
+            self._upload_tables(unit)
+            self._checkpoint(unit, provider.name)
+
+        def sample(unit):
+            with collector_lock:
+                unit = self._sample_tables(
+                    unit,
+                    provider,
+                    collector,
+                    ingestion,
+                    table_filter,
+                    table_pool,
+                )
+            # check if the parameter to apply semantic analysis was checked
+            if ingestion.collect_sample and ingestion.apply_semantic_analysis:
+                self._classify_columns(unit.batch)
+            return [unit]
+
+        with ThreadPoolExecutor(
+            max_workers, thread_name_prefix="collector-table"
+        ) as table_pool:
+            pipeline = (
+                DataCollectionPipeline(PIPELINE_QUEUE_SIZE)
+                .add_stage("schemas", list_schemas, max_workers)
+                .add_stage("reflect", reflect, max_workers)
+                .add_stage("sample", sample, max_workers)
+                .add_stage("upload", upload)
+            )
+            for counter in pipeline.run(selected_dbs):
+                self.log.log.info("%s", counter)
+
+        # Handle databases not found in provider, but in metadata
+        with timing.span("reconcile"):
+            reconciled = self.sink.reconcile(
+                AssetReconcileSchema(
+                    provider_id=provider.id,
+                    fully_qualified_names=[
+                        self._format_fqn("Database", [provider.name, db_name])
+                        for db_name in valid_dbs
+                    ],
+                )
+            )
+        timing.count("reconcile", disabled=len(reconciled.disabled_ids))
+        names_to_disable = reconciled.disabled
+        for database_id in reconciled.disabled_ids:
+            self._record_change(database_id, AssetChangeKind.DISABLED)
+        if names_to_disable:
+            self.log.log.info(
+                "Database(s) present in metadata that were disabled: [%s]",
+                ", ".join(names_to_disable),
+            )
 
         if ignored_dbs:
             self.log.log.info(
                 "Database(s) ignored by the rules: [%s]", ", ".join(ignored_dbs)
             )
 
-    def _get_semantic_type(self, sample:typing.List) -> str:
-        sample_serialized = []
-        for s in sample:
-            if isinstance(s, uuid.UUID):
-                sample_serialized.append(str(s))
-            elif isinstance(s, datetime.datetime):
-                sample_serialized.append(s.isoformat())
-            else:
-                sample_serialized.append(str(s))
+    def _classify_columns(
+        self,
+        batch: typing.List[
+            typing.Tuple[
+                DatabaseTableCreateSchema,
+                typing.Optional[DatabaseTableSampleCreateSchema],
+            ]
+        ],
+    ):
+        """Infer the semantic type of the columns of the tables from their
+        samples. All columns are sent to the classifier at once."""
+        columns = []
+        samples = []
+        for table, database_table_sample in batch:
+            if not database_table_sample or not database_table_sample.content:
+                continue
+            # Format samples to infer the semantic values
+            structured_sample = defaultdict(list)
+            for sample in database_table_sample.content:
+                for column in sample.keys():
+                    structured_sample[column].append(sample[column])
+
+            for column in table.columns:
+                sample = structured_sample.get(column.name, [])
+                if sample:
+                    columns.append(column)
+                    samples.append(sample)
+
+        if samples:
+            with timing.span("semantic"):
+                semantic_types = self.semantic.classify_many(samples)
+            timing.count("semantic", items=len(samples))
+            for column, semantic_type in zip(columns, semantic_types):
+                column.semantic_type = semantic_type
 
-        api_url = os.environ["SEMANTIC_API_URL"]
-        url = api_url.rstrip("/") + "/" + "classificar-valores/"
-        response = requests.post(
-            url, json=sample_serialized
-        )
-        
-        if response.status_code == 200:
-            return response.text.replace("\"", "") 
-        else:
-            return "API_FAILED"
-        
     def _pre_process_table(
         self,
         table: DatabaseTableCreateSchema,
         provider: DatabaseProviderItemSchema,
-        include_tb_re: typing.Optional[re.Pattern],
-        exclude_tb_re: typing.Optional[re.Pattern],
+        table_filter: NameFilter,
         database: DatabaseItemSchema,
         collector: Collector,
         ingestion: DatabaseProviderIngestionItemSchema,
         ignored_tbs: typing.List[str],
         valid_tbs: typing.List[str],
         schema: typing.Optional[DatabaseSchemaItemSchema] = None,
-    ):
+    ) -> typing.Optional[
+        typing.Tuple[
+            DatabaseTableCreateSchema,
+            typing.Optional[DatabaseTableSampleCreateSchema],
+        ]
+    ]:
+        """Prepare the table (and its sample) to be sent to the catalog.
+        Return None if the table is ignored by the rules or if it did not
+        change since the last collection."""
         tb_name = table.name
-        # Test if tb_name must be excluded from processing (ignored)
-        must_not_tb = bool(exclude_tb_re and exclude_tb_re.match(tb_name))
-        # Test if tb_name must be processed
-        must_tb = (include_tb_re is None) or (include_tb_re and include_tb_re.match(tb_name))
-        # If both flags, item is explicitly ignored
-        ignore_tb = (not must_tb) or must_not_tb
-
-        if ignore_tb:
+        if not table_filter.matches(tb_name):
             ignored_tbs.append(tb_name)
             self.log.log.info(f"Table '{tb_name}' ignored by rules.")
-            return
-
-        self.log.log.info(f"Table '{tb_name}' will be processed.")
-        # Process the object table.
-        table.database_id = database.id
-        # table.database_schema_id = schema.id #FIXME
-        if schema:
-            table.database_schema_id = schema.id
+            return None
 
-        database_table_sample = None
-        # check if the parameter to collect the sample was checked
-        if ingestion.collect_sample:
-            # Collect the samples
-            database_table_sample = collector.get_samples(
-                database.name,
-                schema.name if schema else database.name,
-                table,
-            )
-            
-            # check if the parameter to apply semantic analysis was checked
-            if ingestion.apply_semantic_analysis and database_table_sample and database_table_sample.content:
-                # Format samples to infer the semantic values
-                structured_sample = defaultdict(list)
-                for sample in database_table_sample.content:
-                    for column in sample.keys():
-                        structured_sample[column].append(sample[column])
-                        
-                # For each column, get it's semantic value
-                for column in table.columns:
-                    sample = structured_sample.get(column.name, [])
-                    if sample:
-                        semantic_type = self._get_semantic_type(sample)
-                        column.semantic_type = semantic_type
-
-        table_return = self._process_table(
+        table = self._prepare_table(
             table,
             provider,
             database,
             schema,
         )
+        valid_tbs.append(table.fully_qualified_name)
+
+        # Skip tables whose metadata did not change since the last run.
+        table.fingerprint = self._get_fingerprint(table)
+        current = self._fingerprints.get(table.fully_qualified_name)
+        if (
+            current is not None
+            and current.fingerprint == table.fingerprint
+            and not current.deleted
+        ):
+            self.log.log.info(f"Table '{tb_name}' unchanged, skipped.")
+            return None
 
-        if database_table_sample:
-            database_table_sample.database_table_id = table_return.id
-            self._process_sample(database_table_sample)
+        self.log.log.info(f"Table '{tb_name}' will be processed.")
+        # Tables disabled in a previous run are enabled again.
+        table.deleted = False
+
+        database_table_sample = None
+        # check if the parameter to collect the sample was checked
+        if ingestion.collect_sample:
+            # Collect the samples
+            with timing.span("sample"):
+                database_table_sample = collector.get_samples(
+                    database.name,
+                    schema.name if schema else database.name,
+                    table,
+                )
+            timing.count("sample", items=1)
 
-        valid_tbs.append(tb_name)
+        return table, database_table_sample
@@ -1,6 +1,9 @@
 from datetime import datetime
 import logging
 import os
+import threading
+
+_handler_lock = threading.Lock()
 
 
 class DataCollectionLogging:
@@ -16,11 +19,32 @@ class DataCollectionLogging:
         filename = "collector_logs/DataCollectionEngine_" + today + ".log"
         self.log = logging.getLogger(__name__)
         self.log.setLevel(logging.INFO)
-        self.log.addHandler(logging.FileHandler(filename))
-        formatter = logging.Formatter(
-            "%(asctime)s %(levelname)-5s %(message)s", "%Y-%m-%d %H:%M:%S"
-        )
-        self.log.handlers[0].setFormatter(formatter)
+        # The logger is shared by all engines of the process: its file
+        # handler is added once (and replaced when the day changes).
+        with _handler_lock:
+            handler = next(
+                (
+                    h
+                    for h in self.log.handlers
+                    if isinstance(h, logging.FileHandler)
+                ),
+                None,
+            )
+            if handler is not None and handler.baseFilename != os.path.abspath(
+                filename
+            ):
+                self.log.removeHandler(handler)
+                handler.close()
+                handler = None
+            if handler is None:
+                handler = logging.FileHandler(filename)
+                handler.setFormatter(
+                    logging.Formatter(
+                        "%(asctime)s %(levelname)-5s %(message)s",
+                        "%Y-%m-%d %H:%M:%S",
+                    )
+                )
+                self.log.addHandler(handler)
 
     def log_diff_list_element(
         self, obj_type, obj_id, f_q_name, field, element, old_value, new_value
@@ -0,0 +1,216 @@
+import logging
+import queue
+import threading
+import time
+import typing
+
+from app.collector.utils.logging_config import with_log_context
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of the input of a stage.
+_END = object()
+
+# Interval used to check if the pipeline was stopped while waiting on a queue.
+_POLL_INTERVAL = 0.5
+
+
+class StageCounter:
+    """Throughput counters of a pipeline stage."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.items_in = 0
+        self.items_out = 0
+        self.busy_time = 0.0
+        self.wait_input_time = 0.0
+        self.wait_output_time = 0.0
+        self.elapsed = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, **values: float):
+        """Increment the counters in a thread safe way."""
+        with self._lock:
+            for name, value in values.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def __str__(self):
+        rate = self.items_in / self.busy_time if self.busy_time else 0.0
+        return (
+            f"Stage '{self.name}': {self.items_in} item(s) in, "
+            f"{self.items_out} item(s) out, busy {self.busy_time:.2f}s "
+            f"({rate:.2f} item(s)/s), waiting input {self.wait_input_time:.2f}s, "
+            f"waiting output {self.wait_output_time:.2f}s, "
+            f"elapsed {self.elapsed:.2f}s"
+        )
+
+
+class _Stage:
+    def __init__(
+        self,
+        name: str,
+        func: typing.Callable[[typing.Any], typing.Iterable[typing.Any]],
+        workers: int,
+    ):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.counter = StageCounter(name)
+
+
+class DataCollectionPipeline:
+    """Staged pipeline, connected by bounded queues, used by the collection
+    engine to overlap reads from the source with writes to the catalog.
+
+    Each stage is a function that receives an item and returns the items
+    (zero or more) sent to the next stage. The output of the last stage is
+    discarded. When a queue is full, the producing stage blocks until the
+    next one consumes an item (backpressure), so the number of items in
+    memory is bounded by the size of the queues and the number of workers.
+    If a stage fails, the pipeline is stopped and the error is raised by
+    run().
+    """
+
+    def __init__(self, queue_size: int = 2):
+        self.queue_size = max(1, queue_size)
+        self._stages: typing.List[_Stage] = []
+        self._stop = threading.Event()
+        self._error: typing.Optional[BaseException] = None
+        self._error_lock = threading.Lock()
+
+    @property
+    def counters(self) -> typing.List[StageCounter]:
+        return [stage.counter for stage in self._stages]
+
+    def add_stage(
+        self,
+        name: str,
+        func: typing.Callable[[typing.Any], typing.Iterable[typing.Any]],
+        workers: int = 1,
+    ) -> "DataCollectionPipeline":
+        """Add a stage executed by the given number of worker threads."""
+        self._stages.append(_Stage(name, func, workers))
+        return self
+
+    def _fail(self, error: BaseException):
+        with self._error_lock:
+            if self._error is None:
+                self._error = error
+        self._stop.set()
+
+    def _put(self, q: queue.Queue, item) -> bool:
+        """Put an item, blocking while the queue is full. Return False if
+        the pipeline was stopped."""
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: queue.Queue):
+        """Get an item, blocking while the queue is empty. Return _END if
+        the pipeline was stopped."""
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                continue
+        return _END
+
+    def _run_worker(
+        self,
+        stage: _Stage,
+        input_q: queue.Queue,
+        output_q: typing.Optional[queue.Queue],
+        finished: typing.List[int],
+        finished_lock: threading.Lock,
+        next_workers: int,
+    ):
+        counter = stage.counter
+        try:
+            while True:
+                start = time.perf_counter()
+                item = self._get(input_q)
+                counter.add(wait_input_time=time.perf_counter() - start)
+                if item is _END:
+                    break
+
+                start = time.perf_counter()
+                results = stage.func(item) or []
+                counter.add(items_in=1, busy_time=time.perf_counter() - start)
+
+                for result in results:
+                    if output_q is not None:
+                        start = time.perf_counter()
+                        if not self._put(output_q, result):
+                            return
+                        counter.add(
+                            wait_output_time=time.perf_counter() - start
+                        )
+                    counter.add(items_out=1)
+        except BaseException as e:  # noqa: B902
+            logger.exception("Stage '%s' failed", stage.name)
+            self._fail(e)
+        finally:
+            # The last worker of the stage signals the end to the next one.
+            with finished_lock:
+                finished[0] += 1
+                last = finished[0] == stage.workers
+            if last and output_q is not None:
+                for _ in range(next_workers):
+                    if not self._put(output_q, _END):
+                        break
+
+    def run(self, items: typing.Iterable[typing.Any]) -> typing.List[StageCounter]:
+        """Feed the items to the first stage and wait until all stages
+        finish. Return the counters of the stages."""
+        if not self._stages:
+            return []
+
+        queues = [queue.Queue(self.queue_size) for _ in self._stages]
+        threads = []
+        started = time.perf_counter()
+        for i, stage in enumerate(self._stages):
+            output_q = queues[i + 1] if i + 1 < len(queues) else None
+            next_workers = (
+                self._stages[i + 1].workers if output_q is not None else 0
+            )
+            finished = [0]
+            finished_lock = threading.Lock()
+            for n in range(stage.workers):
+                thread = threading.Thread(
+                    target=with_log_context(self._run_worker),
+                    args=(
+                        stage,
+                        queues[i],
+                        output_q,
+                        finished,
+                        finished_lock,
+                        next_workers,
+                    ),
+                    name=f"pipeline-{stage.name}-{n}",
+                    daemon=True,
+                )
+                thread.start()
+                threads.append((stage, thread))
+
+        try:
+            for item in items:
+                if not self._put(queues[0], item):
+                    break
+            else:
+                for _ in range(self._stages[0].workers):
+                    if not self._put(queues[0], _END):
+                        break
+        except BaseException as e:  # noqa: B902
+            self._fail(e)
+
+        for stage, thread in threads:
+            thread.join()
+            stage.counter.elapsed = time.perf_counter() - started
+
+        if self._error is not None:
+            raise self._error
+        return self.counters
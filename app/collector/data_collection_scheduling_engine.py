@@ -1,48 +1,125 @@
-import app.collector.utils.constants_utils as constants
-from app.collector.utils.cron_utils import check_if_cron_is_today
-from app.collector.utils.request_utils import (
-    get_request,
-    post_request
+import asyncio
+import logging
+
+from sqlalchemy import func, select
+
+from app.collector.utils.cron_utils import get_next_run
+from app.database import AsyncSessionLocal
+from app.models import utc_now
+from app.services.asset_change_service import AssetChangeService
+from app.services.database_provider_ingestion_execution_service import (
+    DatabaseProviderIngestionExecutionService,
 )
-from app.models import SchedulingType
-from app.models import DatabaseProviderIngestionExecution
-from pgqueuer import Queries
+from app.services.database_provider_ingestion_service import (
+    DatabaseProviderIngestionService,
+)
+
+log = logging.getLogger(__name__)
+
+# Key of the Postgres advisory lock held by the scheduler that fires the
+# ingestions (any other instance skips the tick).
+SCHEDULER_LOCK_ID = 0x6C696D6F  # "limo"
+
+# Interval (in seconds) between the ticks of the scheduler.
+TICK_INTERVAL = 60
+
+# Max number of ingestions started by a tick (the remaining ones are started
+# by the next ticks).
+MAX_INGESTIONS_PER_TICK = 100
+
+# Key of the Postgres advisory lock held while the retention of the asset
+# changes is applied (it drops and creates partitions).
+RETENTION_LOCK_ID = 0x6C696D72  # "limr"
+
+# When the retention of the asset changes is applied (cron expression).
+RETENTION_SCHEDULING = "0 3 * * *"
+
 
 class DataCollectionSchedulingEngine:
-    """Class to implement the scheduling engine."""
+    """Class to implement the scheduling engine. Each tick starts the
+    ingestions whose next run (next_run_at) is due and computes their next
+    run. Only one scheduler fires at a time: the tick runs in a transaction
+    holding a Postgres advisory lock, and due ingestions are locked with
+    SKIP LOCKED. The jobs of the executions are enqueued in the same
+    transaction, so a failed tick leaves no job behind. The engine also
+    applies the retention of the asset changes once a day."""
 
     def __init__(self):
-        pass
-
-    def _get_ingestions(self, page):
-        """Load the database provider ingestions."""
-        dict_param = {"page": page, "page_size": 20}
-        _, result = get_request(
-            constants.INGESTION_ROUTE, None, params=dict_param
-        )
-        return result["items"], result["page"], result["page_count"]
-
-    async def execute_engine(self):
-        """Execute the collection data engine."""
-        current_page = 0
-        page_count = None
-        # Iter until last page.
-        while current_page != page_count:
-            """ Get all database providers with pagination. """
-            current_page += 1
-            ingestions, _, page_count = self._get_ingestions(current_page)
-            # Iterate the database providers.
-            for i in ingestions:
-                cron_expression = None
-                if  ("scheduling_type" in i) and \
-                    ("scheduling" in i) and \
-                    (i["scheduling_type"] == SchedulingType.CRON.value):
-                    
-                    cron_expression = i["scheduling"]
-                # Check if the cron expression should be executed today.
-                if cron_expression is not None and check_if_cron_is_today(
-                    cron_expression
-                ):
-                    database_provider_ingestion_id = i['id']
-                    route = f"{constants.INGESTION_ROUTE}/start/{database_provider_ingestion_id}"
-                    result = post_request(route, None)
+        self.next_retention_at = get_next_run(RETENTION_SCHEDULING)
+
+    async def execute_engine(self) -> int:
+        """Execute a tick of the scheduler. Returns the number of ingestions
+        started."""
+        async with AsyncSessionLocal() as session:
+            leader = (
+                await session.execute(
+                    select(func.pg_try_advisory_xact_lock(SCHEDULER_LOCK_ID))
+                )
+            ).scalar_one()
+            if not leader:
+                log.debug("Another scheduler is running, skipping the tick.")
+                await session.rollback()
+                return 0
+
+            now = utc_now()
+            ingestions = await DatabaseProviderIngestionService(
+                session
+            ).find_due(now, MAX_INGESTIONS_PER_TICK)
+            executions = DatabaseProviderIngestionExecutionService(session)
+            for ingestion in ingestions:
+                execution = await executions.start(
+                    ingestion.id, trigger_mode="scheduled"
+                )
+                # Runs missed while no scheduler was running are not
+                # repeated: the next run is computed from now.
+                DatabaseProviderIngestionService.schedule(ingestion, now)
+                log.info(
+                    "Started the ingestion %s (execution %s), next run at %s.",
+                    ingestion.id,
+                    execution.id,
+                    ingestion.next_run_at,
+                )
+            # Commit releases the advisory lock.
+            await session.commit()
+            return len(ingestions)
+
+    async def apply_retention(self) -> bool:
+        """Remove the asset changes older than the retention period. Only
+        one scheduler applies it at a time (the others skip it). Returns
+        whether it was applied."""
+        async with AsyncSessionLocal() as session:
+            locked = (
+                await session.execute(
+                    select(func.pg_try_advisory_xact_lock(RETENTION_LOCK_ID))
+                )
+            ).scalar_one()
+            if not locked:
+                log.debug("Another scheduler is applying the retention.")
+                await session.rollback()
+                return False
+            result = await AssetChangeService(session).apply_retention()
+            # Commit releases the advisory lock.
+            await session.commit()
+            log.info("Applied the retention of the asset changes: %s", result)
+            return True
+
+    async def run_forever(self, interval: float = TICK_INTERVAL):
+        """Execute the ticks of the scheduler until cancelled."""
+        while True:
+            try:
+                await self.execute_engine()
+            except asyncio.CancelledError:
+                raise
+            except Exception:  # noqa: B902
+                log.exception("Failed to execute the scheduler tick.")
+            now = utc_now()
+            if now >= self.next_retention_at:
+                # A failed retention is retried only at its next run.
+                self.next_retention_at = get_next_run(RETENTION_SCHEDULING, now)
+                try:
+                    await self.apply_retention()
+                except asyncio.CancelledError:
+                    raise
+                except Exception:  # noqa: B902
+                    log.exception("Failed to apply the retention.")
+            await asyncio.sleep(interval)
@@ -0,0 +1,476 @@
+import asyncio
+import datetime
+import json
+import os
+import threading
+import typing
+import uuid
+from abc import ABC, abstractmethod
+
+from sqlalchemy import select
+
+import app.collector.utils.constants_utils as constants
+from app.collector.utils.api_client import (
+    AssetApiClient,
+    DatabaseProviderApiClient,
+    DatabaseTableApiClient,
+)
+from app.collector.utils.request_utils import (
+    DEFAULT_POOL_SIZE,
+    custom_serializer,
+    get_http_client,
+    get_request,
+    options_request,
+    patch_request,
+    post_request,
+    sanitize_for_json,
+)
+from app.database import AsyncSessionLocal
+from app.models import Asset
+from app.schemas import (
+    AssetChangeCreateSchema,
+    AssetReconcileResultSchema,
+    AssetReconcileSchema,
+    DatabaseCreateSchema,
+    DatabaseProviderIngestionCheckpointCreateSchema,
+    DatabaseItemSchema,
+    DatabaseSchemaCreateSchema,
+    DatabaseSchemaItemSchema,
+    DatabaseSchemaUpdateSchema,
+    DatabaseTableBulkItemSchema,
+    DatabaseTableChangeSetSchema,
+    DatabaseTableCreateSchema,
+    DatabaseTableFingerprintSchema,
+    DatabaseTableItemSchema,
+    DatabaseTableSampleCreateSchema,
+    DatabaseTableSampleItemSchema,
+    DatabaseTableSampleUpdateSchema,
+    DatabaseUpdateSchema,
+)
+from app.services.asset_change_service import AssetChangeService
+from app.services.asset_service import AssetService
+from app.services.database_provider_ingestion_execution_service import (
+    DatabaseProviderIngestionExecutionService,
+)
+from app.services.database_schema_service import DatabaseSchemaService
+from app.services.database_service import DatabaseService
+from app.services.database_table_sample_service import (
+    DatabaseTableSampleService,
+)
+from app.services.database_table_service import DatabaseTableService
+
+# Sink used when COLLECTOR_SINK is not defined.
+DEFAULT_SINK = "http"
+
+# Number of objects written by the direct sink before a commit.
+DIRECT_SINK_COMMIT_EVERY = 1000
+
+# User recorded as the author of the changes written by the direct sink.
+DIRECT_SINK_USER = "collector"
+
+
+class DataCollectionSink(ABC):
+    """Destination of the metadata collected by the collection engine."""
+
+    @abstractmethod
+    def exists(self, fqn: str) -> bool:
+        """Return if an asset, identified by its FQN, is in the catalog."""
+        pass
+
+    @abstractmethod
+    def upsert_database(
+        self, database: DatabaseCreateSchema
+    ) -> DatabaseItemSchema:
+        """Create or update a database, identified by its FQN."""
+        pass
+
+    @abstractmethod
+    def upsert_schema(
+        self, schema: DatabaseSchemaCreateSchema
+    ) -> DatabaseSchemaItemSchema:
+        """Create or update a schema, identified by its FQN."""
+        pass
+
+    @abstractmethod
+    def upsert_tables(
+        self, tables: typing.List[DatabaseTableCreateSchema]
+    ) -> typing.List[DatabaseTableBulkItemSchema]:
+        """Create or update a batch of tables, identified by their FQN."""
+        pass
+
+    @abstractmethod
+    def get_table(self, table_id: str) -> DatabaseTableItemSchema:
+        """Return a table (and its columns), identified by its id."""
+        pass
+
+    @abstractmethod
+    def apply_changes(
+        self, table_id: str, change_set: DatabaseTableChangeSetSchema
+    ) -> DatabaseTableBulkItemSchema:
+        """Update only the changed fields and columns of a table."""
+        pass
+
+    @abstractmethod
+    def upsert_sample(self, sample: DatabaseTableSampleCreateSchema):
+        """Create or replace the sample of a table."""
+        pass
+
+    @abstractmethod
+    def reconcile(
+        self, reconcile_data: AssetReconcileSchema
+    ) -> AssetReconcileResultSchema:
+        """Disable the assets of the scope (provider, database or schema)
+        not found in the source. Return the disabled assets."""
+        pass
+
+    @abstractmethod
+    def add_changes(self, changes: typing.List[AssetChangeCreateSchema]):
+        """Record a batch of changes detected in the assets."""
+        pass
+
+    @abstractmethod
+    def get_fingerprints(
+        self, provider_id: str
+    ) -> typing.Dict[str, DatabaseTableFingerprintSchema]:
+        """Return the fingerprints of the tables of a provider, by FQN."""
+        pass
+
+    @abstractmethod
+    def get_checkpoints(self, execution_id: int) -> typing.Set[str]:
+        """Return the scopes (FQN of databases and schemas) already completed
+        by the execution."""
+        pass
+
+    @abstractmethod
+    def add_checkpoint(self, execution_id: int, scope: str):
+        """Record a scope as completed by the execution. It must be called
+        after the scope is written, so it is never recorded before its
+        data."""
+        pass
+
+    def set_max_workers(self, max_workers: int):
+        """Size the resources of the sink for the number of threads that
+        write to it at the same time."""
+        pass
+
+    def close(self):
+        """Write pending changes and release the resources."""
+        pass
+
+
+class HttpSink(DataCollectionSink):
+    """Sink that writes using the Limoeiro API."""
+
+    def _upsert(
+        self,
+        route: str,
+        new_asset: typing.Union[
+            DatabaseCreateSchema,
+            DatabaseSchemaCreateSchema,
+        ],
+    ):
+        """Process an object generically using the Limoeiro API."""
+        fqn = new_asset.fully_qualified_name
+
+        # Get the object by the fully qualified name.
+        response_code, _ = options_request(constants.ASSET_ROUTE, fqn)
+
+        if response_code == 404:
+            # If the object does not exist, create it using a post request.
+            return post_request(route, new_asset.model_dump())
+        elif response_code == 200:
+            # If the object already exists, update it using a patch request.
+            new_asset.version = "1"
+            new_asset.updated_at = datetime.datetime.utcnow()
+            return patch_request(route, fqn, new_asset.model_dump())
+        else:
+            raise Exception(f"Invalid status {response_code}")
+
+    def exists(self, fqn):
+        response_code, _ = options_request(constants.ASSET_ROUTE, fqn)
+        return response_code == 200
+
+    def upsert_database(self, database):
+        return DatabaseItemSchema(
+            **self._upsert(constants.DATABASE_ROUTE, database)
+        )
+
+    def upsert_schema(self, schema):
+        return DatabaseSchemaItemSchema(
+            **self._upsert(constants.SCHEMA_ROUTE, schema)
+        )
+
+    def upsert_tables(self, tables):
+        return DatabaseTableApiClient().bulk_upsert(tables)
+
+    def get_table(self, table_id):
+        return DatabaseTableApiClient().get(table_id)
+
+    def apply_changes(self, table_id, change_set):
+        return DatabaseTableApiClient().apply_changes(table_id, change_set)
+
+    def upsert_sample(self, sample):
+        response_code, response = get_request(
+            constants.SAMPLE_ROUTE, f"table/{sample.database_table_id}"
+        )
+
+        if response_code == 404:
+            return post_request(constants.SAMPLE_ROUTE, sample.model_dump())
+        elif response_code == 200:
+            response = DatabaseTableSampleItemSchema.model_validate(response)
+            return patch_request(
+                constants.SAMPLE_ROUTE, str(response.id), sample.model_dump()
+            )
+        else:
+            raise Exception(f"Invalid status {response_code}")
+
+    def reconcile(self, reconcile_data):
+        return AssetApiClient.reconcile(reconcile_data)
+
+    def add_changes(self, changes):
+        return AssetApiClient.add_changes(changes)
+
+    def get_checkpoints(self, execution_id):
+        return DatabaseProviderApiClient().get_checkpoints(execution_id)
+
+    def add_checkpoint(self, execution_id, scope):
+        return DatabaseProviderApiClient().add_checkpoint(execution_id, scope)
+
+    def set_max_workers(self, max_workers):
+        get_http_client().resize(max(DEFAULT_POOL_SIZE, max_workers))
+
+    def get_fingerprints(self, provider_id):
+        return DatabaseTableApiClient().get_fingerprints(provider_id)
+
+
+_loop: typing.Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """Return the event loop, running in a background thread, shared by the
+    direct sinks of the process, so the connections of the async engine
+    (app.database) are always used from the same loop."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_loop.run_forever, name="collector-sink", daemon=True
+            ).start()
+        return _loop
+
+
+class DirectSink(DataCollectionSink):
+    """Sink that calls the service layer, in the same process, avoiding the
+    HTTP round trip and JSON encoding of each write. All calls share a
+    single session and are committed in batches.
+
+    The engine is synchronous (and multi-threaded), so the coroutines run,
+    one at a time, in a background event loop.
+    """
+
+    def __init__(self, commit_every: int = DIRECT_SINK_COMMIT_EVERY):
+        self._loop = get_loop()
+        self._commit_every = commit_every
+        self._pending = 0
+        # Error of a failed commit (its pending writes were lost).
+        self._error: typing.Optional[Exception] = None
+        self._session = AsyncSessionLocal()
+        self._lock = self._call(self._create_lock())
+
+    @staticmethod
+    async def _create_lock() -> asyncio.Lock:
+        return asyncio.Lock()
+
+    def _call(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def _write(self, func, count: int = 1):
+        """Run a write in the shared session, committing when the number
+        of pending objects reaches the batch size. Each write runs in a
+        SAVEPOINT, so a failed write is rolled back without discarding the
+        pending ones. If a commit fails, the pending writes are lost and
+        the next writes fail too (the collection must fail)."""
+
+        async def _run():
+            async with self._lock:
+                if self._error is not None:
+                    raise Exception(
+                        "A previous commit of the sink failed"
+                    ) from self._error
+                async with self._session.begin_nested():
+                    result = await func(self._session)
+                self._pending += count
+                if self._pending >= self._commit_every:
+                    try:
+                        await self._session.commit()
+                    except Exception as e:
+                        self._error = e
+                        await self._session.rollback()
+                        raise
+                    finally:
+                        self._pending = 0
+                return result
+
+        return self._call(_run())
+
+    def _read(self, func):
+        async def _run():
+            async with self._lock:
+                return await func(self._session)
+
+        return self._call(_run())
+
+    @staticmethod
+    async def _exists(session, fqn: str) -> bool:
+        result = await session.execute(
+            select(Asset.id).where(Asset.fully_qualified_name == fqn)
+        )
+        return result.first() is not None
+
+    def exists(self, fqn):
+        return self._read(lambda session: self._exists(session, fqn))
+
+    def upsert_database(self, database):
+        async def _upsert(session):
+            service = DatabaseService(session)
+            database.updated_by = DIRECT_SINK_USER
+            if not await self._exists(session, database.fully_qualified_name):
+                return await service.add(database)
+            database.version = "1"
+            database.updated_at = datetime.datetime.utcnow()
+            return await service.update(
+                database.fully_qualified_name,
+                DatabaseUpdateSchema(**database.model_dump()),
+            )
+
+        return self._write(_upsert)
+
+    def upsert_schema(self, schema):
+        async def _upsert(session):
+            service = DatabaseSchemaService(session)
+            schema.updated_by = DIRECT_SINK_USER
+            if not await self._exists(session, schema.fully_qualified_name):
+                return await service.add(schema)
+            schema.version = "1"
+            schema.updated_at = datetime.datetime.utcnow()
+            return await service.update(
+                schema.fully_qualified_name,
+                DatabaseSchemaUpdateSchema(**schema.model_dump()),
+            )
+
+        return self._write(_upsert)
+
+    def upsert_tables(self, tables):
+        for table in tables:
+            table.updated_by = DIRECT_SINK_USER
+        return self._write(
+            lambda session: DatabaseTableService(session).bulk_upsert(tables),
+            len(tables),
+        )
+
+    def get_table(self, table_id):
+        return self._read(
+            lambda session: DatabaseTableService(session).get(
+                uuid.UUID(str(table_id))
+            )
+        )
+
+    def apply_changes(self, table_id, change_set):
+        change_set.fields.updated_by = DIRECT_SINK_USER
+        return self._write(
+            lambda session: DatabaseTableService(session).apply_changes(
+                uuid.UUID(str(table_id)), change_set
+            )
+        )
+
+    def upsert_sample(self, sample):
+        # Same JSON conversion done by the API client (dates, decimals, NaN).
+        sample.content = json.loads(
+            json.dumps(
+                sanitize_for_json(sample.content), default=custom_serializer
+            )
+        )
+
+        async def _upsert(session):
+            service = DatabaseTableSampleService(session)
+            current = await service.get_by_table_id(
+                sample.database_table_id, silent=True
+            )
+            if current is None:
+                return await service.add(sample)
+            return await service.update(
+                current.id,
+                DatabaseTableSampleUpdateSchema(**sample.model_dump()),
+            )
+
+        return self._write(_upsert)
+
+    def reconcile(self, reconcile_data):
+        return self._write(
+            lambda session: AssetService(session).reconcile(reconcile_data)
+        )
+
+    def add_changes(self, changes):
+        return self._write(
+            lambda session: AssetChangeService(session).add_many(changes),
+            len(changes),
+        )
+
+    def get_fingerprints(self, provider_id):
+        async def _get(session):
+            return {
+                item.fully_qualified_name: item
+                async for item in DatabaseTableService(
+                    session
+                ).stream_fingerprints(uuid.UUID(str(provider_id)))
+            }
+
+        return self._read(_get)
+
+    def get_checkpoints(self, execution_id):
+        async def _get(session):
+            checkpoints = await DatabaseProviderIngestionExecutionService(
+                session
+            ).get_checkpoints(execution_id)
+            return {checkpoint.scope for checkpoint in checkpoints}
+
+        return self._read(_get)
+
+    def add_checkpoint(self, execution_id, scope):
+        # Written in the same transaction as the data of the scope.
+        return self._write(
+            lambda session: DatabaseProviderIngestionExecutionService(
+                session
+            ).add_checkpoint(
+                execution_id,
+                DatabaseProviderIngestionCheckpointCreateSchema(scope=scope),
+            )
+        )
+
+    def close(self):
+        async def _close():
+            async with self._lock:
+                try:
+                    if self._error is None:
+                        await self._session.commit()
+                finally:
+                    await self._session.close()
+
+        self._call(_close())
+
+
+SINKS = {
+    "http": HttpSink,
+    "direct": DirectSink,
+}
+
+
+def create_sink(name: typing.Optional[str] = None) -> DataCollectionSink:
+    """Create the sink configured by the COLLECTOR_SINK environment variable
+    ("http", the default, or "direct")."""
+    name = (name or os.environ.get("COLLECTOR_SINK") or DEFAULT_SINK).lower()
+    if name not in SINKS:
+        raise ValueError(f"Invalid collector sink: {name}")
+    return SINKS[name]()
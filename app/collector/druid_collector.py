@@ -1,6 +1,5 @@
 from typing import List, Optional
  
-from sqlalchemy.engine import create_engine
 import sqlalchemy
 
 from app.collector.sql_alchemy_collector import SqlAlchemyCollector
@@ -25,9 +24,9 @@ class DruidCollector(SqlAlchemyCollector):
         self, database_name: str, schema_name: str
     ):
         """Return the connection engine to get the tables."""
-        connection = self._get_connection_string()
-        engine = create_engine(connection, pool_pre_ping=True)
-        return engine
+        return self.get_engine(
+            "", self._get_connection_string(), pool_pre_ping=True
+        )
 
     def get_databases(self) -> List[DatabaseCreateSchema]:
         """Return all databases."""
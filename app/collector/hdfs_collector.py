@@ -234,6 +234,10 @@ class HdfsCollector(Collector):
     def supports_database(self):
         return False
 
+    def supports_parallelism(self) -> bool:
+        # get_tables accumulates the files found in self._tables.
+        return False
+
     def supports_schema(self):
         return False
 
@@ -1,10 +1,16 @@
 import logging
+import re
+import threading
 import typing
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional
-from sqlalchemy.engine import create_engine
 import sqlalchemy as db
+from pyhive.sqlalchemy_hive import _type_map
 from sqlalchemy import ARRAY
-from app.collector.sql_alchemy_collector import SqlAlchemyCollector
+from app.collector.sql_alchemy_collector import (
+    ReflectedTable,
+    SqlAlchemyCollector,
+)
 from app.collector import DEFAULT_UUID
 from app.schemas import (
     DatabaseCreateSchema,
@@ -12,20 +18,81 @@ from app.schemas import (
     TableColumnCreateSchema
 )
 from app.collector.utils.constants_utils import SQLTYPES_DICT
+from app.collector.utils.logging_config import with_log_context
 from app.models import DataType
 import sqlalchemy
 from app.models import DataType, TableType
 logger = logging.getLogger(__name__)
 
+# Max number of HiveServer2 sessions opened (and DESCRIBE statements run in
+# parallel) per database, also limited by the workers of the ingestion.
+HIVE_MAX_SESSIONS = 4
+
+# Error of DESCRIBE for a table dropped after the tables were listed.
+TABLE_NOT_FOUND = re.compile(r"SemanticException.*Table not found")
+
+
+class HiveDescription(typing.NamedTuple):
+    """Table read from the output of DESCRIBE FORMATTED."""
 
+    # Name, type and comment of the columns (partition columns included).
+    columns: typing.List[typing.Tuple[str, str, str]]
+    table_type: typing.Optional[str]
+    comment: typing.Optional[str]
+
+
+def parse_description(rows) -> HiveDescription:
+    """Parse the output of DESCRIBE FORMATTED: the columns, followed by the
+    sections (# Partition Information, # Detailed Table Information, ...).
+    The table comment is one of the Table Parameters."""
+    columns = []
+    names = set()
+    table_type = None
+    comment = None
+    section = "columns"
+    in_table_parameters = False
+    for row in rows:
+        name = (row[0] or "").strip()
+        value = (row[1] or "").strip()
+        if name == "# col_name":
+            continue
+        if name == "# Partition Information":
+            section = "columns"
+            continue
+        if name.startswith("#"):
+            section = "details"
+            continue
+        if section == "columns":
+            # Partition columns are also listed by DESCRIBE (without
+            # FORMATTED) in the section of the columns.
+            if name and name not in names:
+                names.add(name)
+                columns.append((name, value, (row[2] or "").strip()))
+        elif name == "Table Type:":
+            table_type = value
+        elif name:
+            in_table_parameters = name == "Table Parameters:"
+        elif in_table_parameters and value.lower() == "comment":
+            comment = (row[2] or "").strip()
+    return HiveDescription(columns, table_type, comment)
 
 
 class HiveCollector(SqlAlchemyCollector):
-    """Class to implement methods, to collect data in HIVE."""
+    """Class to implement methods, to collect data in HIVE. Each table is
+    described (DESCRIBE FORMATTED) only once: the description is used to
+    detect views and to read the columns and comments."""
 
     def __init__(self):
         super().__init__()
-        self.comment_obj = None
+        # Descriptions by schema and table, until used by _reflect_schema.
+        self._descriptions: typing.Dict[
+            typing.Tuple[str, str], typing.Optional[HiveDescription]
+        ] = {}
+        # Views listed by schema.
+        self._views: typing.Dict[str, typing.List[str]] = {}
+        # If SHOW VIEWS (Hive 2.2+) is supported, once known.
+        self._show_views: typing.Optional[bool] = None
+        self._lock = threading.Lock()
 
     def _get_connection_string(self):
         params = self.connection_info
@@ -36,38 +103,167 @@ class HiveCollector(SqlAlchemyCollector):
     def get_connection_engine_for_tables(
         self, database_name: str, schema_name: str
     ):
-        """Return the connection engine to get the tables."""
-        engine = create_engine(self._get_connection_string()+f"/{schema_name}",
-                               connect_args={'auth': 'LDAP'})
-        return engine
+        """Return the connection engine to get the tables. Its pool is the
+        bounded set of HiveServer2 sessions of the database: callers wait
+        for a free session instead of opening new ones."""
+        return self.get_engine(
+            schema_name,
+            self._get_connection_string() + f"/{schema_name}",
+            connect_args={'auth': 'LDAP'},
+            pool_size=self._get_max_sessions(),
+            max_overflow=0,
+            pool_timeout=None,
+        )
 
-    def get_view_names(self, schema_name: str,
-                      engine, inspector) -> List[str]:
-        """Return the views names."""
+    def _get_max_sessions(self) -> int:
+        max_workers = self.ingestion.max_workers if self.ingestion else 1
+        return max(1, min(HIVE_MAX_SESSIONS, max_workers or 1))
+
+    def _describe(
+        self, engine, schema_name: str, name: str
+    ) -> Optional[HiveDescription]:
+        """Return the description of the table (None if it was dropped),
+        running DESCRIBE FORMATTED only if it was not described yet."""
+        key = (schema_name, name)
+        with self._lock:
+            if key in self._descriptions:
+                return self._descriptions[key]
+        try:
+            with engine.connect() as conn:
+                rows = conn.execute(
+                    db.text(f"DESCRIBE FORMATTED {name}")
+                ).fetchall()
+            description = parse_description(rows)
+        except db.exc.OperationalError as e:
+            if not TABLE_NOT_FOUND.search(str(e)):
+                raise
+            description = None
+        with self._lock:
+            self._descriptions[key] = description
+        return description
 
-        view_names = []
-        query = db.text("SHOW TABLES")
+    def _describe_all(
+        self, engine, schema_name: str, names: typing.List[str]
+    ) -> typing.Dict[str, Optional[HiveDescription]]:
+        """Describe the tables, in parallel sessions."""
+        max_sessions = min(self._get_max_sessions(), len(names))
+        if max_sessions <= 1:
+            return {
+                name: self._describe(engine, schema_name, name)
+                for name in names
+            }
+        with ThreadPoolExecutor(
+            max_sessions, thread_name_prefix="hive-describe"
+        ) as pool:
+            return dict(
+                zip(
+                    names,
+                    pool.map(
+                        with_log_context(
+                            lambda name: self._describe(
+                                engine, schema_name, name
+                            )
+                        ),
+                        names,
+                    ),
+                )
+            )
+
+    def _show(self, engine, query: str) -> List[str]:
         with engine.connect() as conn:
-            result = conn.execute(query)
-            tables = result.fetchall()
-            # Check the type of each table, e.g., using `DESCRIBE FORMATTED`
-            for table in tables:
-                table_name = table[0]
-                describe_query = db.text(f"DESCRIBE FORMATTED {table_name}")
-
-                desc_result = conn.execute(describe_query)
-                describe = desc_result.fetchall()
-                # Check if 'VIRTUAL_VIEW' is found in the table description (indicative of a view)
-                if any("VIRTUAL_VIEW" in str(row) for row in describe):
-                    view_names.append(table_name)
+            return [row[0] for row in conn.execute(db.text(query))]
+
+    def get_view_names(self, schema_name: str,
+                      engine, inspector) -> List[str]:
+        """Return the views names, listed by SHOW VIEWS or, if the server
+        does not support it, read from the description of the tables
+        (used later to read their columns)."""
+        if self._show_views is not False:
+            try:
+                view_names = self._show(engine, "SHOW VIEWS")
+                self._show_views = True
+            except db.exc.DBAPIError:
+                logger.info("Provedor de dados não suporta SHOW VIEWS")
+                self._show_views = False
+        if not self._show_views:
+            # Ignored tables are not described.
+            names = self.get_table_filter().split(
+                self._show(engine, "SHOW TABLES")
+            )[0]
+            view_names = [
+                name
+                for name, description in self._describe_all(
+                    engine, schema_name, names
+                ).items()
+                if description is not None
+                and description.table_type == "VIRTUAL_VIEW"
+            ]
+        self._views[schema_name] = view_names
         return view_names
 
+    def get_table_names(self, schema_name: str,
+                        engine, inspector) -> List[str]:
+        """Return the tables names (SHOW TABLES also lists the views)."""
+        view_names = self._views.get(schema_name)
+        if view_names is None:
+            view_names = self.get_view_names(schema_name, engine, inspector)
+        views = set(view_names)
+        return [
+            name
+            for name in self._show(engine, "SHOW TABLES")
+            if name not in views
+        ]
+
+    def estimate_reflection_queries(self, n_tables: int) -> int:
+        """Return the number of queries used to read the metadata of the
+        tables of a schema (a DESCRIBE FORMATTED per table)."""
+        return n_tables
+
+    def _reflect_schema(
+        self,
+        schema_name: typing.Optional[str],
+        names: typing.List[str],
+        engine,
+        inspector,
+    ) -> typing.Optional[typing.Dict[str, ReflectedTable]]:
+        """Read the tables from their descriptions (columns are typed as
+        by the dialect, see HiveDialect.get_columns)."""
+        descriptions = self._describe_all(engine, schema_name, names)
+        with self._lock:
+            for name in names:
+                self._descriptions.pop((schema_name, name), None)
+        result = {}
+        for name, description in descriptions.items():
+            if description is None:
+                continue
+            columns = []
+            for col_name, col_type, comment in description.columns:
+                # e.g. 'map<int,int>' -> 'map', 'decimal(10,1)' -> 'decimal'
+                match = re.search(r"^\w+", col_type)
+                columns.append({
+                    "name": col_name,
+                    "type": _type_map.get(
+                        match.group(0) if match else col_type, db.types.NullType
+                    )(),
+                    "nullable": True,
+                    "default": None,
+                    "comment": comment,
+                })
+            result[name] = ReflectedTable(
+                columns=columns,
+                primary_keys=[],
+                unique_columns=[],
+                comment=description.comment,
+            )
+        return result
+
     def get_databases(self) -> List[DatabaseCreateSchema]:
         """Return all databases."""
-        engine = create_engine(self._get_connection_string(), connect_args={'auth': 'LDAP'})
+        engine = self.get_engine(
+            "", self._get_connection_string(), connect_args={'auth': 'LDAP'}
+        )
         insp = db.inspect(engine)
         result = insp.get_schema_names()
-        engine.dispose()
 
         return [
             DatabaseCreateSchema(
@@ -79,52 +275,11 @@ class HiveCollector(SqlAlchemyCollector):
             for r in result
         ]
 
-        
-    def get_table_comment(self, name, schemaname, inspector, engine) -> str:
-        """Return the table comment."""
-        
-        query = db.text(f"DESCRIBE FORMATTED {name}")
-        with engine.connect() as conn:
-            self.comment_obj = conn.execute(query).fetchall()
-
-        try:
-            in_table_parameters = False
-
-            for row in self.comment_obj:
-                
-                if row[0] == 'Table Parameters:':
-                    in_table_parameters = True
-                    continue 
-
-                if in_table_parameters and row[1] and row[1].strip().lower() == "comment":
-                    return row[2].strip()
-
-                if row[0].startswith('#') and row[0] != '# Table Parameters:':
-                    in_table_parameters = False
-                    
-            return None
-        except Exception as e:
-            return None
-
-    def get_column_comment(self, column, name) -> str:
-        """Return the column comment."""
-        try:
-            in_columns_section = False
-            for row in self.comment_obj:
-                if row[0] and row[0].strip().lower() == "# col_name":
-                    in_columns_section = True
-                    continue
-                
-                if in_columns_section:
-                    col_name_from_desc = row[0].strip() if row[0] is not None else ""
-                    if not col_name_from_desc and row[1] is None and row[2] is None:
-                        break
-                    if col_name_from_desc == name:
-                        return (row[2] or "").strip() 
-
-            return None
-        except Exception as e:
-            return None
+    def close(self):
+        super().close()
+        with self._lock:
+            self._descriptions.clear()
+            self._views.clear()
 
     def supports_schema(self):
         return False
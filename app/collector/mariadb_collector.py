@@ -2,7 +2,6 @@ import typing
 from typing import List
 
 from sqlalchemy import text
-from sqlalchemy.engine import create_engine
 
 from app.collector import DEFAULT_UUID
 from app.collector.sql_alchemy_collector import SqlAlchemyCollector
@@ -35,7 +34,7 @@ class MariaDbCollector(SqlAlchemyCollector):
 
     def get_connection_engine_for_schemas(self, database_name: str):
         """Return the connection engine to get the schemas."""
-        return create_engine(self._get_connection_string())
+        return self.get_engine("", self._get_connection_string())
 
     def get_connection_engine_for_tables(
         self, database_name: str, schema_name: str
@@ -43,6 +42,41 @@ class MariaDbCollector(SqlAlchemyCollector):
         """Return the connection engine to get the tables."""
         return self.get_connection_engine_for_schemas(database_name)
 
+    def _get_relation_names(
+        self, engine, schema_name: str, table_types: typing.Tuple[str, ...]
+    ) -> List[str]:
+        """Return the names of the relations of the database, applying the
+        include rule of the table filter using REGEXP. The comparison
+        ignores case (depending on the collation), so the exclude rule is
+        only applied later, by the collector."""
+        include = self.get_table_filter().sql_include
+        params = {"schema": schema_name, "types": table_types}
+        conditions = ""
+        if include:
+            conditions = " AND TABLE_NAME REGEXP :include"
+            params["include"] = include
+        with engine.connect() as connection:
+            result = connection.execute(
+                text(f"""
+                SELECT TABLE_NAME
+                FROM information_schema.TABLES
+                WHERE TABLE_SCHEMA = :schema
+                    AND TABLE_TYPE IN :types{conditions}
+                """),
+                params,
+            ).fetchall()
+        return [r[0] for r in result]
+
+    def get_table_names(self, schema_name: str, engine, inspector):
+        """Return the tables names."""
+        return self._get_relation_names(engine, schema_name, ("BASE TABLE",))
+
+    def get_view_names(self, schema_name: str, engine, inspector):
+        """Return the views names."""
+        return self._get_relation_names(
+            engine, schema_name, ("VIEW", "SYSTEM VIEW")
+        )
+
     def get_databases_names(self) -> List[str]:
         """Return databases."""
         return self.get_schema_names()
@@ -54,7 +88,7 @@ class MariaDbCollector(SqlAlchemyCollector):
 
     def get_databases(self) -> typing.List[DatabaseCreateSchema]:
         """Return all databases."""
-        engine = create_engine(self._get_connection_string())
+        engine = self.get_connection_engine_for_schemas(None)
         with engine.connect() as connection:
             result = connection.execute(
                 text("""
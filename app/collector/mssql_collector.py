@@ -1,26 +1,136 @@
+from collections import defaultdict
 from typing import List
+import logging
+import threading
 import typing
 
 from sqlalchemy import text
-from sqlalchemy.engine import create_engine
+from sqlalchemy.dialects.mssql.base import MSDialect
 
 from app.collector import DEFAULT_UUID
 from app.collector.sql_alchemy_collector import SqlAlchemyCollector
+from app.collector.utils.constants_utils import SQLTYPES_DICT
+from app.collector.utils.name_filter import escape_like
+from app.models import DataType, TableType
 from app.schemas import (
     DatabaseCreateSchema,
     DatabaseProviderConnectionItemSchema,
     DatabaseSchemaCreateSchema,
+    DatabaseTableCreateSchema,
+    TableColumnCreateSchema,
 )
 
+logger = logging.getLogger(__name__)
+
 IGNORE =  ['master', 'tempdb', 'model', 'msdb']
 IGNORE_SCHEMA = ["information_schema"]
 
+# Data types of the SQL Server types that are not mapped by SQLTYPES_DICT.
+MSSQL_DATA_TYPES = {
+    "datetime2": DataType.DATETIME,
+    "smalldatetime": DataType.DATETIME,
+    "datetimeoffset": DataType.TIMESTAMPZ,
+    "double precision": DataType.DOUBLE,
+    "smallmoney": DataType.MONEY,
+    "uniqueidentifier": DataType.UUID,
+    "sql_variant": DataType.VARIANT,
+    "xml": DataType.XML,
+    "geometry": DataType.GEOMETRY,
+    "geography": DataType.GEOGRAPHY,
+}
+
+# Types whose size (max length, in characters or bytes) is collected.
+SIZED_TYPES = {
+    "char", "varchar", "nchar", "nvarchar", "text", "ntext", "binary",
+    "varbinary",
+}
+
+# Schemas collected (sys.schemas s): the internal and the fixed database
+# role schemas are ignored.
+SCHEMAS_CONDITION = (
+    "s.name NOT IN ('information_schema', 'sys') AND s.name NOT LIKE 'db[_]%'"
+)
+
+# Tables and views of a database, with their columns and comments (a row
+# per column). Alias types are reported as their base types.
+RELATIONS_QUERY = """
+    SELECT
+        s.name AS schema_name,
+        r.name AS table_name,
+        r.kind,
+        CAST(tep.value AS NVARCHAR(MAX)) AS table_comment,
+        c.name,
+        CASE
+            WHEN ty.is_user_defined = 1 AND ty.is_assembly_type = 0
+            THEN TYPE_NAME(c.system_type_id)
+            ELSE ty.name
+        END AS type_name,
+        COLUMNPROPERTY(c.object_id, c.name, 'charmaxlen') AS char_length,
+        c.precision,
+        c.scale,
+        c.is_nullable,
+        OBJECT_DEFINITION(c.default_object_id) AS column_default,
+        CAST(cep.value AS NVARCHAR(MAX)) AS comment
+    FROM (
+        SELECT object_id, schema_id, name, 'REGULAR' AS kind
+        FROM sys.tables WHERE is_ms_shipped = 0
+        UNION ALL
+        SELECT object_id, schema_id, name, 'VIEW' AS kind
+        FROM sys.views WHERE is_ms_shipped = 0
+    ) r
+    JOIN sys.schemas s ON s.schema_id = r.schema_id
+    JOIN sys.columns c ON c.object_id = r.object_id
+    JOIN sys.types ty ON ty.user_type_id = c.user_type_id
+    LEFT JOIN sys.extended_properties tep
+        ON tep.class = 1 AND tep.major_id = r.object_id
+        AND tep.minor_id = 0 AND tep.name = 'MS_Description'
+    LEFT JOIN sys.extended_properties cep
+        ON cep.class = 1 AND cep.major_id = r.object_id
+        AND cep.minor_id = c.column_id AND cep.name = 'MS_Description'
+    WHERE {schemas}{conditions}
+    ORDER BY s.name, r.name, c.column_id
+"""
+
+# Columns of the primary keys and unique constraints of a database.
+CONSTRAINTS_QUERY = """
+    SELECT
+        s.name AS schema_name,
+        t.name AS table_name,
+        i.index_id,
+        i.is_primary_key,
+        c.name
+    FROM sys.indexes i
+    JOIN sys.tables t ON t.object_id = i.object_id
+    JOIN sys.schemas s ON s.schema_id = t.schema_id
+    JOIN sys.index_columns ic
+        ON ic.object_id = i.object_id AND ic.index_id = i.index_id
+    JOIN sys.columns c
+        ON c.object_id = ic.object_id AND c.column_id = ic.column_id
+    WHERE (i.is_primary_key = 1 OR i.is_unique_constraint = 1)
+        AND ic.is_included_column = 0
+        AND {schemas}{conditions}
+"""
+
 
 class SqlServerCollector(SqlAlchemyCollector):
     """Class to implement methods, to collect data in SQL Server."""
 
     connection_info: typing.Optional[DatabaseProviderConnectionItemSchema] = None
 
+    def __init__(self):
+        super().__init__()
+        # Tables read by the sweep of a database (see get_tables), by
+        # schema, until they are returned.
+        self._catalogs: typing.Dict[
+            str, typing.Dict[str, typing.List[DatabaseTableCreateSchema]]
+        ] = {}
+        self._catalog_locks: typing.Dict[str, threading.Lock] = {}
+
+    def close(self):
+        super().close()
+        self._catalogs.clear()
+        self._catalog_locks.clear()
+
     def _get_connection_string(self):
         params = self.connection_info
         if params is not None:
@@ -34,10 +144,13 @@ class SqlServerCollector(SqlAlchemyCollector):
         return IGNORE
 
     def get_connection_engine_for_schemas(self, database_name: str):
-        """Return the connection engine to get the schemas."""
-        return create_engine(
-            f"{self._get_connection_string()}/{database_name}",
-            connect_args={"timeout": 10},
+        """Return the connection engine to get the schemas (one per
+        database, see get_engine)."""
+        url = self._get_connection_string()
+        if database_name:
+            url = f"{url}/{database_name}"
+        return self.get_engine(
+            database_name or "", url, connect_args={"timeout": 10}
         )
 
     def get_connection_engine_for_tables(
@@ -48,9 +161,7 @@ class SqlServerCollector(SqlAlchemyCollector):
 
     def get_databases(self) -> typing.List[DatabaseCreateSchema]:
         """Return all databases."""
-        engine = create_engine(
-            self._get_connection_string(), connect_args={"timeout": 10}
-        )
+        engine = self.get_connection_engine_for_schemas(None)
         ignorable = ', '.join([f"'{d}'" for d in IGNORE])
         with engine.connect() as connection:
             result = connection.execute(
@@ -72,32 +183,213 @@ class SqlServerCollector(SqlAlchemyCollector):
             for r in result
         ]
 
+    def _get_relation_names(
+        self, engine, schema_name: str, table_type: str
+    ) -> List[str]:
+        """Return the names of the relations of the schema. SQL Server has
+        no regular expressions, so only the literal prefix of the include
+        rule of the table filter is applied, using LIKE."""
+        prefix = self.get_table_filter().like_prefix
+        params = {"schema": schema_name, "type": table_type}
+        conditions = ""
+        if prefix:
+            conditions = " AND TABLE_NAME LIKE :prefix ESCAPE '\\'"
+            params["prefix"] = f"{escape_like(prefix)}%"
+        with engine.connect() as connection:
+            result = connection.execute(
+                text(f"""
+                SELECT TABLE_NAME
+                FROM INFORMATION_SCHEMA.TABLES
+                WHERE TABLE_SCHEMA = :schema
+                    AND TABLE_TYPE = :type{conditions}
+                ORDER BY TABLE_NAME
+                """),
+                params,
+            ).fetchall()
+        return [r[0] for r in result]
+
+    def get_table_names(self, schema_name: str, engine, inspector):
+        """Return the tables names."""
+        return self._get_relation_names(engine, schema_name, "BASE TABLE")
+
+    def get_view_names(self, schema_name: str, engine, inspector):
+        """Return the views names."""
+        return self._get_relation_names(engine, schema_name, "VIEW")
+
     def supports_schema(self):
         return True
 
+    @staticmethod
+    def _get_data_type(type_name: str) -> DataType:
+        """Return the data type of a SQL Server type."""
+        if type_name in MSSQL_DATA_TYPES:
+            return MSSQL_DATA_TYPES[type_name]
+        sqlalchemy_type = MSDialect.ischema_names.get(type_name)
+        data_type = (
+            SQLTYPES_DICT.get(sqlalchemy_type.__name__.upper())
+            if sqlalchemy_type is not None
+            else None
+        )
+        return DataType[data_type] if data_type else DataType.UNKNOWN
+
+    def _get_column(self, row, position: int) -> TableColumnCreateSchema:
+        """Map a row of the relations query to a column, with the same
+        values read by the inspector."""
+        type_name = row.type_name
+        size = precision = scale = None
+        if type_name in SIZED_TYPES:
+            # -1 means max (e.g. varchar(max)).
+            size = row.char_length if row.char_length != -1 else None
+        elif type_name in ("decimal", "numeric"):
+            precision, scale = row.precision, row.scale
+        elif type_name in ("float", "real"):
+            precision = row.precision
+        return TableColumnCreateSchema(
+            name=row.name,
+            description=row.comment,
+            display_name=row.name,
+            data_type=self._get_data_type(type_name),
+            array_data_type=None,
+            size=size,
+            precision=precision,
+            scale=scale,
+            nullable=bool(row.is_nullable),
+            position=position,
+            primary_key=False,
+            unique=False,
+            default_value=row.column_default,
+        )
+
+    def _read_catalog(
+        self, database_name: str
+    ) -> typing.Dict[str, typing.List[DatabaseTableCreateSchema]]:
+        """Read the tables and views of all the schemas of the database
+        (the ones returned by get_schemas) from the sys catalog views, with
+        two queries (relations with their columns and constraints)."""
+        schema_filter = self.get_schema_filter()
+        table_filter = self.get_table_filter()
+        params = {}
+        conditions = ""
+        # SQL Server has no regular expressions, so only the literal
+        # prefixes of the include rules are applied, using LIKE.
+        for column, prefix in (
+            ("s.name", schema_filter.like_prefix),
+            ("{table}.name", table_filter.like_prefix),
+        ):
+            if prefix:
+                key = f"prefix_{len(params)}"
+                conditions += f" AND {column} LIKE :{key} ESCAPE '\\'"
+                params[key] = f"{escape_like(prefix)}%"
+
+        engine = self.get_connection_engine_for_schemas(database_name)
+        with engine.connect() as connection:
+            rows = connection.execute(
+                text(
+                    RELATIONS_QUERY.format(
+                        schemas=SCHEMAS_CONDITION,
+                        conditions=conditions.format(table="r"),
+                    )
+                ),
+                params,
+            ).fetchall()
+            constraints = connection.execute(
+                text(
+                    CONSTRAINTS_QUERY.format(
+                        schemas=SCHEMAS_CONDITION,
+                        conditions=conditions.format(table="t"),
+                    )
+                ),
+                params,
+            ).fetchall()
+
+        primary_keys = defaultdict(set)
+        unique_constraints = defaultdict(list)
+        for row in constraints:
+            key = (row.schema_name, row.table_name)
+            if row.is_primary_key:
+                primary_keys[key].add(row.name)
+            else:
+                unique_constraints[key + (row.index_id,)].append(row.name)
+        unique_columns = defaultdict(set)
+        for (schema_name, table_name, _), names in unique_constraints.items():
+            if len(names) == 1:
+                unique_columns[(schema_name, table_name)].add(names[0])
+
+        # Rows are ordered by schema, relation and column position.
+        relations = {}
+        for row in rows:
+            key = (row.schema_name, row.table_name)
+            relation = relations.get(key)
+            if relation is None:
+                relation = relations[key] = (row, [])
+            column = self._get_column(row, len(relation[1]))
+            column.primary_key = column.name in primary_keys[key]
+            column.unique = column.name in unique_columns[key]
+            relation[1].append(column)
+
+        catalog = defaultdict(list)
+        ignored = []
+        for (schema_name, table_name), (relation, columns) in relations.items():
+            if not schema_filter.matches(schema_name):
+                continue
+            if not table_filter.matches(table_name):
+                ignored.append(table_name)
+                continue
+            catalog[schema_name].append(
+                self.post_process_table(
+                    engine,
+                    DatabaseTableCreateSchema(
+                        name=table_name,
+                        display_name=table_name,
+                        fully_qualified_name=(
+                            f"{database_name}.{schema_name}.{table_name}"
+                        ),
+                        notes=relation.table_comment,
+                        database_id=DEFAULT_UUID,
+                        columns=columns,
+                        type=TableType[relation.kind],
+                    ),
+                )
+            )
+        if ignored:
+            logger.info(
+                "Tabela(s) ignorada(s) pelas regras: %s", ", ".join(ignored)
+            )
+        return catalog
+
+    def estimate_reflection_queries(self, n_tables: int) -> int:
+        """Return the number of queries used to read the metadata of the
+        tables of a schema. The catalog is read once per database (see
+        get_tables), so this is an upper bound."""
+        return 2
+
+    def get_tables(
+        self, database_name: str, schema_name: str
+    ) -> List[DatabaseTableCreateSchema]:
+        """Return the tables and views of the schema. The first call for a
+        database reads all its schemas at once (see _read_catalog); the
+        tables of each schema are kept until they are returned."""
+        lock = self._catalog_locks.setdefault(database_name, threading.Lock())
+        with lock:
+            catalog = self._catalogs.get(database_name)
+            if catalog is None:
+                catalog = self._catalogs[database_name] = self._read_catalog(
+                    database_name
+                )
+            return catalog.pop(schema_name, [])
+
     def get_schemas(
         self, database_name: typing.Optional[str] = None
     ) -> List[DatabaseSchemaCreateSchema]:
-        engine = (
-            create_engine(
-                f"{self._get_connection_string()}/{database_name}",
-                connect_args={"timeout": 10},
-            )
-            if database_name
-            else create_engine(
-                self._get_connection_string(),
-                connect_args={"timeout": 10},
-            )
-        )
+        engine = self.get_connection_engine_for_schemas(database_name)
         schemas = []
         with engine.connect() as connection:
             result = connection.execute(
-                text("""
+                text(f"""
                 SELECT
                     s.name AS schema_name
                 FROM sys.schemas s
-                WHERE s.name NOT IN ('information_schema', 'sys')
-                AND s.name NOT LIKE 'db[_]%';
+                WHERE {SCHEMAS_CONDITION};
                 """)
             ).fetchall()
             for row in result:
@@ -111,5 +403,4 @@ class SqlServerCollector(SqlAlchemyCollector):
                         database_id=DEFAULT_UUID,
                     )
                 )
-        engine.dispose()
         return schemas
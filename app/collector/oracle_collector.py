@@ -1,21 +1,107 @@
+from collections import defaultdict
 import json
+import logging
+import re
 from typing import List
 import typing
 
 import oracledb
 from sqlalchemy import text
-from sqlalchemy.engine import create_engine
+from sqlalchemy.dialects.oracle.base import OracleDialect
 
 from app.collector import DEFAULT_UUID
 from app.collector.sql_alchemy_collector import SqlAlchemyCollector
+from app.collector.utils.constants_utils import SQLTYPES_DICT
+from app.models import DataType, TableType
 from app.schemas import (
     DatabaseCreateSchema,
     DatabaseSchemaCreateSchema,
+    DatabaseTableCreateSchema,
+    TableColumnCreateSchema,
 )
 
+logger = logging.getLogger(__name__)
+
 IGNORE = []
 IGNORE_SCHEMA = ["information_schema"]
 
+# Rows fetched by a round trip. The data dictionary queries return a row
+# per column of the owner, so the driver default (100) means thousands of
+# round trips for large schemas.
+ARRAYSIZE = 2000
+
+# Data types of the Oracle types that are not mapped by SQLTYPES_DICT.
+ORACLE_DATA_TYPES = {
+    "DOUBLE PRECISION": DataType.DOUBLE,
+    "BINARY_DOUBLE": DataType.DOUBLE,
+    "BINARY_FLOAT": DataType.FLOAT,
+    "RAW": DataType.VARBINARY,
+    "NCLOB": DataType.CLOB,
+    "ROWID": DataType.ROWID,
+    "INTERVAL DAY TO SECOND": DataType.INTERVAL,
+}
+
+_TYPE_SIZE_RE = re.compile(r"\(\d+\)")
+
+
+def _to_int(value):
+    """Numbers of the data dictionary may be fetched as floats."""
+    return int(value) if value is not None else None
+
+# Tables (except materialized views), views and materialized views of an
+# owner, with their comments.
+RELATIONS_QUERY = """
+    SELECT r.name, r.kind, c.comments
+    FROM (
+        SELECT table_name AS name, 'REGULAR' AS kind FROM all_tables
+        WHERE owner = :owner
+            AND iot_name IS NULL
+            AND duration IS NULL
+            AND COALESCE(tablespace_name, 'no tablespace')
+                NOT IN ('SYSTEM', 'SYSAUX')
+            AND table_name NOT IN (
+                SELECT mview_name FROM all_mviews WHERE owner = :owner
+            )
+        UNION ALL
+        SELECT view_name, 'VIEW' FROM all_views WHERE owner = :owner
+        UNION ALL
+        SELECT mview_name, 'MATERIALIZED_VIEW' FROM all_mviews
+        WHERE owner = :owner
+    ) r
+    LEFT JOIN all_tab_comments c
+        ON c.owner = :owner AND c.table_name = r.name{conditions}
+"""
+
+# Visible columns of the relations of an owner, in order. data_default is
+# a LONG, so it is not used in expressions.
+COLUMNS_QUERY = """
+    SELECT
+        col.table_name AS name_of_table, col.column_name AS name,
+        col.data_type, col.char_length, col.data_precision, col.data_scale,
+        col.nullable, col.data_default, col.virtual_column,
+        {identity_column} AS identity_column, com.comments
+    FROM all_tab_cols col
+    LEFT JOIN all_col_comments com
+        ON com.owner = col.owner
+        AND com.table_name = col.table_name
+        AND com.column_name = col.column_name
+    WHERE col.owner = :owner AND col.hidden_column = 'NO'{conditions}
+    ORDER BY col.table_name, col.column_id
+"""
+
+# Columns of the primary keys and unique constraints of an owner.
+CONSTRAINTS_QUERY = """
+    SELECT
+        con.table_name AS name_of_table, con.constraint_name,
+        con.constraint_type, col.column_name AS name
+    FROM all_constraints con
+    JOIN all_cons_columns col
+        ON col.owner = con.owner
+        AND col.constraint_name = con.constraint_name
+        AND col.table_name = con.table_name
+    WHERE con.owner = :owner AND con.constraint_type IN ('P', 'U'){conditions}
+"""
+
 
 class OracleCollector(SqlAlchemyCollector):
     """Class to implement methods, to collect data in Oracle."""
@@ -40,12 +126,15 @@ class OracleCollector(SqlAlchemyCollector):
         return IGNORE
 
     def get_connection_engine_for_schemas(self, database_name: str):
-        """Return the connection engine to get the schemas."""
-        return create_engine(
-            f"{self._get_connection_string()}",
+        """Return the connection engine to get the schemas. All the owners
+        are read with the same engine (see get_engine)."""
+        return self.get_engine(
+            "",
+            self._get_connection_string(),
             connect_args={
                 "mode": oracledb.AUTH_MODE_SYSDBA,
             },
+            arraysize=ARRAYSIZE,
         )
 
     def get_connection_engine_for_tables(
@@ -56,12 +145,7 @@ class OracleCollector(SqlAlchemyCollector):
 
     def get_databases(self) -> typing.List[DatabaseCreateSchema]:
         """Return all databases."""
-        engine = create_engine(
-            self._get_connection_string(),
-            connect_args={
-                "mode": oracledb.AUTH_MODE_SYSDBA,
-            },
-        )
+        engine = self.get_connection_engine_for_schemas(None)
         with engine.connect() as connection:
             result = [
                 (r[0], r[1] if len(r) > 1 else None)
@@ -81,18 +165,247 @@ class OracleCollector(SqlAlchemyCollector):
             for r in result
         ]
 
+    def _get_relation_names(
+        self, engine, schema_name: str, query: str
+    ) -> List[str]:
+        """Execute a query returning names of the schema, applying the
+        include rule of the table filter using REGEXP_LIKE. Names are
+        stored in upper case by Oracle, but reflected in lower case, so the
+        rule is evaluated ignoring case and the exclude rule is applied
+        later, to the normalized names."""
+        dialect = engine.dialect
+        include = self.get_table_filter().sql_include
+        params = {"owner": dialect.denormalize_name(schema_name)}
+        conditions = ""
+        if include:
+            conditions = " WHERE REGEXP_LIKE(name, :include, 'i')"
+            params["include"] = include
+        with engine.connect() as connection:
+            result = connection.execute(
+                text(f"SELECT name FROM ({query}){conditions}"), params
+            ).fetchall()
+        return [dialect.normalize_name(r[0]) for r in result]
+
+    def get_table_names(self, schema_name: str, engine, inspector):
+        """Return the tables names (except materialized views)."""
+        return self._get_relation_names(
+            engine,
+            schema_name,
+            """
+            SELECT table_name AS name FROM all_tables
+            WHERE owner = :owner
+                AND iot_name IS NULL
+                AND duration IS NULL
+                AND COALESCE(tablespace_name, 'no tablespace')
+                    NOT IN ('SYSTEM', 'SYSAUX')
+            MINUS
+            SELECT mview_name FROM all_mviews WHERE owner = :owner
+            """,
+        )
+
+    def get_view_names(self, schema_name: str, engine, inspector):
+        """Return the views names (views and materialized views, which
+        are collected as views by get_tables)."""
+        return self._get_relation_names(
+            engine,
+            schema_name,
+            """
+            SELECT view_name AS name FROM all_views WHERE owner = :owner
+            UNION ALL
+            SELECT mview_name FROM all_mviews WHERE owner = :owner
+            """,
+        )
+
     def supports_schema(self):
         return True
 
+    def _get_column(
+        self, row, position: int, dialect
+    ) -> TableColumnCreateSchema:
+        """Map a row of the columns query to a column, with the same values
+        read by the inspector."""
+        oracle_type = row.data_type
+        precision = _to_int(row.data_precision)
+        size = scale = None
+        if oracle_type == "NUMBER":
+            if precision is None and row.data_scale == 0:
+                data_type = DataType.INT
+            else:
+                data_type = DataType.NUMBER
+                scale = _to_int(row.data_scale)
+        elif oracle_type == "FLOAT":
+            data_type = {126: DataType.DOUBLE}.get(precision, DataType.FLOAT)
+            precision = None
+        elif oracle_type in ("VARCHAR2", "NVARCHAR2", "CHAR", "NCHAR"):
+            data_type = self._get_data_type(oracle_type)
+            size = _to_int(row.char_length)
+            precision = None
+        elif "TIME ZONE" in oracle_type:
+            data_type = DataType.TIMESTAMP
+            precision = None
+        else:
+            data_type = self._get_data_type(
+                _TYPE_SIZE_RE.sub("", oracle_type)
+            )
+            precision = None
+
+        default = row.data_default
+        if row.virtual_column == "YES" or row.identity_column == "YES":
+            # Generated and identity columns have no default value.
+            default = None
+
+        return TableColumnCreateSchema(
+            name=dialect.normalize_name(row.name),
+            description=row.comments,
+            display_name=dialect.normalize_name(row.name),
+            data_type=data_type,
+            array_data_type=None,
+            size=size,
+            precision=precision,
+            scale=scale,
+            nullable=row.nullable == "Y",
+            position=position,
+            primary_key=False,
+            unique=False,
+            default_value=default,
+        )
+
+    @staticmethod
+    def _get_data_type(oracle_type: str) -> DataType:
+        """Return the data type of an Oracle type (without size)."""
+        if oracle_type in ORACLE_DATA_TYPES:
+            return ORACLE_DATA_TYPES[oracle_type]
+        sqlalchemy_type = OracleDialect.ischema_names.get(oracle_type)
+        data_type = (
+            SQLTYPES_DICT.get(sqlalchemy_type.__name__.upper())
+            if sqlalchemy_type is not None
+            else None
+        )
+        return DataType[data_type] if data_type else DataType.UNKNOWN
+
+    def estimate_reflection_queries(self, n_tables: int) -> int:
+        """Return the number of queries used to read the metadata of the
+        tables of a schema (see get_tables)."""
+        return 3 if self.supports_pk() else 2
+
+    def get_tables(
+        self, database_name: str, schema_name: str
+    ) -> List[DatabaseTableCreateSchema]:
+        """Return the tables, views and materialized views of the schema
+        (owner), read from the data dictionary with three queries
+        (relations, columns and constraints) for the whole owner, instead
+        of the inspector queries."""
+        engine = self.get_connection_engine_for_schemas(database_name)
+        dialect = engine.dialect
+        params = {"owner": dialect.denormalize_name(schema_name)}
+        include = self.get_table_filter().sql_include
+        if include:
+            params["include"] = include
+        # The include rule is evaluated ignoring case (see
+        # _get_relation_names) and the exclude rule later.
+        condition = "REGEXP_LIKE({}, :include, 'i')" if include else None
+
+        with engine.connect() as connection:
+            relations = connection.execute(
+                text(
+                    RELATIONS_QUERY.format(
+                        conditions=(
+                            f" WHERE {condition.format('r.name')}"
+                            if condition
+                            else ""
+                        )
+                    )
+                ),
+                params,
+            ).fetchall()
+            if (dialect.server_version_info or (0,)) >= (12,):
+                identity_column = "col.identity_column"
+            else:
+                identity_column = "'NO'"
+            columns = connection.execute(
+                text(
+                    COLUMNS_QUERY.format(
+                        identity_column=identity_column,
+                        conditions=(
+                            f" AND {condition.format('col.table_name')}"
+                            if condition
+                            else ""
+                        ),
+                    )
+                ),
+                params,
+            ).fetchall()
+            constraints = []
+            if self.supports_pk():
+                constraints = connection.execute(
+                    text(
+                        CONSTRAINTS_QUERY.format(
+                            conditions=(
+                                f" AND {condition.format('con.table_name')}"
+                                if condition
+                                else ""
+                            )
+                        )
+                    ),
+                    params,
+                ).fetchall()
+
+        table_columns = defaultdict(list)
+        for row in columns:
+            table = table_columns[row.name_of_table]
+            table.append(self._get_column(row, len(table), dialect))
+
+        primary_keys = defaultdict(set)
+        unique_constraints = defaultdict(list)
+        for row in constraints:
+            name = dialect.normalize_name(row.name)
+            if row.constraint_type == "P":
+                primary_keys[row.name_of_table].add(name)
+            else:
+                unique_constraints[
+                    (row.name_of_table, row.constraint_name)
+                ].append(name)
+        unique_columns = defaultdict(set)
+        for (table_name, _), names in unique_constraints.items():
+            if len(names) == 1:
+                unique_columns[table_name].add(names[0])
+
+        names = {dialect.normalize_name(row.name): row for row in relations}
+        selected, ignored = self.get_table_filter().split(names)
+        if ignored:
+            logger.info(
+                "Tabela(s) ignorada(s) pelas regras: %s", ", ".join(ignored)
+            )
+
+        tables = []
+        for name in selected:
+            relation = names[name]
+            columns = table_columns[relation.name]
+            for column in columns:
+                column.primary_key = column.name in primary_keys[relation.name]
+                column.unique = column.name in unique_columns[relation.name]
+            tables.append(
+                self.post_process_table(
+                    engine,
+                    DatabaseTableCreateSchema(
+                        name=name,
+                        display_name=name,
+                        fully_qualified_name=(
+                            f"{database_name}.{schema_name}.{name}"
+                        ),
+                        notes=relation.comments,
+                        database_id=DEFAULT_UUID,
+                        columns=columns,
+                        type=TableType[relation.kind],
+                    ),
+                )
+            )
+        return tables
+
     def get_schemas(
         self, database_name: typing.Optional[str] = None
     ) -> List[DatabaseSchemaCreateSchema]:
-        engine = create_engine(
-            f"{self._get_connection_string()}",
-            connect_args={
-                "mode": oracledb.AUTH_MODE_SYSDBA,
-            },
-        )
+        engine = self.get_connection_engine_for_schemas(database_name)
         schemas = []
         with engine.connect() as connection:
             result = connection.execute(
@@ -122,5 +435,4 @@ class OracleCollector(SqlAlchemyCollector):
                         database_id=DEFAULT_UUID,
                     )
                 )
-        engine.dispose()
         return schemas
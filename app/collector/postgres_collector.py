@@ -1,19 +1,113 @@
+from collections import defaultdict
 from typing import List
+import logging
+import re
 import typing
 
 from sqlalchemy import text
-from sqlalchemy.engine import create_engine
+from sqlalchemy.dialects.postgresql.base import PGDialect
 
 from app.collector import DEFAULT_UUID
 from app.collector.sql_alchemy_collector import SqlAlchemyCollector
+from app.collector.utils.constants_utils import SQLTYPES_DICT
+from app.models import DataType, TableType
 from app.schemas import (
     DatabaseCreateSchema,
     DatabaseSchemaCreateSchema,
+    DatabaseTableCreateSchema,
+    TableColumnCreateSchema,
 )
 
+logger = logging.getLogger(__name__)
+
 IGNORE = []
 IGNORE_SCHEMA = ["information_schema"]
 
+# Kinds (pg_class.relkind) of the relations collected, by table type.
+RELATION_KINDS = {
+    "r": TableType.REGULAR,
+    "p": TableType.REGULAR,
+    "v": TableType.VIEW,
+    "m": TableType.MATERIALIZED_VIEW,
+}
+
+# Data types of the Postgres types that are not mapped by SQLTYPES_DICT.
+PG_DATA_TYPES = {
+    "double precision": DataType.DOUBLE,
+    "uuid": DataType.UUID,
+    "bytea": DataType.BYTEA,
+    "inet": DataType.INET,
+    "cidr": DataType.CIDR,
+    "macaddr": DataType.MACADDR,
+    "interval": DataType.INTERVAL,
+    "tsvector": DataType.TSVECTOR,
+    "xml": DataType.XML,
+}
+
+# Parts of the types returned by format_type(), e.g. numeric(10,2)[].
+_TYPE_ARGS_RE = re.compile(r"\((.*)\)")
+_ARRAY_SPEC_RE = re.compile(r"((?:\[\])*)$")
+_SEQUENCE_DEFAULT_RE = re.compile(r"(nextval\(')([^']+)('.*$)")
+
+# Relations of a schema and their columns (a row per column, or a row
+# without column for relations without columns). Domains are reported as
+# their base types. Generated columns exist since Postgres 12.
+RELATIONS_QUERY = """
+    SELECT
+        c.relname AS table_name,
+        c.relkind,
+        obj_description(c.oid, 'pg_class') AS table_comment,
+        a.attname AS name,
+        format_type(
+            CASE WHEN t.typtype = 'd' THEN t.typbasetype ELSE a.atttypid END,
+            CASE WHEN t.typtype = 'd' THEN t.typtypmod ELSE a.atttypmod END
+        ) AS format_type,
+        t.typtype = 'e' AS is_enum,
+        (
+            SELECT max(length(e.enumlabel)) FROM pg_enum e
+            WHERE e.enumtypid = a.atttypid
+        ) AS enum_length,
+        EXISTS (
+            SELECT 1 FROM pg_enum e WHERE e.enumtypid = t.typelem
+        ) AS is_enum_array,
+        a.attnotnull OR coalesce(t.typtype = 'd' AND t.typnotnull, false)
+            AS not_null,
+        coalesce(
+            pg_get_expr(d.adbin, d.adrelid),
+            CASE WHEN t.typtype = 'd' THEN t.typdefault END
+        ) AS default,
+        {generated} AS generated,
+        col_description(c.oid, a.attnum) AS comment
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    LEFT JOIN pg_attribute a
+        ON a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+    LEFT JOIN pg_type t ON t.oid = a.atttypid
+    LEFT JOIN pg_attrdef d ON d.adrelid = c.oid AND d.adnum = a.attnum
+    WHERE n.nspname = :schema
+        AND c.relkind IN ({relkinds})
+        AND c.relpersistence != 't'{conditions}
+    ORDER BY c.relname, a.attnum
+"""
+
+# Columns of the primary keys and of the single column unique constraints
+# of the relations of a schema.
+CONSTRAINTS_QUERY = """
+    SELECT c.relname AS table_name, con.contype, a.attname AS name
+    FROM pg_constraint con
+    JOIN pg_class c ON c.oid = con.conrelid
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    JOIN pg_attribute a
+        ON a.attrelid = con.conrelid AND a.attnum = ANY(con.conkey)
+    WHERE n.nspname = :schema
+        AND c.relkind IN ({relkinds})
+        AND c.relpersistence != 't'{conditions}
+        AND (
+            con.contype = 'p'
+            OR (con.contype = 'u' AND array_length(con.conkey, 1) = 1)
+        )
+"""
+
 
 class PostgresCollector(SqlAlchemyCollector):
     """Class to implement methods, to collect data in Postgres."""
@@ -32,7 +126,10 @@ class PostgresCollector(SqlAlchemyCollector):
 
     def get_connection_engine_for_schemas(self, database_name: str):
         """Return the connection engine to get the schemas."""
-        return create_engine(f"{self._get_connection_string()}/{database_name}")
+        url = self._get_connection_string()
+        if database_name:
+            url = f"{url}/{database_name}"
+        return self.get_engine(database_name or "", url)
 
     def get_connection_engine_for_tables(
         self, database_name: str, schema_name: str
@@ -42,9 +139,9 @@ class PostgresCollector(SqlAlchemyCollector):
 
     def get_databases(self) -> typing.List[DatabaseCreateSchema]:
         """Return all databases."""
-        database_name = self.connection_info.database
-        connection_string = f"{self._get_connection_string()}/{database_name}"
-        engine = create_engine(connection_string)
+        engine = self.get_connection_engine_for_schemas(
+            self.connection_info.database
+        )
         with engine.connect() as connection:
             result = [
                 (r[0], r[1])
@@ -69,17 +166,249 @@ class PostgresCollector(SqlAlchemyCollector):
             for r in result
         ]
 
+    def _get_filter_conditions(
+        self, schema_name: str
+    ) -> typing.Tuple[str, typing.Dict[str, str]]:
+        """Return the conditions (on pg_class c) and the parameters that
+        apply the table filter in the catalog queries (using ~) when
+        possible."""
+        table_filter = self.get_table_filter()
+        params = {"schema": schema_name}
+        conditions = ""
+        if table_filter.sql_include:
+            conditions += " AND c.relname ~ :include"
+            params["include"] = table_filter.sql_include
+        if table_filter.sql_exclude:
+            conditions += " AND c.relname !~ :exclude"
+            params["exclude"] = table_filter.sql_exclude
+        return conditions, params
+
+    def _get_relkinds(self, *table_types: TableType) -> str:
+        """Return the kinds (pg_class.relkind) of the relations of the
+        table types, as a list for the catalog queries."""
+        return ", ".join(
+            f"'{kind}'"
+            for kind, table_type in RELATION_KINDS.items()
+            if table_type in table_types
+        )
+
+    def _get_relation_names(
+        self, engine, schema_name: str, relkinds: str
+    ) -> List[str]:
+        """Return the names of the relations of the schema, applying the
+        table filter in the catalog query (using ~) when possible."""
+        conditions, params = self._get_filter_conditions(schema_name)
+        with engine.connect() as connection:
+            result = connection.execute(
+                text(f"""
+                SELECT c.relname
+                FROM pg_class c
+                JOIN pg_namespace n ON n.oid = c.relnamespace
+                WHERE n.nspname = :schema
+                    AND c.relkind IN ({relkinds})
+                    AND c.relpersistence != 't'{conditions}
+                """),
+                params,
+            ).fetchall()
+        return [r[0] for r in result]
+
+    def get_table_names(self, schema_name: str, engine, inspector):
+        """Return the tables names (regular and partitioned)."""
+        return self._get_relation_names(
+            engine, schema_name, self._get_relkinds(TableType.REGULAR)
+        )
+
+    def get_view_names(self, schema_name: str, engine, inspector):
+        """Return the views names (views and materialized views)."""
+        return self._get_relation_names(
+            engine,
+            schema_name,
+            self._get_relkinds(TableType.VIEW, TableType.MATERIALIZED_VIEW),
+        )
+
     def supports_schema(self):
         return True
 
+    def _get_data_type(
+        self, base_type: str, is_enum: bool
+    ) -> DataType:
+        """Return the data type of a Postgres type (without modifiers)."""
+        if is_enum:
+            return DataType.ENUM
+        if base_type in PG_DATA_TYPES:
+            return PG_DATA_TYPES[base_type]
+        sqlalchemy_type = PGDialect.ischema_names.get(base_type)
+        data_type = (
+            SQLTYPES_DICT.get(sqlalchemy_type.__name__.upper())
+            if sqlalchemy_type is not None
+            else None
+        )
+        return DataType[data_type] if data_type else DataType.UNKNOWN
+
+    def _get_column(
+        self, row, position: int, schema_name: str
+    ) -> TableColumnCreateSchema:
+        """Map a row of the relations query to a column, with the same
+        values read by the inspector (type modifiers, defaults)."""
+        format_type = row.format_type
+        args_match = _TYPE_ARGS_RE.search(format_type)
+        args = (
+            re.split(r"\s*,\s*", args_match.group(1))
+            if args_match and args_match.group(1)
+            else []
+        )
+        is_array = bool(_ARRAY_SPEC_RE.search(format_type).group(1))
+        base_type = _ARRAY_SPEC_RE.sub(
+            "", _TYPE_ARGS_RE.sub("", format_type)
+        ).lower()
+
+        size = precision = scale = None
+        if is_array:
+            data_type = DataType.ARRAY
+            array_data_type = self._get_data_type(
+                base_type, row.is_enum_array
+            )
+        else:
+            data_type = self._get_data_type(base_type, row.is_enum)
+            array_data_type = None
+            if row.is_enum:
+                size = row.enum_length
+            elif base_type == "numeric":
+                if len(args) == 2:
+                    precision, scale = int(args[0]), int(args[1])
+            elif base_type == "double precision":
+                precision = 53
+            elif base_type.startswith(("time", "interval")):
+                if len(args) == 1:
+                    precision = int(args[0])
+            elif args and args[0].isdigit():
+                size = int(args[0])
+
+        default = row.default
+        if row.generated not in (None, "", b"\x00"):
+            # Generated columns have an expression, not a default.
+            default = None
+        elif default is not None:
+            match = _SEQUENCE_DEFAULT_RE.search(default)
+            if match is not None and "." not in match.group(2):
+                default = (
+                    f'{match.group(1)}"{schema_name}".'
+                    f"{match.group(2)}{match.group(3)}"
+                )
+
+        return TableColumnCreateSchema(
+            name=row.name,
+            description=row.comment,
+            display_name=row.name,
+            data_type=data_type,
+            array_data_type=array_data_type,
+            size=size,
+            precision=precision,
+            scale=scale,
+            nullable=not row.not_null,
+            position=position,
+            primary_key=False,
+            unique=False,
+            default_value=default,
+        )
+
+    def estimate_reflection_queries(self, n_tables: int) -> int:
+        """Return the number of queries used to read the metadata of the
+        tables of a schema (see get_tables)."""
+        return 2
+
+    def get_tables(
+        self, database_name: str, schema_name: str
+    ) -> List[DatabaseTableCreateSchema]:
+        """Return the tables, views and materialized views of the schema,
+        read from pg_catalog with two queries (relations with their columns
+        and constraints), instead of several inspector calls per table."""
+        table_types = [TableType.REGULAR]
+        if self.supports_views():
+            table_types += [TableType.VIEW, TableType.MATERIALIZED_VIEW]
+        relkinds_sql = self._get_relkinds(*table_types)
+        conditions, params = self._get_filter_conditions(schema_name)
+
+        engine = self.get_connection_engine_for_tables(
+            database_name, schema_name
+        )
+        with engine.connect() as connection:
+            if (engine.dialect.server_version_info or (0,)) >= (12,):
+                generated = "a.attgenerated"
+            else:
+                generated = "''"
+            rows = connection.execute(
+                text(
+                    RELATIONS_QUERY.format(
+                        generated=generated,
+                        relkinds=relkinds_sql,
+                        conditions=conditions,
+                    )
+                ),
+                params,
+            ).fetchall()
+            constraints = connection.execute(
+                text(
+                    CONSTRAINTS_QUERY.format(
+                        relkinds=relkinds_sql, conditions=conditions
+                    )
+                ),
+                params,
+            ).fetchall()
+
+        primary_keys = defaultdict(set)
+        unique_columns = defaultdict(set)
+        for row in constraints:
+            target = primary_keys if row.contype == "p" else unique_columns
+            target[row.table_name].add(row.name)
+
+        # Rows are ordered by relation and column position.
+        relations = {}
+        for row in rows:
+            relation = relations.get(row.table_name)
+            if relation is None:
+                relation = relations[row.table_name] = (row, [])
+            if row.name is not None:
+                relation[1].append(
+                    self._get_column(row, len(relation[1]), schema_name)
+                )
+
+        # Ignored tables whose names are not filtered by the query.
+        selected, ignored = self.get_table_filter().split(relations)
+        if ignored:
+            logger.info(
+                "Tabela(s) ignorada(s) pelas regras: %s",
+                ", ".join(ignored),
+            )
+
+        tables = []
+        for name in selected:
+            relation, columns = relations[name]
+            for column in columns:
+                column.primary_key = column.name in primary_keys[name]
+                column.unique = column.name in unique_columns[name]
+            tables.append(
+                self.post_process_table(
+                    engine,
+                    DatabaseTableCreateSchema(
+                        name=name,
+                        display_name=name,
+                        fully_qualified_name=(
+                            f"{database_name}.{schema_name}.{name}"
+                        ),
+                        notes=relation.table_comment,
+                        database_id=DEFAULT_UUID,
+                        columns=columns,
+                        type=RELATION_KINDS[relation.relkind],
+                    ),
+                )
+            )
+        return tables
+
     def get_schemas(
         self, database_name: typing.Optional[str] = None
     ) -> List[DatabaseSchemaCreateSchema]:
-        engine = (
-            create_engine(f"{self._get_connection_string()}/{database_name}")
-            if database_name
-            else create_engine(self._get_connection_string())
-        )
+        engine = self.get_connection_engine_for_schemas(database_name)
         schemas = []
         with engine.connect() as connection:
             result = connection.execute(
@@ -103,5 +432,4 @@ class PostgresCollector(SqlAlchemyCollector):
                         database_id=DEFAULT_UUID,
                     )
                 )
-        engine.dispose()
         return schemas
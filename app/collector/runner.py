@@ -5,6 +5,7 @@ from app.collector.data_collection_engine import DataCollectionEngine
 import logging
 
 from app.collector.utils.api_client import DatabaseProviderApiClient
+from app.schemas import DatabaseProviderIngestionExecutionUpdateSchema
 
 load_dotenv()
 
@@ -61,7 +62,28 @@ def execute(execution_id: str):
         return
 
     engine = DataCollectionEngine()
-    engine.execute_collection(provider, connections[0], ingestion)
+    if execution.dry_run:
+        # Plan only: nothing is written to the catalog.
+        plan = engine.plan_collection(provider, connections[0], ingestion)
+        provider_client.update_ingestion_execution(
+            execution.id,
+            DatabaseProviderIngestionExecutionUpdateSchema(plan=plan),
+        )
+        logger.info("Plano da execução %s registrado", execution_id)
+        return
+
+    try:
+        engine.execute_collection(
+            provider, connections[0], ingestion, execution.id
+        )
+    finally:
+        # Time spent by phase, kept to compare the executions.
+        provider_client.update_ingestion_execution(
+            execution.id,
+            DatabaseProviderIngestionExecutionUpdateSchema(
+                timing=engine.timer.summary()
+            ),
+        )
 
 
 if __name__ == "__main__":
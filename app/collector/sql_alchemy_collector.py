@@ -1,14 +1,18 @@
 import logging
+import threading
+import time
 import typing
 from abc import abstractmethod
 from typing import List
 
 import sqlalchemy
-from sqlalchemy import ARRAY
+from sqlalchemy import ARRAY, event
+from sqlalchemy.engine.reflection import ObjectKind, ObjectScope
 from app.collector import DEFAULT_UUID
 from app.collector.collector import Collector
+from app.collector.utils import timing
 from app.collector.utils.constants_utils import SQLTYPES_DICT
-from app.models import DataType, TableType
+from app.models import DataType, MAX_INGESTION_WORKERS, TableType
 from app.schemas import (
     DatabaseSchemaCreateSchema,
     DatabaseTableCreateSchema,
@@ -18,12 +22,101 @@ from app.schemas import (
 from datetime import datetime
 logger = logging.getLogger(__name__)
 
+# Max number of tables whose metadata is read by a get_multi_* call.
+MULTI_REFLECTION_BATCH_SIZE = 500
+
+# Connections kept by the pool of each cached engine, and the ones that
+# may be opened beyond them while all are in use (closed when returned).
+# The overflow grows with the workers of the ingestion (see
+# CONNECTIONS_PER_WORKER).
+ENGINE_POOL_SIZE = 5
+ENGINE_MAX_OVERFLOW = 5
+
+# Connections an ingestion may use at the same time for each of its workers
+# (one per stage of the collection: schemas, reflect and sample, plus the
+# sampling pool).
+CONNECTIONS_PER_WORKER = 4
+
+# Cached engines not used for this time (in seconds) are disposed, and
+# pooled connections older than it are replaced.
+ENGINE_IDLE_TIMEOUT = 300
+
+
+class ReflectedTable(typing.NamedTuple):
+    """Metadata of a table read by the inspector."""
+
+    columns: typing.List[typing.Dict[str, typing.Any]]
+    primary_keys: typing.List[str]
+    unique_columns: typing.List[str]
+    comment: typing.Optional[str]
+
+
+@event.listens_for(sqlalchemy.Engine, "do_connect")
+def _connect(dialect, conn_rec, cargs, cparams):
+    """Record the time spent opening connections to the data sources (in
+    the timer of the collection, if any)."""
+    with timing.span("connect"):
+        connection = dialect.connect(*cargs, **cparams)
+    timing.count("connect", items=1)
+    return connection
+
 
 class SqlAlchemyCollector(Collector):
     """Class to implement methods, using SqlAlchemy, to collect data in collection engine."""
 
     def __init__(self):
         super().__init__()
+        # Engines by key (e.g. database), with the time they were last used.
+        self._engines: typing.Dict[
+            str, typing.Tuple[sqlalchemy.Engine, float]
+        ] = {}
+        self._engines_lock = threading.Lock()
+
+    def get_engine(
+        self, key: str, url: str, **kwargs
+    ) -> sqlalchemy.Engine:
+        """Return the engine of the key (e.g. the database name), created
+        with create_engine(url, **kwargs) on first use and shared by the
+        calls of the collector, so the connections (and logins) are reused.
+        Engines not used for ENGINE_IDLE_TIMEOUT seconds are disposed. The
+        engines are disposed by close(), at the end of the collection."""
+        now = time.monotonic()
+        with self._engines_lock:
+            for other, (engine, last_used) in list(self._engines.items()):
+                if other != key and now - last_used > ENGINE_IDLE_TIMEOUT:
+                    del self._engines[other]
+                    engine.dispose()
+            cached = self._engines.get(key)
+            if cached is not None:
+                engine = cached[0]
+            else:
+                kwargs.setdefault("pool_size", ENGINE_POOL_SIZE)
+                kwargs.setdefault(
+                    "max_overflow",
+                    max(
+                        ENGINE_MAX_OVERFLOW,
+                        self._get_max_connections() - kwargs["pool_size"],
+                    ),
+                )
+                kwargs.setdefault("pool_recycle", ENGINE_IDLE_TIMEOUT)
+                engine = sqlalchemy.create_engine(url, **kwargs)
+            self._engines[key] = (engine, now)
+        return engine
+
+    def _get_max_connections(self) -> int:
+        """Return the number of connections the ingestion may use at the
+        same time."""
+        max_workers = self.ingestion.max_workers if self.ingestion else 1
+        max_workers = max(1, min(MAX_INGESTION_WORKERS, max_workers or 1))
+        return CONNECTIONS_PER_WORKER * max_workers
+
+    def close(self):
+        """Dispose the cached engines (closing their connections)."""
+        with self._engines_lock:
+            engines = [engine for engine, _ in self._engines.values()]
+            self._engines.clear()
+        for engine in engines:
+            engine.dispose()
 
     @abstractmethod
     def get_connection_engine_for_schemas(
@@ -45,6 +138,12 @@ class SqlAlchemyCollector(Collector):
         """Return the views names."""
         return inspector.get_view_names(schema=schema_name)
 
+    def get_table_names(self, schema_name: str,
+                        engine, inspector) -> List[str]:
+        """Return the tables names. Collectors may use the table filter
+        (get_table_filter) to avoid listing the ignored tables."""
+        return inspector.get_table_names(schema=schema_name)
+
     def post_process_table(
         self, engine: sqlalchemy.Engine, table: DatabaseTableCreateSchema
     ):
@@ -95,6 +194,180 @@ class SqlAlchemyCollector(Collector):
     #     """Return all databases in a database provider using SqlAlchemy."""
     #     return self.get_schema_names("")
 
+    def _get_relations(
+        self, schema_name: str, engine, inspector
+    ) -> typing.List[typing.Tuple[str, str]]:
+        """Return the type (VIEW or REGULAR) and the name of the tables
+        selected by the table filter."""
+        # Ignored tables are discarded before reading their metadata.
+        table_filter = self.get_table_filter()
+        if self.supports_views():
+            view_names, ignored_views = table_filter.split(
+                self.get_view_names(schema_name, engine, inspector)
+            )
+        else:
+            view_names, ignored_views = [], []
+            logger.info("Provedor de dados não suporta views")
+        table_names, ignored_tables = table_filter.split(
+            self.get_table_names(schema_name, engine, inspector)
+        )
+        if ignored_views or ignored_tables:
+            logger.info(
+                "Tabela(s) ignorada(s) pelas regras: %s",
+                ", ".join(ignored_views + ignored_tables),
+            )
+        return [("VIEW", name) for name in view_names] + [
+            ("REGULAR", name) for name in table_names
+        ]
+
+    def list_tables(
+        self, database_name: str, schema_name: str
+    ) -> List[str]:
+        engine = self.get_connection_engine_for_tables(
+            database_name, schema_name
+        )
+        inspector = sqlalchemy.inspect(engine)
+        return [
+            name
+            for _, name in self._get_relations(schema_name, engine, inspector)
+        ]
+
+    def supports_multi_reflection(self) -> bool:
+        """Return if the metadata of the tables of a schema can be read in
+        bulk (Inspector.get_multi_* methods), instead of table by table."""
+        return True
+
+    def estimate_reflection_queries(self, n_tables: int) -> int:
+        """Return the number of queries used to read the metadata of the
+        tables of a schema: a query per get_multi_* method (columns, primary
+        keys, unique constraints and comments) and batch of tables, or per
+        method and table without bulk reflection."""
+        methods = 4 if self.supports_pk() else 3
+        if not self.supports_multi_reflection():
+            return methods * n_tables
+        return methods * -(-n_tables // MULTI_REFLECTION_BATCH_SIZE)
+
+    def _get_multi(
+        self,
+        method: typing.Callable,
+        schema_name: typing.Optional[str],
+        names: typing.List[str],
+    ) -> typing.Optional[typing.Dict[str, typing.Any]]:
+        """Call a get_multi_* method of the inspector for the tables and
+        return the result by table name, or None if the dialect does not
+        implement it."""
+        result = {}
+        try:
+            # Batches keep the lists of names within the limits of the
+            # databases (e.g. 1000 expressions in an IN list on Oracle).
+            for i in range(0, len(names), MULTI_REFLECTION_BATCH_SIZE):
+                items = method(
+                    schema=schema_name,
+                    filter_names=names[i:i + MULTI_REFLECTION_BATCH_SIZE],
+                    # Names are taken as given (not listed again).
+                    kind=ObjectKind.ANY,
+                    scope=ObjectScope.ANY,
+                )
+                result.update(
+                    (name, value) for (_, name), value in items.items()
+                )
+        except NotImplementedError:
+            return None
+        return result
+
+    def _reflect_schema(
+        self,
+        schema_name: typing.Optional[str],
+        names: typing.List[str],
+        engine,
+        inspector,
+    ) -> typing.Optional[typing.Dict[str, ReflectedTable]]:
+        """Read the metadata of the tables of a schema in bulk (a few
+        queries per schema). Return None if the dialect does not support
+        it."""
+        if not names or not self.supports_multi_reflection():
+            return None
+        columns = self._get_multi(
+            inspector.get_multi_columns, schema_name, names
+        )
+        if columns is None:
+            return None
+        if self.supports_pk():
+            primary_keys = (
+                self._get_multi(
+                    inspector.get_multi_pk_constraint, schema_name, names
+                )
+                or {}
+            )
+        else:
+            primary_keys = {}
+        unique_constraints = self._get_multi(
+            inspector.get_multi_unique_constraints, schema_name, names
+        )
+        if unique_constraints is None:
+            logger.info("Provedor de dados não suporta unique constraint")
+            unique_constraints = {}
+        comments = (
+            self._get_multi(
+                inspector.get_multi_table_comment, schema_name, names
+            )
+            or {}
+        )
+        return {
+            name: ReflectedTable(
+                columns=table_columns,
+                primary_keys=(primary_keys.get(name) or {}).get(
+                    "constrained_columns"
+                )
+                or [],
+                unique_columns=self._get_unique_columns(
+                    unique_constraints.get(name) or []
+                ),
+                comment=(comments.get(name) or {}).get("text"),
+            )
+            for name, table_columns in columns.items()
+        }
+
+    def _reflect_table(
+        self, name: str, schema_name: typing.Optional[str], engine, inspector
+    ) -> ReflectedTable:
+        """Read the metadata of a table."""
+        if self.supports_pk():
+            primary_keys = inspector.get_pk_constraint(
+                name, schema=schema_name
+            ).get("constrained_columns", [])
+        else:
+            primary_keys = []
+        try:
+            unique_constraints = inspector.get_unique_constraints(
+                name, schema=schema_name
+            )
+        except NotImplementedError:
+            logger.info(
+                "Provedor de dados não suporta unique constraint"
+            )
+            unique_constraints = []
+
+        # Get the table comment
+        table_comment = self.get_table_comment(name, schema_name ,inspector, engine)
+
+        return ReflectedTable(
+            columns=inspector.get_columns(name, schema=schema_name),
+            primary_keys=primary_keys,
+            unique_columns=self._get_unique_columns(unique_constraints),
+            comment=table_comment,
+        )
+
+    @staticmethod
+    def _get_unique_columns(unique_constraints) -> typing.List[str]:
+        """Return the columns that are unique by themselves."""
+        return [
+            col
+            for constraint in unique_constraints
+            for col in constraint.get("column_names", [])
+            if len(constraint.get("column_names", [])) == 1
+        ]
+
     def get_tables(
         self, database_name: str, schema_name: str
     ) -> List[DatabaseTableCreateSchema]:
@@ -102,98 +375,71 @@ class SqlAlchemyCollector(Collector):
             database_name, schema_name
         )
         inspector = sqlalchemy.inspect(engine)
+        relations = self._get_relations(schema_name, engine, inspector)
+        reflected = self._reflect_schema(
+            schema_name, [name for _, name in relations], engine, inspector
+        )
         tables = []
-        if self.supports_views():
-            view_names = self.get_view_names(schema_name, engine, inspector)
-        else:
-            view_names = []
-            logger.info("Provedor de dados não suporta views")
-        table_names = inspector.get_table_names(schema=schema_name)
-        for item_type, items in zip(
-            ["VIEW", "REGULAR"], [view_names, table_names]
-        ):
-            for name in items:
-                
-                
-                columns: typing.List[TableColumnCreateSchema] = []
-                if self.supports_pk():
-                    primary_keys = inspector.get_pk_constraint(
-                        name, schema=schema_name
-                    ).get("constrained_columns", [])
-                else:
-                    primary_keys = []
-                try:
-                    unique_constraints = inspector.get_unique_constraints(
-                        name, schema=schema_name
+        for item_type, name in relations:
+            if reflected is None:
+                metadata = self._reflect_table(
+                    name, schema_name, engine, inspector
+                )
+            elif name in reflected:
+                metadata = reflected[name]
+            else:
+                # Dropped after the names were listed.
+                logger.info("Tabela %s não encontrada", name)
+                continue
+
+            columns: typing.List[TableColumnCreateSchema] = []
+            for i, column in enumerate(metadata.columns):
+                data_type, array_data_type = self.get_data_type_str(column)
+
+                # Get the column comment
+                column_comment = self.get_column_comment(column, column.get("name"))
+
+                columns.append(
+                    TableColumnCreateSchema(
+                        name=column.get("name"),
+                        description=column_comment,
+                        display_name=column.get("name"),
+                        data_type=data_type,
+                        array_data_type=array_data_type,
+                        size=getattr(column.get("type"), "length", None),
+                        precision=getattr(
+                            column.get("type"), "precision", None
+                        ),
+                        scale=getattr(column.get("type"), "scale", None),
+                        nullable=column.get("nullable"),
+                        position=i,
+                        primary_key=column.get("name") in metadata.primary_keys,
+                        unique=column.get("name") in metadata.unique_columns,
+                        # is_metadata=False,
+                        # array_data_type=None,
+                        # semantic_type=None
+                        default_value=column.get("default"),
                     )
-                except NotImplementedError:
-                    logger.info(
-                        "Provedor de dados não suporta unique constraint"
                     )
-                    unique_constraints = []
-
-                unique_columns = [
-                    col
-                    for constraint in unique_constraints
-                    for col in constraint.get("column_names", [])
-                    if len(constraint.get("column_names", [])) == 1
-                ]
-
-                # Get the table comment
-                table_comment = self.get_table_comment(name, schema_name ,inspector, engine)
-
-                for i, column in enumerate(
-                    inspector.get_columns(name, schema=schema_name)
-                ):
-                    data_type, array_data_type = self.get_data_type_str(column)
-
-                    # Get the column comment
-                    column_comment = self.get_column_comment(column, column.get("name"))
-
-                    columns.append(
-                        TableColumnCreateSchema(
-                            name=column.get("name"),
-                            description=column_comment,
-                            display_name=column.get("name"),
-                            data_type=data_type,
-                            array_data_type=array_data_type,
-                            size=getattr(column.get("type"), "length", None),
-                            precision=getattr(
-                                column.get("type"), "precision", None
-                            ),
-                            scale=getattr(column.get("type"), "scale", None),
-                            nullable=column.get("nullable"),
-                            position=i,
-                            primary_key=column.get("name") in primary_keys,
-                            unique=column.get("name") in unique_columns,
-                            # is_metadata=False,
-                            # array_data_type=None,
-                            # semantic_type=None
-                            default_value=column.get("default"),
-                        )
-                        )
-                    
-                    
-
-                if self.supports_schema():
-                    table_fqn = f"{database_name}.{schema_name}.{name}"
-                else:
-                    table_fqn = f"{database_name}.{name}"
-
-                database_table = self.post_process_table(
-                    engine,
-                    DatabaseTableCreateSchema(
-                        name=name,
-                        display_name=name,
-                        fully_qualified_name=table_fqn,
-                        notes=table_comment,
-                        database_id=DEFAULT_UUID,
-                        columns=columns,
-                        type=TableType[item_type],
-                    ),
-                )
-                tables.append(database_table)
-        engine.dispose()
+
+            if self.supports_schema():
+                table_fqn = f"{database_name}.{schema_name}.{name}"
+            else:
+                table_fqn = f"{database_name}.{name}"
+
+            database_table = self.post_process_table(
+                engine,
+                DatabaseTableCreateSchema(
+                    name=name,
+                    display_name=name,
+                    fully_qualified_name=table_fqn,
+                    notes=metadata.comment,
+                    database_id=DEFAULT_UUID,
+                    columns=columns,
+                    type=TableType[item_type],
+                ),
+            )
+            tables.append(database_table)
 
         return tables
 
@@ -218,7 +464,6 @@ class SqlAlchemyCollector(Collector):
             rows = result.mappings().all()
             rows = [dict(row) for row in rows]
 
-        engine.dispose()
         return DatabaseTableSampleCreateSchema(
                                 date=datetime.now(),
                                 content=rows,
@@ -3,6 +3,7 @@ import typing
 import uuid
 from app.collector.utils.constants_utils import (
     ASSET_ROUTE,
+    CHANGE_ROUTE,
     CONNECTION_ROUTE,
     DATABASE_ROUTE,
     EXECUTION_ROUTE,
@@ -10,14 +11,28 @@ from app.collector.utils.constants_utils import (
     PROVIDER_ROUTE,
     TABLE_ROUTE,
 )
-from app.collector.utils.request_utils import get_request, patch_request
+from app.collector.utils.request_utils import (
+    get_request,
+    patch_request,
+    post_request,
+    stream_request,
+)
 from app.schemas import (
+    AssetChangeCreateSchema,
+    AssetReconcileResultSchema,
+    AssetReconcileSchema,
     DatabaseItemSchema,
     DatabaseListSchema,
     DatabaseProviderConnectionItemSchema,
     DatabaseProviderIngestionExecutionItemSchema,
+    DatabaseProviderIngestionExecutionUpdateSchema,
     DatabaseProviderIngestionItemSchema,
     DatabaseProviderItemSchema,
+    DatabaseTableBulkItemSchema,
+    DatabaseTableChangeSetSchema,
+    DatabaseTableCreateSchema,
+    DatabaseTableFingerprintSchema,
+    DatabaseTableItemSchema,
     DatabaseTableListSchema,
 )
 
@@ -30,6 +45,24 @@ class AssetApiClient:
         )
         return info
 
+    @staticmethod
+    def reconcile(
+        reconcile_data: AssetReconcileSchema,
+    ) -> AssetReconcileResultSchema:
+        # Reconciling the same scope again has no effect, so it can be retried.
+        info = post_request(
+            f"{ASSET_ROUTE}/reconcile",
+            reconcile_data.model_dump(),
+            idempotent=True,
+        )
+        return AssetReconcileResultSchema(**info)
+
+    @staticmethod
+    def add_changes(changes: typing.List[AssetChangeCreateSchema]):
+        return post_request(
+            f"{CHANGE_ROUTE}/bulk", [change.model_dump() for change in changes]
+        )
+
 
 class DatabaseProviderApiClient:
     def get(self, provider_id: str):
@@ -55,6 +88,31 @@ class DatabaseProviderApiClient:
         status, execution_info = get_request(EXECUTION_ROUTE, path=execution_id)
         return DatabaseProviderIngestionExecutionItemSchema(**execution_info)
 
+    def update_ingestion_execution(
+        self,
+        execution_id: int,
+        execution: DatabaseProviderIngestionExecutionUpdateSchema,
+    ):
+        return patch_request(
+            EXECUTION_ROUTE,
+            str(execution_id),
+            execution.model_dump(exclude_unset=True),
+        )
+
+    def get_checkpoints(self, execution_id: int) -> typing.Set[str]:
+        status, checkpoint_info = get_request(
+            EXECUTION_ROUTE, path=f"{execution_id}/checkpoints"
+        )
+        return {info["scope"] for info in checkpoint_info}
+
+    def add_checkpoint(self, execution_id: int, scope: str):
+        # Recording the same scope again has no effect, so it can be retried.
+        return post_request(
+            EXECUTION_ROUTE + f"/{execution_id}/checkpoints",
+            {"scope": scope},
+            idempotent=True,
+        )
+
     def get_connections(self, provider_id: str):
         status, connection_info = get_request(
             CONNECTION_ROUTE, params={"provider_id": provider_id}
@@ -70,18 +128,61 @@ class DatabaseApiClient:
         status, database_info = get_request(DATABASE_ROUTE, path=database_id)
         return DatabaseItemSchema(**database_info)
 
+    def iter_by_provider(
+        self, provider_id: str
+    ) -> typing.Iterator[DatabaseListSchema]:
+        """Iterate over all databases of the provider (streamed, no paging)."""
+        for info in stream_request(
+            DATABASE_ROUTE, params={"provider_id": provider_id, "stream": "true"}
+        ):
+            yield DatabaseListSchema(**info)
+
     def find_by_provider(self, provider_id: str):
-        status, database_info = get_request(
-            DATABASE_ROUTE, params={"provider_id": provider_id}
-        )
-        return [DatabaseListSchema(**info) for info in database_info["items"]]
+        return list(self.iter_by_provider(provider_id))
 
 
 class DatabaseTableApiClient:
+    def iter_by_database(
+        self, database_id: str
+    ) -> typing.Iterator[DatabaseTableListSchema]:
+        """Iterate over all tables of the database (streamed, no paging)."""
+        for info in stream_request(
+            TABLE_ROUTE, params={"database_id": database_id, "stream": "true"}
+        ):
+            yield DatabaseTableListSchema(**info)
+
     def find_by_database(self, database_id: str):
-        status, database_info = get_request(
-            TABLE_ROUTE, params={"database_id": database_id}
+        return list(self.iter_by_database(database_id))
+
+    def get_fingerprints(self, provider_id: str):
+        return {
+            item["fully_qualified_name"]: DatabaseTableFingerprintSchema(**item)
+            for item in stream_request(
+                f"{TABLE_ROUTE}/fingerprints",
+                params={"provider_id": provider_id},
+            )
+        }
+
+    def bulk_upsert(self, tables: typing.List[DatabaseTableCreateSchema]):
+        # The bulk upsert is idempotent, so it can be retried.
+        info = post_request(
+            f"{TABLE_ROUTE}/bulk",
+            [table.model_dump() for table in tables],
+            idempotent=True,
         )
-        return [
-            DatabaseTableListSchema(**info) for info in database_info["items"]
-        ]
+        return [DatabaseTableBulkItemSchema(**item) for item in info]
+
+    def get(self, table_id: str) -> DatabaseTableItemSchema:
+        status, table_info = get_request(TABLE_ROUTE, path=str(table_id))
+        return DatabaseTableItemSchema(**table_info)
+
+    def apply_changes(
+        self, table_id: str, change_set: DatabaseTableChangeSetSchema
+    ) -> DatabaseTableBulkItemSchema:
+        # Only the changed fields are sent (and updated).
+        info = patch_request(
+            TABLE_ROUTE,
+            f"{table_id}/changes",
+            change_set.model_dump(exclude_unset=True),
+        )
+        return DatabaseTableBulkItemSchema(**info)
@@ -12,6 +12,7 @@ TABLE_ROUTE = "tables"
 CONNECTION_ROUTE = "connections"
 INGESTION_ROUTE = "ingestions"
 EXECUTION_ROUTE = "executions"
+CHANGE_ROUTE = "changes"
 
 
 SQLTYPES_DICT = {
@@ -1,5 +1,6 @@
+import typing
 from croniter import croniter
-from datetime import datetime, timedelta, date
+from datetime import datetime, timedelta, date, timezone
 
 
 def check_if_cron_is_today(cron_expression: str):
@@ -11,3 +12,21 @@ def check_if_cron_is_today(cron_expression: str):
     iter = croniter(cron_expression, base)
     next_cron = iter.get_next(datetime)    
     return today == next_cron
+
+
+def is_valid_cron(cron_expression: typing.Optional[str]) -> bool:
+    return bool(cron_expression) and croniter.is_valid(cron_expression)
+
+
+def get_next_run(
+    cron_expression: str, base: typing.Optional[datetime] = None
+) -> datetime:
+    """Return the next time (naive UTC, as the model dates) the cron
+    expression fires after base (default now). The expression is evaluated
+    in the local timezone of the server."""
+    if base is None:
+        base = datetime.now(timezone.utc)
+    elif base.tzinfo is None:
+        base = base.replace(tzinfo=timezone.utc)
+    next_run = croniter(cron_expression, base.astimezone()).get_next(datetime)
+    return next_run.astimezone(timezone.utc).replace(tzinfo=None)
@@ -1,34 +1,184 @@
-import io
+import collections
+import contextlib
+import contextvars
+import functools
 import logging
 import sys
+import threading
+import typing
+
+# Lines kept in memory, per execution, while they are not written. When
+# the writer falls behind, the oldest lines are dropped.
+MAX_PENDING_LINES = 10000
+
+# Lines longer than this are truncated.
+MAX_LINE_LENGTH = 4000
+
+# A chunk is written when this number of lines is pending...
+FLUSH_LINES = 500
+
+# ... or when this interval (in seconds) elapses.
+FLUSH_INTERVAL = 5.0
+
+LOG_FORMAT = (
+    "%(asctime)s - %(name)s - %(levelname)s - %(filename)s:%(lineno)d - "
+    "%(message)s"
+)
+
+# Writes a chunk of log lines of an execution, with its sequence number (the
+# order of the chunk in the log) and the execution status.
+LogWriter = typing.Callable[[int, str, str], None]
+
+_execution_log: contextvars.ContextVar[typing.Optional["ExecutionLog"]] = (
+    contextvars.ContextVar("execution_log", default=None)
+)
+_setup_lock = threading.Lock()
+
+
+class ExecutionLog:
+    """Log lines of an execution, kept in a bounded buffer and written in
+    chunks by a background thread while the execution runs."""
+
+    def __init__(
+        self,
+        writer: LogWriter,
+        max_lines: int = MAX_PENDING_LINES,
+        flush_lines: int = FLUSH_LINES,
+        flush_interval: float = FLUSH_INTERVAL,
+    ):
+        self.writer = writer
+        self.flush_lines = flush_lines
+        self.flush_interval = flush_interval
+        self._lines: typing.Deque[str] = collections.deque(maxlen=max_lines)
+        self._dropped = 0
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="execution-log", daemon=True
+        )
+
+    def start(self) -> "ExecutionLog":
+        self._thread.start()
+        return self
+
+    def append(self, line: str):
+        if len(line) > MAX_LINE_LENGTH:
+            line = line[:MAX_LINE_LENGTH] + "... (truncated)"
+        with self._lock:
+            if len(self._lines) == self._lines.maxlen:
+                self._dropped += 1
+            self._lines.append(line)
+            if len(self._lines) >= self.flush_lines:
+                self._wakeup.set()
+
+    def _take(self) -> str:
+        with self._lock:
+            lines, dropped = list(self._lines), self._dropped
+            self._lines.clear()
+            self._dropped = 0
+        if dropped:
+            lines.insert(0, f"... {dropped} line(s) dropped")
+        return "\n".join(lines)
+
+    def flush(self, status: str = "running", force: bool = False):
+        """Write the pending lines. Nothing is written if there are no
+        pending lines, unless force is informed."""
+        with self._write_lock:
+            chunk = self._take()
+            if chunk or force:
+                # A failed write must not reuse the number of the chunk.
+                seq, self._seq = self._seq, self._seq + 1
+                self.writer(seq, chunk, status)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:  # noqa: B902
+                # Logging here would be captured again; report and go on.
+                print("Failed to write the execution log.", file=sys.stderr)
+
+    def close(self, status: str):
+        """Stop the background thread and write the remaining lines with
+        the final status of the execution."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self.flush(status, force=True)
+
+
+class ExecutionLogHandler(logging.Handler):
+    """Handler that sends the records to the log of the current execution
+    (see execution_log). Records emitted outside an execution are ignored."""
+
+    def emit(self, record: logging.LogRecord):
+        execution = _execution_log.get()
+        if execution is None:
+            return
+        try:
+            execution.append(self.format(record))
+        except Exception:  # noqa: B902
+            self.handleError(record)
 
 
 def setup_collector_logger(namespace):
     """
-    Configures a specific logger for your application that captures logs only in memory.
+    Configures the logger of the collector: records are written to the
+    console and to the log of the current execution. Handlers are added
+    only once, so calling it again (e.g. for each job) has no effect.
 
     Args:
         namespace (str): Logger namespace, used to differentiate from other modules.
 
     Returns:
-        tuple: (logger, memory_stream) where memory_stream contains the logs in memory.
+        logging.Logger: The configured logger.
     """
     logger = logging.getLogger(namespace)
-    logger.setLevel(logging.INFO)
+    with _setup_lock:
+        if any(isinstance(h, ExecutionLogHandler) for h in logger.handlers):
+            return logger
+        logger.setLevel(logging.INFO)
+        log_format = logging.Formatter(LOG_FORMAT)
+
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(log_format)
+        logger.addHandler(console_handler)
+
+        execution_handler = ExecutionLogHandler()
+        execution_handler.setFormatter(log_format)
+        logger.addHandler(execution_handler)
+
+        logger.propagate = True
+    return logger
+
 
-    log_format = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(filename)s:%(lineno)d - %(message)s"
-    )
+@contextlib.contextmanager
+def execution_log(writer: LogWriter, **kwargs):
+    """Capture the records of the collector logger emitted in the current
+    context (and in threads started with with_log_context) in a new
+    ExecutionLog. The caller must close it with the final status."""
+    log = ExecutionLog(writer, **kwargs).start()
+    token = _execution_log.set(log)
+    try:
+        yield log
+    finally:
+        _execution_log.reset(token)
 
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setFormatter(log_format)
-    logger.addHandler(console_handler)
 
-    memory_stream = io.StringIO()
-    memory_handler = logging.StreamHandler(memory_stream)
-    memory_handler.setFormatter(log_format)
-    logger.addHandler(memory_handler)
+def with_log_context(func: typing.Callable) -> typing.Callable:
+    """Wrap func to run, in another thread, with the context variables of
+    the caller (e.g. the execution log), as threads do not inherit them."""
+    context = contextvars.copy_context()
 
-    logger.propagate = True
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        # A context can not be entered by two threads at the same time.
+        return context.copy().run(func, *args, **kwargs)
 
-    return logger, memory_stream
+    return wrapper
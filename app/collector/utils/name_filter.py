@@ -0,0 +1,93 @@
+import re
+import typing
+
+# Regular expressions using only this subset have the same meaning in
+# Python and in the regular expression dialects of the databases (POSIX
+# ARE, PCRE, ICU and Oracle), so they can be evaluated by the source.
+_PORTABLE_RE = re.compile(r"^[\w\s.*+?|()\[\]{}^$,-]*$")
+
+# Characters that end the literal prefix of a regular expression.
+_META_CHARS = set(".^$*+?{}[]\\|()")
+
+
+class NameFilter:
+    """Include and exclude rules (regular expressions, matched at the
+    beginning of the name) of an ingestion for a kind of object. A name is
+    selected if it matches the include rule (when defined) and does not
+    match the exclude rule.
+
+    Besides testing names, the rules can be translated to predicates of the
+    catalog queries, so the source does not return ignored objects. These
+    predicates may select more names than the rules (never less), so the
+    names returned must still be tested.
+    """
+
+    def __init__(
+        self, include: typing.Optional[str], exclude: typing.Optional[str]
+    ):
+        self.include = include or None
+        self.exclude = exclude or None
+        self.include_re = re.compile(self.include) if self.include else None
+        self.exclude_re = re.compile(self.exclude) if self.exclude else None
+
+    def __bool__(self) -> bool:
+        return self.include_re is not None or self.exclude_re is not None
+
+    def matches(self, name: str) -> bool:
+        """Return if the name is selected by the rules."""
+        if self.exclude_re is not None and self.exclude_re.match(name):
+            return False
+        return self.include_re is None or bool(self.include_re.match(name))
+
+    def split(
+        self, names: typing.Iterable[str]
+    ) -> typing.Tuple[typing.List[str], typing.List[str]]:
+        """Return the selected and the ignored names."""
+        selected, ignored = [], []
+        for name in names:
+            (selected if self.matches(name) else ignored).append(name)
+        return selected, ignored
+
+    @staticmethod
+    def _to_sql_regex(pattern: typing.Optional[str]) -> typing.Optional[str]:
+        if pattern is None or "(?" in pattern or not _PORTABLE_RE.match(
+            pattern
+        ):
+            return None
+        # Python matches at the beginning, the databases anywhere.
+        return f"^({pattern})"
+
+    @property
+    def sql_include(self) -> typing.Optional[str]:
+        """Include rule as a regular expression evaluated by the database,
+        or None if it is not defined or not portable."""
+        return self._to_sql_regex(self.include)
+
+    @property
+    def sql_exclude(self) -> typing.Optional[str]:
+        """Exclude rule as a regular expression evaluated by the database,
+        or None if it is not defined or not portable."""
+        return self._to_sql_regex(self.exclude)
+
+    @property
+    def like_prefix(self) -> typing.Optional[str]:
+        """Literal prefix of all names selected by the include rule, for
+        databases that only support LIKE, or None if there is none."""
+        if self.include is None or "|" in self.include:
+            return None
+        prefix = []
+        for i, char in enumerate(self.include):
+            if char in _META_CHARS:
+                # The previous character may be optional or repeated.
+                if char in "?*{" and prefix:
+                    prefix.pop()
+                break
+            prefix.append(char)
+        return "".join(prefix) or None
+
+
+def escape_like(value: str, escape: str = "\\") -> str:
+    """Escape the wildcards of a LIKE pattern."""
+    for char in (escape, "%", "_", "["):
+        value = value.replace(char, escape + char)
+    return value
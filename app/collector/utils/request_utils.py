@@ -1,11 +1,20 @@
 import datetime
 import json
+import logging
+import random
+import threading
+import time
 import uuid
 import requests
 import os
 import typing
+from collections import defaultdict
 from decimal import Decimal
 import math
+import re
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
 
 # Serialize UUID properties in json_body
 def custom_serializer(obj):
@@ -45,34 +54,239 @@ def sanitize_for_json(obj):
     return obj
     
 
+# Methods that can be safely retried (PATCH and POST are retried only when
+# the caller informs that the call is idempotent).
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+# Status codes that indicate a transient failure.
+RETRY_STATUS = {429, 502, 503, 504}
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 120.0
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5
+MAX_BACKOFF = 30.0
+
+# Segments of the URLs kept in the route templates of the statistics (the
+# other ones, e.g. ids and fully qualified names, are replaced by {id}).
+ROUTE_SEGMENT = re.compile(r"[a-z][a-z_-]*")
+
+
+def route_template(route: str, path: typing.Optional[str] = None) -> str:
+    """Return the template of the route (e.g. tables/{id}/changes), used
+    to group the statistics of the calls."""
+    segments = f"{route}/{path or ''}".strip("/").split("/")
+    return "/".join(
+        segment if ROUTE_SEGMENT.fullmatch(segment) else "{id}"
+        for segment in segments
+    )
+
+
+class RouteStats:
+    """Latency of the calls to a route."""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    def __str__(self):
+        mean = self.total_time / self.count if self.count else 0.0
+        return (
+            f"{self.count} call(s), {self.errors} error(s), "
+            f"{self.retries} retry(ies), mean {mean * 1000:.1f}ms, "
+            f"max {self.max_time * 1000:.1f}ms, total {self.total_time:.2f}s"
+        )
+
+
+class HttpClient:
+    """HTTP client with a pool of keep-alive connections, shared by the
+    threads of the collector. Idempotent calls that fail due to connection
+    errors, timeouts or transient status codes are retried with exponential
+    backoff and jitter. The latency of the calls is recorded by route.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.session = requests.Session()
+        self.adapter: typing.Optional[HTTPAdapter] = None
+        self.pool_size = 0
+        self.resize(pool_size)
+        self._stats: typing.Dict[str, RouteStats] = defaultdict(RouteStats)
+        self._stats_lock = threading.Lock()
+
+    def resize(self, pool_size: int):
+        """Set the max number of connections kept open to the server. It
+        should be at least the number of threads using the client."""
+        pool_size = max(1, pool_size)
+        if pool_size != self.pool_size:
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            self.session.mount("http://", adapter)
+            self.session.mount("https://", adapter)
+            # Close the connections of the replaced pool.
+            if self.adapter is not None:
+                self.adapter.close()
+            self.adapter = adapter
+            self.pool_size = pool_size
+
+    def format_url(self, route: str, path: typing.Optional[str] = None):
+        """Method to format url and parameters to be used in requests."""
+        url = self.base_url + "/" + route.lstrip("/")
+        if path:
+            url += "/" + path.lstrip("/")
+        return url
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: random value between 0 and the exponential backoff.
+        return random.uniform(
+            0, min(MAX_BACKOFF, self.backoff_factor * (2**attempt))
+        )
+
+    def _record(self, key: str, elapsed: float, error: bool, retry: bool):
+        with self._stats_lock:
+            stats = self._stats[key]
+            stats.count += 1
+            stats.total_time += elapsed
+            stats.max_time = max(stats.max_time, elapsed)
+            if error:
+                stats.errors += 1
+            if retry:
+                stats.retries += 1
+
+    def request(
+        self,
+        method: str,
+        route: str,
+        path: typing.Optional[str] = None,
+        idempotent: typing.Optional[bool] = None,
+        **kwargs,
+    ) -> requests.Response:
+        """Perform a request, retrying it if it is idempotent."""
+        method = method.upper()
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        attempts = 1 + (self.max_retries if idempotent else 0)
+        url = self.format_url(route, path)
+        key = f"{method} {route_template(route, path)}"
+        kwargs.setdefault("timeout", self.timeout)
+
+        for attempt in range(attempts):
+            last = attempt == attempts - 1
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                self._record(key, time.perf_counter() - start, True, not last)
+                if last:
+                    raise
+                logger.warning(
+                    "%s %s failed, retrying (%d/%d)",
+                    method, url, attempt + 1, self.max_retries,
+                    exc_info=True,
+                )
+            else:
+                retry = response.status_code in RETRY_STATUS and not last
+                self._record(
+                    key,
+                    time.perf_counter() - start,
+                    response.status_code >= 500,
+                    retry,
+                )
+                if not retry:
+                    return response
+                logger.warning(
+                    "%s %s returned %s, retrying (%d/%d)",
+                    method, url, response.status_code, attempt + 1,
+                    self.max_retries,
+                )
+                response.close()
+            time.sleep(self._backoff(attempt))
+        raise AssertionError("unreachable")
+
+    def reset_stats(self) -> typing.Dict[str, RouteStats]:
+        """Return the latency recorded by route and start a new recording."""
+        with self._stats_lock:
+            stats, self._stats = self._stats, defaultdict(RouteStats)
+        return dict(stats)
+
+
+_clients: typing.Dict[str, HttpClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_http_client(url_variable: str = "API_URL") -> HttpClient:
+    """Return the client shared by the collector for the server whose URL is
+    in the environment variable url_variable. Timeouts and retries can be
+    configured by the API_CONNECT_TIMEOUT, API_READ_TIMEOUT and
+    API_MAX_RETRIES environment variables."""
+    with _clients_lock:
+        if url_variable not in _clients:
+            _clients[url_variable] = HttpClient(
+                os.environ[url_variable],
+                connect_timeout=float(
+                    os.environ.get(
+                        "API_CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT
+                    )
+                ),
+                read_timeout=float(
+                    os.environ.get("API_READ_TIMEOUT", DEFAULT_READ_TIMEOUT)
+                ),
+                max_retries=int(
+                    os.environ.get("API_MAX_RETRIES", DEFAULT_MAX_RETRIES)
+                ),
+            )
+        return _clients[url_variable]
+
+
+def reset_http_stats() -> typing.Dict[typing.Tuple[str, str], RouteStats]:
+    """Return the latency recorded by server (base URL) and route, for all
+    the clients already created, and start a new recording."""
+    with _clients_lock:
+        clients = list(_clients.values())
+    stats = {}
+    for client in clients:
+        for route, route_stats in client.reset_stats().items():
+            stats[(client.base_url, route)] = route_stats
+    return stats
+
+
 def _format_url(route: str, path: typing.Optional[str] = None):
     """Method to format url and parameters to be used in requests."""
-    api_url = os.environ["API_URL"]
-    url = api_url.rstrip("/") + "/" + route.lstrip("/")
-    if path:
-        url += "/" + path.lstrip("/")
-    return url
-
+    return get_http_client().format_url(route, path)
 
-def post_request(route, json_body):
-    """Method to perform a POST request."""
 
-    url = _format_url(route)
-    
+def _dumps(json_body) -> str:
     clean_json_body = sanitize_for_json(json_body)
-    response = requests.post(
-        url, data=json.dumps(clean_json_body, default=custom_serializer)
+    return json.dumps(clean_json_body, default=custom_serializer)
+
+
+def post_request(route, json_body, idempotent: bool = False):
+    """Method to perform a POST request."""
+    response = get_http_client().request(
+        "POST", route, data=_dumps(json_body), idempotent=idempotent
     )
     assert response.status_code in [200, 201], response.text
     return response.json()
 
 def patch_request(route, path, json_body):
     """Method to perform a PATCH request."""
-    url = _format_url(route, path)
-
-    clean_json_body = sanitize_for_json(json_body)
-    response = requests.patch(
-        url, data=json.dumps(clean_json_body, default=custom_serializer)
+    # Collector updates set the informed values, so they can be retried.
+    response = get_http_client().request(
+        "PATCH", route, path, data=_dumps(json_body), idempotent=True
     )
 
     assert response.status_code == 200, response.text
@@ -80,11 +294,8 @@ def patch_request(route, path, json_body):
 
 def patch_request2(route: str, path: typing.Optional[str], json_body):
     """Method to perform a PATCH request."""
-    url = _format_url(route, path)
-
-    clean_json_body = sanitize_for_json(json_body)
-    response = requests.patch(
-        url, data=json.dumps(clean_json_body, default=custom_serializer)
+    response = get_http_client().request(
+        "PATCH", route, path, data=_dumps(json_body), idempotent=True
     )
 
     assert response.status_code == 200
@@ -93,12 +304,23 @@ def patch_request2(route: str, path: typing.Optional[str], json_body):
 
 def get_request(route: str, path: typing.Optional[str] = None, params=None):
     """Method to perform a GET request."""
-    url = _format_url(route, path)
-    response = requests.get(url, params=params)
+    response = get_http_client().request("GET", route, path, params=params)
     return response.status_code, response.json()
 
+def stream_request(
+    route: str, path: typing.Optional[str] = None, params=None
+) -> typing.Iterator[typing.Any]:
+    """Method to perform a GET request whose response is NDJSON, returning
+    one object per line as they are received."""
+    with get_http_client().request(
+        "GET", route, path, params=params, stream=True
+    ) as response:
+        assert response.status_code == 200, response.text
+        for line in response.iter_lines():
+            if line:
+                yield json.loads(line)
+
 def options_request(route: str, path: typing.Optional[str] = None, params=None):
     """Method to perform a OPTIONS request."""
-    url = _format_url(route, path)
-    response = requests.options(url, params=params)
+    response = get_http_client().request("OPTIONS", route, path, params=params)
     return response.status_code, response.json()
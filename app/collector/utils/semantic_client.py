@@ -0,0 +1,297 @@
+import datetime
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import typing
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from app.collector.utils.logging_config import with_log_context
+from app.collector.utils.request_utils import get_http_client
+
+logger = logging.getLogger(__name__)
+
+# Route that classifies the values of a single column.
+CLASSIFY_ROUTE = "classificar-valores/"
+
+# Value returned when the classification fails (it is not cached).
+FAILED_TYPE = "API_FAILED"
+
+# Max number of columns sent in a single request to the batch route.
+DEFAULT_BATCH_SIZE = 50
+
+# Max number of requests in flight at the same time.
+DEFAULT_MAX_IN_FLIGHT = 4
+
+# Max number of classifications kept by the cache.
+DEFAULT_CACHE_SIZE = 100000
+
+# Time (in seconds) a classification is kept by the cache (30 days).
+DEFAULT_CACHE_TTL = 30 * 24 * 60 * 60
+
+# File where the cache is persisted between executions.
+DEFAULT_CACHE_PATH = "collector_cache/semantic_types.json"
+
+
+def _serialize(values: typing.Iterable) -> typing.List[str]:
+    """Convert the sample values to the strings sent to the API."""
+    serialized = []
+    for value in values:
+        if isinstance(value, uuid.UUID):
+            serialized.append(str(value))
+        elif isinstance(value, datetime.datetime):
+            serialized.append(value.isoformat())
+        else:
+            serialized.append(str(value))
+    return serialized
+
+
+class SemanticTypeCache:
+    """LRU cache, with expiration, of the semantic types by the hash of the
+    sample values. It is thread safe and can be saved to (and loaded from)
+    a JSON file."""
+
+    def __init__(
+        self,
+        max_size: int = DEFAULT_CACHE_SIZE,
+        ttl: float = DEFAULT_CACHE_TTL,
+        path: typing.Optional[str] = None,
+    ):
+        self.max_size = max(1, max_size)
+        self.ttl = ttl
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        # key -> (semantic type, time it was stored), oldest used first.
+        self._items: typing.OrderedDict[str, typing.Tuple[str, float]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+        # Serializes the writes of the file (the cache may be shared by
+        # concurrent executions).
+        self._save_lock = threading.Lock()
+        if path:
+            self.load()
+
+    def get(self, key: str) -> typing.Optional[str]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None or time.time() - item[1] > self.ttl:
+                if item is not None:
+                    del self._items[key]
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key: str, semantic_type: str):
+        with self._lock:
+            self._items[key] = (semantic_type, time.time())
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def reset_stats(self) -> typing.Tuple[int, int]:
+        """Return the number of hits and misses and start a new count."""
+        with self._lock:
+            stats = (self.hits, self.misses)
+            self.hits = self.misses = 0
+        return stats
+
+    def load(self):
+        """Load the items not expired from the file, if it exists."""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                items = json.load(f)
+        except (OSError, ValueError):
+            logger.warning("Invalid semantic type cache %s, ignored", self.path)
+            return
+        now = time.time()
+        with self._lock:
+            for key, (semantic_type, stored_at) in items:
+                if now - stored_at <= self.ttl:
+                    self._items[key] = (semantic_type, stored_at)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def save(self):
+        """Write the items to the file (atomically, using a temporary one)."""
+        if not self.path:
+            return
+        with self._lock:
+            items = [
+                [key, list(value)] for key, value in self._items.items()
+            ]
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._save_lock:
+            # Unique name, as other processes may write the same file.
+            with tempfile.NamedTemporaryFile(
+                "w",
+                encoding="utf-8",
+                dir=directory or ".",
+                prefix=os.path.basename(self.path) + ".",
+                suffix=".tmp",
+                delete=False,
+            ) as f:
+                tmp_path = f.name
+                try:
+                    json.dump(items, f)
+                except BaseException:
+                    f.close()
+                    os.remove(tmp_path)
+                    raise
+            os.replace(tmp_path, self.path)
+
+
+class SemanticClassifier:
+    """Client of the semantic type classification API.
+
+    The columns are classified in batches: values already classified (in
+    this or in previous executions) are taken from the cache, identified by
+    the hash of their content, and the others are sent with at most
+    max_in_flight requests at the same time. When batch_route is defined,
+    up to batch_size columns are sent in each request (the route receives a
+    list with the values of each column and returns a list of types).
+    Otherwise, each column is sent to the route that classifies a single
+    column.
+    """
+
+    def __init__(
+        self,
+        url_variable: str = "SEMANTIC_API_URL",
+        batch_route: typing.Optional[str] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        cache: typing.Optional[SemanticTypeCache] = None,
+    ):
+        self.url_variable = url_variable
+        self.batch_route = batch_route
+        self.batch_size = max(1, batch_size) if batch_route else 1
+        self.max_in_flight = max(1, max_in_flight)
+        self.cache = cache or SemanticTypeCache()
+
+    @staticmethod
+    def get_key(values: typing.List[str]) -> str:
+        """Return the hash of the (serialized) values of a column."""
+        content = json.dumps(values, ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def _classify_batch(
+        self, batch: typing.List[typing.List[str]]
+    ) -> typing.List[str]:
+        client = get_http_client(self.url_variable)
+        # The classification does not change anything, so it can be retried.
+        if self.batch_route:
+            response = client.request(
+                "POST", self.batch_route, json=batch, idempotent=True
+            )
+            if response.status_code == 200:
+                types = response.json()
+                if isinstance(types, list) and len(types) == len(batch):
+                    return [str(t) for t in types]
+            return [FAILED_TYPE] * len(batch)
+
+        response = client.request(
+            "POST", CLASSIFY_ROUTE, json=batch[0], idempotent=True
+        )
+        if response.status_code == 200:
+            return [response.text.replace('"', "")]
+        return [FAILED_TYPE]
+
+    def classify_many(
+        self, samples: typing.List[typing.List[typing.Any]]
+    ) -> typing.List[str]:
+        """Return the semantic type of each sample (the values of a column)."""
+        values = [_serialize(sample) for sample in samples]
+        keys = [self.get_key(v) for v in values]
+
+        types: typing.Dict[str, str] = {}
+        pending: typing.Dict[str, typing.List[str]] = {}
+        for key, sample in zip(keys, values):
+            if key in types or key in pending:
+                continue
+            cached = self.cache.get(key)
+            if cached is not None:
+                types[key] = cached
+            else:
+                pending[key] = sample
+
+        if pending:
+            pending_keys = list(pending)
+            batches = [
+                pending_keys[i : i + self.batch_size]
+                for i in range(0, len(pending_keys), self.batch_size)
+            ]
+            with ThreadPoolExecutor(
+                min(self.max_in_flight, len(batches)),
+                thread_name_prefix="semantic",
+            ) as pool:
+                results = pool.map(
+                    with_log_context(
+                        lambda batch: self._classify_batch(
+                            [pending[key] for key in batch]
+                        )
+                    ),
+                    batches,
+                )
+                for batch, batch_types in zip(batches, results):
+                    for key, semantic_type in zip(batch, batch_types):
+                        types[key] = semantic_type
+                        if semantic_type != FAILED_TYPE:
+                            self.cache.put(key, semantic_type)
+
+        return [types[key] for key in keys]
+
+    def save(self):
+        """Persist the cache, so it is used by the next executions."""
+        try:
+            self.cache.save()
+        except OSError:
+            logger.exception("Could not save the semantic type cache")
+
+
+_classifier: typing.Optional[SemanticClassifier] = None
+_classifier_lock = threading.Lock()
+
+
+def get_semantic_classifier() -> SemanticClassifier:
+    """Return the classifier shared by the collector. It can be configured by
+    the SEMANTIC_API_BATCH_ROUTE, SEMANTIC_BATCH_SIZE, SEMANTIC_MAX_IN_FLIGHT,
+    SEMANTIC_CACHE_PATH, SEMANTIC_CACHE_SIZE and SEMANTIC_CACHE_TTL
+    environment variables."""
+    global _classifier
+    with _classifier_lock:
+        if _classifier is None:
+            _classifier = SemanticClassifier(
+                batch_route=os.environ.get("SEMANTIC_API_BATCH_ROUTE"),
+                batch_size=int(
+                    os.environ.get("SEMANTIC_BATCH_SIZE", DEFAULT_BATCH_SIZE)
+                ),
+                max_in_flight=int(
+                    os.environ.get(
+                        "SEMANTIC_MAX_IN_FLIGHT", DEFAULT_MAX_IN_FLIGHT
+                    )
+                ),
+                cache=SemanticTypeCache(
+                    max_size=int(
+                        os.environ.get("SEMANTIC_CACHE_SIZE", DEFAULT_CACHE_SIZE)
+                    ),
+                    ttl=float(
+                        os.environ.get("SEMANTIC_CACHE_TTL", DEFAULT_CACHE_TTL)
+                    ),
+                    path=os.environ.get(
+                        "SEMANTIC_CACHE_PATH", DEFAULT_CACHE_PATH
+                    ),
+                ),
+            )
+        return _classifier
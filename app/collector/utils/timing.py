@@ -0,0 +1,170 @@
+import contextlib
+import contextvars
+import sys
+import threading
+import time
+import typing
+
+from app.schemas import (
+    DatabaseProviderIngestionPhaseSchema,
+    DatabaseProviderIngestionTimingSchema,
+)
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None  # type: ignore
+
+# Phases of the collection, in the order they are reported.
+PHASES = (
+    "connect",
+    "list_databases",
+    "list_schemas",
+    "reflect",
+    "sample",
+    "semantic",
+    "api_write",
+    "reconcile",
+)
+
+_current_timer: contextvars.ContextVar[typing.Optional["DataCollectionTimer"]] = (
+    contextvars.ContextVar("collection_timer", default=None)
+)
+
+
+def get_peak_rss() -> typing.Optional[float]:
+    """Return the peak resident set size of the process, in MB."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS and in kilobytes elsewhere.
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+class SpanStats:
+    """Time spent and objects processed by a phase of the collection. Time
+    is summed over the threads running the phase."""
+
+    COUNTERS = ("items", "created", "updated", "skipped", "disabled")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.items = 0
+        self.created = 0
+        self.updated = 0
+        self.skipped = 0
+        self.disabled = 0
+        self.peak_rss: typing.Optional[float] = None
+
+    def __str__(self):
+        counts = ", ".join(
+            f"{counter} {getattr(self, counter)}"
+            for counter in self.COUNTERS
+            if getattr(self, counter)
+        )
+        return (
+            f"Phase '{self.name}': {self.calls} call(s), "
+            f"total {self.total_time:.2f}s, max {self.max_time:.2f}s"
+            + (f", {counts}" if counts else "")
+        )
+
+
+class DataCollectionTimer:
+    """Collect the time spans of the phases of a collection (see PHASES).
+    Spans may be recorded concurrently by the threads of the collection."""
+
+    def __init__(self):
+        self._spans: typing.Dict[str, SpanStats] = {}
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self._stopped: typing.Optional[float] = None
+
+    def _get(self, name: str) -> SpanStats:
+        span = self._spans.get(name)
+        if span is None:
+            span = self._spans[name] = SpanStats(name)
+        return span
+
+    @contextlib.contextmanager
+    def span(self, name: str):
+        """Record the time spent in the block as a call of the phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            peak_rss = get_peak_rss()
+            with self._lock:
+                span = self._get(name)
+                span.calls += 1
+                span.total_time += elapsed
+                span.max_time = max(span.max_time, elapsed)
+                span.peak_rss = peak_rss
+
+    def count(self, name: str, **counts: int):
+        """Increment the counters of objects processed by the phase."""
+        with self._lock:
+            span = self._get(name)
+            for counter, value in counts.items():
+                setattr(span, counter, getattr(span, counter) + value)
+
+    def stop(self):
+        """Mark the end of the collection (the elapsed time is frozen)."""
+        self._stopped = time.perf_counter()
+
+    def get_spans(self) -> typing.List[SpanStats]:
+        with self._lock:
+            spans = list(self._spans.values())
+        order = {name: i for i, name in enumerate(PHASES)}
+        return sorted(spans, key=lambda s: order.get(s.name, len(order)))
+
+    def summary(self) -> DatabaseProviderIngestionTimingSchema:
+        return DatabaseProviderIngestionTimingSchema(
+            elapsed=(self._stopped or time.perf_counter()) - self._started,
+            peak_rss=get_peak_rss(),
+            phases=[
+                DatabaseProviderIngestionPhaseSchema(
+                    name=span.name,
+                    calls=span.calls,
+                    total_time=span.total_time,
+                    max_time=span.max_time,
+                    peak_rss=span.peak_rss,
+                    **{c: getattr(span, c) for c in SpanStats.COUNTERS},
+                )
+                for span in self.get_spans()
+            ],
+        )
+
+
+@contextlib.contextmanager
+def use_timer(timer: DataCollectionTimer):
+    """Record the spans of the current context (and of the threads started
+    with with_log_context) in timer."""
+    token = _current_timer.set(timer)
+    try:
+        yield timer
+    finally:
+        _current_timer.reset(token)
+
+
+@contextlib.contextmanager
+def span(name: str):
+    """Record a span of the phase in the timer of the current context, if
+    any."""
+    timer = _current_timer.get()
+    if timer is None:
+        yield
+        return
+    with timer.span(name):
+        yield
+
+
+def count(name: str, **counts: int):
+    """Increment the counters of the phase in the timer of the current
+    context, if any."""
+    timer = _current_timer.get()
+    if timer is not None:
+        timer.count(name, **counts)
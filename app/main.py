@@ -1,26 +1,24 @@
 from contextlib import asynccontextmanager
+import contextlib
 import asyncio
-import asyncpg
-from apscheduler.schedulers.background import (
-    BackgroundScheduler,
-)  # runs tasks in the background
-from apscheduler.triggers.cron import (
-    CronTrigger,
-)  # allows us to specify a recurring time for execution
 from dotenv import load_dotenv
 from fastapi import FastAPI, Request, status
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
 from fastapi.responses import JSONResponse
-from pgqueuer import AsyncpgDriver, Queries
 from sqlalchemy.exc import IntegrityError
 
 from app.collector.data_collection_scheduling_engine import DataCollectionSchedulingEngine
-from app.database import DATABASE_URL
-from app.exceptions import DatabaseException, EntityNotFoundException
+from app.database import engine
+from app.exceptions import (
+    BusinessRuleException,
+    DatabaseException,
+    EntityNotFoundException,
+)
 from app.routers import (
     a_i_model_router,
+    asset_change_router,
     asset_router,
     company_router,
     contact_router,
@@ -36,6 +34,7 @@ from app.routers import (
     database_table_router,
     database_table_sample_router,
     layer_router,
+    metrics_router,
     permission_router,
     person_router,
     role_router,
@@ -45,27 +44,26 @@ from app.routers import (
 )
 
 from .routers import domain_router
+from .utils.metrics import instrument_engine
 from .utils.middlewares import add_middlewares
-import urllib.parse
 import os
 
 load_dotenv()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Manage async database connection throughout the app's lifespan."""
-    # encode special characters from the password
-    url_1 = DATABASE_URL.replace("+asyncpg", "").split("@")
-    url_2 = url_1[0].split(":")
-    password = url_2[2]
-    password = urllib.parse.quote(password)
-    dns = url_2[0]+":"+url_2[1]+":"+password+"@"+url_1[1]
-    connection = await asyncpg.connect(dsn=dns)
-    app.extra["pgq_queries"] = Queries(AsyncpgDriver(connection))  # type: ignore
+    """Run the scheduling engine throughout the app's lifespan."""
+    scheduler_task = None
+    if ENABLE_SCHEDULER == True:
+        scheduling_engine = DataCollectionSchedulingEngine()
+        scheduler_task = asyncio.create_task(scheduling_engine.run_forever())
     try:
         yield
     finally:
-        await connection.close()
+        if scheduler_task is not None:
+            scheduler_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await scheduler_task
 
 
 app = FastAPI(
@@ -139,6 +137,7 @@ app.add_middleware(
     allow_headers=["*"],
 )
 add_middlewares(app)
+instrument_engine("default", engine)
 
 
 @app.exception_handler(DatabaseException)
@@ -157,6 +156,15 @@ async def not_found_exception_handler(
     return JSONResponse(status_code=404, content={"error": detail})
 
 
+@app.exception_handler(BusinessRuleException)
+async def business_rule_exception_handler(
+    request: Request, exc: BusinessRuleException
+):
+    """Global handler for business rule violations."""
+    detail = str(exc)
+    return JSONResponse(status_code=exc.status_code, content={"error": detail})
+
+
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(
     request: Request, exc: RequestValidationError
@@ -168,23 +176,14 @@ async def validation_exception_handler(
         content=content, status_code=status.HTTP_422_UNPROCESSABLE_ENTITY
     )
 
+# The ingestions and the retention of the asset changes are handled by
+# the scheduling engine (see lifespan)
 ENABLE_SCHEDULER = eval(os.environ["ENABLE_SCHEDULER"])
 
-# The task to run
-def daily_task():
-    engine = DataCollectionSchedulingEngine()
-    asyncio.run(engine.execute_engine())
-
-if ENABLE_SCHEDULER == True:
-    # Set up the scheduler
-    scheduler = BackgroundScheduler()
-    trigger = CronTrigger(minute='*')
-    scheduler.add_job(daily_task, trigger)
-    scheduler.start()
-
 
 routers = [
     a_i_model_router.router,
+    asset_change_router.router,
     asset_router.router,
     company_router.router,
     contact_router.router,
@@ -201,6 +200,7 @@ routers = [
     database_table_router.router,
     database_table_sample_router.router,
     layer_router.router,
+    metrics_router.router,
     permission_router.router,
     person_router.router,
     responsibility_type_router.router,
@@ -4,6 +4,7 @@ from datetime import datetime, timezone
 from .database import Base
 from sqlalchemy.orm import mapped_column
 from sqlalchemy import (
+    BigInteger,
     Integer,
     String,
     Boolean,
@@ -155,6 +156,19 @@ class DataType(str, enum.Enum):
         return [item.value for item in DataType]
 
 
+class AssetChangeKind(str, enum.Enum):
+    CREATED = "CREATED"
+    UPDATED = "UPDATED"
+    DISABLED = "DISABLED"
+    COLUMN_ADDED = "COLUMN_ADDED"
+    COLUMN_REMOVED = "COLUMN_REMOVED"
+    COLUMN_UPDATED = "COLUMN_UPDATED"
+
+    @staticmethod
+    def values():
+        return [item.value for item in AssetChangeKind]
+
+
 class SchedulingType(str, enum.Enum):
     MANUAL = "MANUAL"
     CRON = "CRON"
@@ -164,6 +178,11 @@ class SchedulingType(str, enum.Enum):
         return [item.value for item in SchedulingType]
 
 
+# Max number of parallel workers of an ingestion (each one may use
+# connections to the data source and to the catalog).
+MAX_INGESTION_WORKERS = 32
+
+
 # Association Table for Many-to-Many Relationship
 role_permission = Table(
     "tb_role_permission",
@@ -668,6 +687,7 @@ class Asset(Base):
     asset_type = mapped_column(String(20), nullable=False)
     tree = mapped_column(JSONB)
     search = mapped_column(TSVECTOR)
+    fingerprint = mapped_column(String(64))
 
     # Associations
     domain_id = mapped_column(
@@ -740,6 +760,62 @@ def update_search(mapper, connection, target: Asset):
             }
 
 
+class AssetChange(Base):
+    """Alteração em um ativo detectada por uma execução de ingestão"""
+
+    # Partitioned by month (see AssetChangeService.apply_retention), so old
+    # changes are removed by dropping whole partitions.
+    __tablename__ = "tb_asset_change"
+    __table_args__ = (
+        Index("inx_asset_change_asset", "asset_id", "id"),
+        Index("inx_asset_change_provider", "provider_id", "id"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+    # Fields
+    id = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    created_at = mapped_column(
+        DateTime, primary_key=True, default=utc_now, nullable=False
+    )
+    kind = mapped_column(
+        Enum(AssetChangeKind, name="AssetChangeKindEnumType"), nullable=False
+    )
+    field = mapped_column(String(500))
+    old_value = mapped_column(Text)
+    new_value = mapped_column(Text)
+
+    # Associations
+    asset_id = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey(
+            "tb_asset.id", name="fk_asset_change_asset_id", ondelete="CASCADE"
+        ),
+        nullable=False,
+    )
+    provider_id = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey(
+            "tb_database_provider.id",
+            name="fk_asset_change_provider_id",
+            ondelete="CASCADE",
+        ),
+    )
+    execution_id = mapped_column(
+        Integer,
+        ForeignKey(
+            "tb_database_provider_ingestion_execution.id",
+            name="fk_asset_change_execution_id",
+            ondelete="set null",
+        ),
+    )
+
+    def __str__(self):
+        return f"{self.kind} {self.field}"
+
+    def __repr__(self):
+        return f"<Instance {self.__class__}: {self.id}>"
+
+
 class DatabaseProvider(Asset):
     """Provedor de banco de dados"""
 
@@ -854,6 +930,10 @@ class DatabaseProviderIngestion(Base):
     apply_semantic_analysis = mapped_column(
         Boolean, default=False, nullable=False
     )
+    max_workers = mapped_column(
+        Integer, default=1, nullable=False, server_default="1"
+    )
+    next_run_at = mapped_column(DateTime, index=True)
 
     # Associations
     provider_id = mapped_column(
@@ -891,8 +971,21 @@ class DatabaseProviderIngestionExecution(Base):
     job_id = mapped_column(Integer)
     finished = mapped_column(DateTime)
     trigger_mode = mapped_column(String(50), nullable=False)
+    dry_run = mapped_column(
+        Boolean, default=False, nullable=False, server_default="False"
+    )
+    plan = mapped_column(JSON)
+    timing = mapped_column(JSON)
 
     # Associations
+    resumed_from_id = mapped_column(
+        Integer,
+        ForeignKey(
+            "tb_database_provider_ingestion_execution.id",
+            name="fk_database_provider_ingestion_execution_resumed_from_id",
+            ondelete="set null",
+        ),
+    )
     triggered_by_id = mapped_column(
         UUID(as_uuid=True),
         ForeignKey(
@@ -914,10 +1007,13 @@ class DatabaseProviderIngestionExecution(Base):
     ingestion = relationship(
         "DatabaseProviderIngestion", foreign_keys=[ingestion_id], lazy="joined"
     )
+    # Chunks of the log: not loaded with the executions (see
+    # DatabaseProviderIngestionExecutionService.get_log)
     logs = relationship(
         "DatabaseProviderIngestionLog",
         cascade="all, delete-orphan",
-        lazy="joined",
+        lazy="noload",
+        order_by="DatabaseProviderIngestionLog.seq",
     )
 
     def __str__(self):
@@ -927,10 +1023,56 @@ class DatabaseProviderIngestionExecution(Base):
         return f"<Instance {self.__class__}: {self.id}>"
 
 
+class DatabaseProviderIngestionCheckpoint(Base):
+    """Escopo (banco de dados ou esquema) concluído em uma execução de
+    ingestão"""
+
+    __tablename__ = "tb_database_provider_ingestion_checkpoint"
+    __table_args__ = (
+        UniqueConstraint(
+            "execution_id", "scope", name="inx_uq_ingestion_checkpoint"
+        ),
+    )
+
+    # Fields
+    id = mapped_column(
+        Integer,
+        primary_key=True,
+        autoincrement=True,
+    )
+    scope = mapped_column(String(1000), nullable=False)
+    created_at = mapped_column(DateTime, default=utc_now, nullable=False)
+
+    # Associations
+    execution_id = mapped_column(
+        Integer,
+        ForeignKey(
+            "tb_database_provider_ingestion_execution.id",
+            name="fk_database_provider_ingestion_checkpoint_execution_id",
+            ondelete="CASCADE",
+        ),
+        nullable=False,
+    )
+    execution = relationship(
+        "DatabaseProviderIngestionExecution", foreign_keys=[execution_id]
+    )
+
+    def __str__(self):
+        return str(self.scope)
+
+    def __repr__(self):
+        return f"<Instance {self.__class__}: {self.id}>"
+
+
 class DatabaseProviderIngestionLog(Base):
     """Log de execução de ingestão"""
 
     __tablename__ = "tb_database_provider_ingestion_log"
+    __table_args__ = (
+        UniqueConstraint(
+            "execution_id", "seq", name="inx_uq_ingestion_log_seq"
+        ),
+    )
 
     # Fields
     id = mapped_column(
@@ -938,6 +1080,8 @@ class DatabaseProviderIngestionLog(Base):
         primary_key=True,
         autoincrement=True,
     )
+    # Order of the chunk in the log of the execution
+    seq = mapped_column(Integer, nullable=False)
     updated_at = mapped_column(DateTime, default=utc_now, onupdate=utc_now)
     status = mapped_column(String(100), nullable=False)
     log = mapped_column(Text)
@@ -1217,6 +1361,9 @@ class TableColumn(Base):
     """Coluna"""
 
     __tablename__ = "tb_table_column"
+    __table_args__ = (
+        UniqueConstraint("table_id", "name", name="inx_uq_table_column"),
+    )
 
     # Fields
     id = mapped_column(
@@ -1,8 +1,14 @@
 # Pattern to identify FQN vs UUID
 import re
+import typing
 from uuid import UUID
 
 from fastapi import HTTPException, Path
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database import AsyncSessionLocal
 
 UUID_PATTERN = re.compile(
     r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$", re.I
@@ -40,3 +46,19 @@ def get_lookup_filter(
             raise HTTPException(status_code=400, detail="Invalid UUID format")
     else:
         return entity_id
+
+
+def ndjson_response(
+    items: typing.Callable[[AsyncSession], typing.AsyncIterator[BaseModel]],
+) -> StreamingResponse:
+    """Stream the items as newline delimited JSON (one object per line).
+    Sessions injected as dependencies are closed before the body is sent,
+    so the items are read using a session owned by the response.
+    """
+
+    async def _body():
+        async with AsyncSessionLocal() as session:  # type: ignore
+            async for item in items(session):
+                yield item.model_dump_json() + "\n"
+
+    return StreamingResponse(_body(), media_type="application/x-ndjson")
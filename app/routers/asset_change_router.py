@@ -0,0 +1,105 @@
+#
+import logging
+import typing
+from uuid import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, Depends, Query, status
+
+from ..schemas import (
+    PaginatedSchema,
+    AssetChangeCreateSchema,
+    AssetChangeFeedQuerySchema,
+    AssetChangeFeedSchema,
+    AssetChangeItemSchema,
+    AssetChangeQuerySchema,
+    AssetChangeRetentionSchema,
+)
+from ..services.asset_change_service import AssetChangeService
+from ..database import get_session
+from ..routers import get_lookup_filter
+
+router = APIRouter()
+log = logging.getLogger(__name__)
+# region Protected\s*
+# endregion\w*
+
+
+def _get_service(
+    db: AsyncSession = Depends(get_session),
+) -> AssetChangeService:
+    return AssetChangeService(db)
+
+
+@router.get(
+    "/changes/",
+    tags=["AssetChange"],
+    response_model=AssetChangeFeedSchema,
+)
+async def get_asset_changes_feed(
+    query_options: AssetChangeFeedQuerySchema = Depends(),
+    service: AssetChangeService = Depends(_get_service),
+) -> AssetChangeFeedSchema:
+    """
+    Recupera as alterações dos ativos na ordem em que foram registradas
+    (opcionalmente, de um provedor). Para obter a próxima página, informe
+    o cursor retornado (next_cursor) no parâmetro after. Uma página vazia
+    retorna o mesmo cursor, que pode ser usado para consultar as alterações
+    registradas depois.
+    """
+    return await service.feed(query_options)
+
+
+@router.post(
+    "/changes/bulk",
+    tags=["AssetChange"],
+    status_code=status.HTTP_201_CREATED,
+)
+async def add_asset_changes(
+    changes_data: typing.List[AssetChangeCreateSchema],
+    service: AssetChangeService = Depends(_get_service),
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Registra, em lote, alterações detectadas nos ativos.
+    """
+    count = await service.add_many(changes_data)
+    await session.commit()
+    return {"status": "success", "count": count}
+
+
+@router.post(
+    "/changes/retention",
+    tags=["AssetChange"],
+    response_model=AssetChangeRetentionSchema,
+)
+async def apply_asset_changes_retention(
+    retention_days: typing.Optional[int] = Query(
+        default=None, ge=0, description="Dias em que as alterações são mantidas"
+    ),
+    service: AssetChangeService = Depends(_get_service),
+    session: AsyncSession = Depends(get_session),
+) -> AssetChangeRetentionSchema:
+    """
+    Remove as alterações anteriores ao período de retenção e cria as
+    partições dos próximos meses.
+    """
+    result = await service.apply_retention(retention_days)
+    await session.commit()
+    return result
+
+
+@router.get(
+    "/assets/{entity_id}/changes",
+    tags=["Asset"],
+    response_model=PaginatedSchema[AssetChangeItemSchema],
+)
+async def find_asset_changes(
+    entity_id: typing.Union[UUID, str] = Depends(get_lookup_filter),
+    query_options: AssetChangeQuerySchema = Depends(),
+    service: AssetChangeService = Depends(_get_service),
+) -> PaginatedSchema[AssetChangeItemSchema]:
+    """
+    Recupera as alterações de um ativo, das mais recentes para as mais
+    antigas.
+    """
+    return await service.find_by_asset(entity_id, query_options)
@@ -5,6 +5,7 @@ import typing
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, Path, Query, Path
+from fastapi.responses import StreamingResponse
 from sqlalchemy import and_, asc, delete, desc, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload, selectinload
@@ -18,7 +19,9 @@ from app.models import (
     TableColumn,
 )
 from app.utils import remove_accents
-from ..routers import get_lookup_filter
+from ..routers import get_lookup_filter, ndjson_response
+from ..services import STREAM_BATCH_SIZE
+from ..services.asset_service import AssetService
 from ..database import get_session
 from fastapi import HTTPException
 from ..schemas import (
@@ -26,6 +29,8 @@ from ..schemas import (
     AssetLinkItemSchema,
     AssetListSchema,
     AssetQuerySchema,
+    AssetReconcileResultSchema,
+    AssetReconcileSchema,
     PaginatedSchema,
     ResponsibilityCreateSchema,
     ResponsibilityItemSchema,
@@ -36,23 +41,14 @@ router = APIRouter()
 log = logging.getLogger(__name__)
 
 
-@router.post(
-    "/assets/",
-    tags=["Asset"],
-    response_model=PaginatedSchema[AssetListSchema],
-    response_model_exclude_none=True,
-)
-async def find_assets(
-    query_options: AssetQuerySchema,
-    session: AsyncSession = Depends(get_session),
-) -> PaginatedSchema[AssetListSchema]:
-    """
-    Recupera uma lista de instâncias usando as opções de consulta.
-    """
-    page = max(query_options.page, 1)
-    limit = min(max(1, query_options.page_size), 100)
-    offset = (page - 1) * limit
+def _get_service(
+    db: AsyncSession = Depends(get_session),
+) -> AssetService:
+    return AssetService(db)
 
+
+def _get_assets_query(query_options: AssetQuerySchema):
+    """Build the filtered and sorted query used to list the assets."""
     query = select(Asset).options(
         selectinload(Asset.domain),  # Load domain if it exists
         selectinload(Asset.layer),
@@ -135,7 +131,45 @@ async def find_assets(
     if query_options.sort_by and hasattr(Asset, query_options.sort_by):
         order_func = asc if query_options.sort_order != "desc" else desc
         query = query.order_by(order_func(getattr(Asset, query_options.sort_by)))
+    return query
+
+
+async def _stream_assets(
+    session: AsyncSession, query_options: AssetQuerySchema
+) -> typing.AsyncIterator[AssetListSchema]:
+    """Iterate over all assets matching the query, using a server-side cursor."""
+    query = _get_assets_query(query_options).execution_options(
+        yield_per=STREAM_BATCH_SIZE
+    )
+    result = await session.stream_scalars(query)
+    async for row in result:
+        yield AssetListSchema.model_validate(row)
+
+
+@router.post(
+    "/assets/",
+    tags=["Asset"],
+    response_model=PaginatedSchema[AssetListSchema],
+    response_model_exclude_none=True,
+    responses={200: {"content": {"application/x-ndjson": {}}}},
+)
+async def find_assets(
+    query_options: AssetQuerySchema,
+    session: AsyncSession = Depends(get_session),
+) -> typing.Union[PaginatedSchema[AssetListSchema], StreamingResponse]:
+    """
+    Recupera uma lista de instâncias usando as opções de consulta. Com a
+    opção stream, retorna todas as instâncias em fluxo (NDJSON).
+    """
+    if query_options.stream:
+        return ndjson_response(
+            lambda stream_session: _stream_assets(stream_session, query_options)
+        )
+    page = max(query_options.page, 1)
+    limit = min(max(1, query_options.page_size), 100)
+    offset = (page - 1) * limit
 
+    query = _get_assets_query(query_options)
     rows = list(
         (await session.execute(query.offset(offset).limit(limit)))
         .scalars()
@@ -445,3 +479,23 @@ async def disable_many(
     )
     await session.commit()
     return {"status": "success", "message": "Assets disabled successfully"}
+
+
+@router.post(
+    "/assets/reconcile",
+    tags=["Asset"],
+    response_model=AssetReconcileResultSchema,
+)
+async def reconcile(
+    reconcile_data: AssetReconcileSchema,
+    service: AssetService = Depends(_get_service),
+    session: AsyncSession = Depends(get_session),
+) -> AssetReconcileResultSchema:
+    """
+    Desabilita os ativos do escopo (provedor, banco de dados ou esquema) que
+    não estão na lista de nomes encontrados na origem. Retorna os nomes dos
+    ativos desabilitados.
+    """
+    result = await service.reconcile(reconcile_data)
+    await session.commit()
+    return result
@@ -3,14 +3,18 @@ import logging
 import typing
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import APIRouter, HTTPException, Depends, status, Path
+from fastapi.responses import PlainTextResponse
 
 from ..schemas import (
     PaginatedSchema,
+    DatabaseProviderIngestionCheckpointCreateSchema,
+    DatabaseProviderIngestionCheckpointItemSchema,
     DatabaseProviderIngestionExecutionCreateSchema,
     DatabaseProviderIngestionExecutionUpdateSchema,
     DatabaseProviderIngestionExecutionItemSchema,
     DatabaseProviderIngestionExecutionListSchema,
     DatabaseProviderIngestionExecutionQuerySchema,
+    DatabaseProviderIngestionTimingSchema,
 )
 from ..services.database_provider_ingestion_execution_service import (
     DatabaseProviderIngestionExecutionService,
@@ -137,3 +141,84 @@ async def get_database_provider_ingestion_execution(
     if database_provider_ingestion_execution is None:
         raise HTTPException(status_code=404, detail="Item not found")
     return database_provider_ingestion_execution
+
+
+@router.get(
+    "/executions/{database_provider_ingestion_execution_id}/checkpoints",
+    tags=["DatabaseProviderIngestionExecution"],
+    response_model=typing.List[DatabaseProviderIngestionCheckpointItemSchema],
+)
+async def get_database_provider_ingestion_execution_checkpoints(
+    database_provider_ingestion_execution_id: int = Path(
+        ..., description="Identificador"
+    ),
+    service: DatabaseProviderIngestionExecutionService = Depends(_get_service),
+) -> typing.List[DatabaseProviderIngestionCheckpointItemSchema]:
+    """
+    Recupera os escopos (bancos de dados e esquemas) já concluídos pela
+    execução.
+    """
+    return await service.get_checkpoints(
+        database_provider_ingestion_execution_id
+    )
+
+
+@router.get(
+    "/executions/{database_provider_ingestion_execution_id}/timing",
+    tags=["DatabaseProviderIngestionExecution"],
+    response_model=typing.Optional[DatabaseProviderIngestionTimingSchema],
+)
+async def get_database_provider_ingestion_execution_timing(
+    database_provider_ingestion_execution_id: int = Path(
+        ..., description="Identificador"
+    ),
+    service: DatabaseProviderIngestionExecutionService = Depends(_get_service),
+) -> typing.Optional[DatabaseProviderIngestionTimingSchema]:
+    """
+    Recupera o tempo e os recursos gastos pela execução em cada fase da
+    coleta (vazio se a execução não terminou).
+    """
+    execution = await service.get(database_provider_ingestion_execution_id)
+    return execution.timing
+
+
+@router.get(
+    "/executions/{database_provider_ingestion_execution_id}/log",
+    tags=["DatabaseProviderIngestionExecution"],
+    response_class=PlainTextResponse,
+)
+async def get_database_provider_ingestion_execution_log(
+    database_provider_ingestion_execution_id: int = Path(
+        ..., description="Identificador"
+    ),
+    service: DatabaseProviderIngestionExecutionService = Depends(_get_service),
+) -> str:
+    """
+    Recupera o log da execução (os trechos gravados durante a execução, na
+    ordem em que foram gravados).
+    """
+    return await service.get_log(database_provider_ingestion_execution_id)
+
+
+@router.post(
+    "/executions/{database_provider_ingestion_execution_id}/checkpoints",
+    tags=["DatabaseProviderIngestionExecution"],
+    status_code=status.HTTP_201_CREATED,
+)
+async def add_database_provider_ingestion_execution_checkpoint(
+    checkpoint_data: DatabaseProviderIngestionCheckpointCreateSchema,
+    database_provider_ingestion_execution_id: int = Path(
+        ..., description="Identificador"
+    ),
+    service: DatabaseProviderIngestionExecutionService = Depends(_get_service),
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Registra um escopo (banco de dados ou esquema) como concluído pela
+    execução.
+    """
+    await service.add_checkpoint(
+        database_provider_ingestion_execution_id, checkpoint_data
+    )
+    await session.commit()
+    return {"status": "success"}
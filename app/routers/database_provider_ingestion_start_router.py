@@ -1,24 +1,21 @@
 import json
+import typing
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from fastapi import APIRouter, Depends, Path, Response
+from fastapi import APIRouter, Depends, Path, Query, Response
 
 from app.database import get_session
-from app.models import DatabaseProviderIngestionExecution
 from app.schemas import (
     DatabaseProviderIngestionExecutionItemSchema,
     DatabaseProviderIngestionItemSchema,
 )
-from pgqueuer import Queries
-from fastapi import Request
+from app.services.database_provider_ingestion_execution_service import (
+    DatabaseProviderIngestionExecutionService,
+)
 
 router = APIRouter()
 
-def get_pgq_queries(request: Request) -> Queries:
-    """Retrieve Queries instance from FastAPI app context."""
-    return request.app.extra["pgq_queries"]
-
 @router.post(
     "/ingestions/start/{database_provider_ingestion_id}",
     tags=["DatabaseProviderIngestion"],
@@ -29,31 +26,22 @@ async def start_database_provider_ingestion(
     database_provider_ingestion_id: UUID = Path(
         ..., description="Identificador"
     ),
+    mode: typing.Literal["full", "resume", "plan"] = Query(
+        "full",
+        description="Modo de início: full (completa), resume (retoma a "
+        "última execução com erro, ignorando os bancos de dados e esquemas "
+        "já concluídos; a última execução, sem contar as de planejamento, "
+        "deve ter terminado com erro) ou plan (apenas planeja a ingestão, "
+        "sem gravar no catálogo, e registra o plano na execução).",
+    ),
     session: AsyncSession = Depends(get_session),
-    pgq_queries: Queries = Depends(get_pgq_queries),
 ) -> Response:
     """
     Inicia uma ingestão de dados
     """
-    execution = DatabaseProviderIngestionExecution(
-        status="preparing",
-        trigger_mode="manual",
-        triggered_by=None,  # FIXME
-        ingestion_id=database_provider_ingestion_id,
-    )
-    session.add(execution)
-    await session.flush()
-    job_ids = await pgq_queries.enqueue(
-        "start_ingestion",
-        payload=json.dumps(
-            {
-                "ingestion": str(database_provider_ingestion_id),
-                "execution": str(execution.id),
-            }
-        ).encode(),
-    )
-    execution.job_id = job_ids[0]
-    session.add(execution)
+    execution = await DatabaseProviderIngestionExecutionService(
+        session
+    ).start(database_provider_ingestion_id, mode=mode)
     await session.commit()
     print("-" * 20)
     print(execution.id, execution)
@@ -4,6 +4,7 @@ import typing
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi.responses import StreamingResponse
 
 from ..schemas import (
     PaginatedSchema,
@@ -15,7 +16,7 @@ from ..schemas import (
 )
 from ..services.database_service import DatabaseService
 from ..database import get_session
-from ..routers import get_lookup_filter
+from ..routers import get_lookup_filter, ndjson_response
 
 router = APIRouter()
 log = logging.getLogger(__name__)
@@ -98,14 +99,20 @@ async def update_databases(
     tags=["Database"],
     response_model=PaginatedSchema[DatabaseListSchema],
     response_model_exclude_none=True,
+    responses={200: {"content": {"application/x-ndjson": {}}}},
 )
 async def find_databases(
     query_options: DatabaseQuerySchema = Depends(),
     service: DatabaseService = Depends(_get_service),
-) -> PaginatedSchema[DatabaseListSchema]:
+) -> typing.Union[PaginatedSchema[DatabaseListSchema], StreamingResponse]:
     """
-    Recupera uma lista de instâncias usando as opções de consulta.
+    Recupera uma lista de instâncias usando as opções de consulta. Com a
+    opção stream, retorna todas as instâncias em fluxo (NDJSON).
     """
+    if query_options.stream:
+        return ndjson_response(
+            lambda session: _get_service(session).stream(query_options)
+        )
     databases = await service.find(query_options)
     model = DatabaseListSchema()
     databases.items = [model.model_validate(d) for d in databases.items]
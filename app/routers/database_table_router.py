@@ -4,10 +4,14 @@ import typing
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi.responses import StreamingResponse
 
 from ..schemas import (
     PaginatedSchema,
+    DatabaseTableBulkItemSchema,
+    DatabaseTableChangeSetSchema,
     DatabaseTableCreateSchema,
+    DatabaseTableFingerprintSchema,
     DatabaseTableUpdateSchema,
     DatabaseTableItemSchema,
     DatabaseTableListSchema,
@@ -15,7 +19,7 @@ from ..schemas import (
 )
 from ..services.database_table_service import DatabaseTableService
 from ..database import get_session
-from ..routers import get_lookup_filter
+from ..routers import get_lookup_filter, ndjson_response
 
 router = APIRouter()
 log = logging.getLogger(__name__)
@@ -53,6 +57,29 @@ async def add_database_table(
     return result
 
 
+@router.post(
+    "/tables/bulk",
+    tags=["DatabaseTable"],
+    response_model=typing.List[DatabaseTableBulkItemSchema],
+    status_code=status.HTTP_200_OK,
+)
+async def bulk_upsert_database_tables(
+    database_tables_data: typing.List[DatabaseTableCreateSchema],
+    service: DatabaseTableService = Depends(_get_service),
+    session: AsyncSession = Depends(get_session),
+) -> typing.List[DatabaseTableBulkItemSchema]:
+    """
+    Adiciona ou atualiza, em lote, instâncias da classe DatabaseTable
+    (identificadas pelo nome completamente qualificado).
+    """
+    for database_table_data in database_tables_data:
+        database_table_data.updated_by = "FIXME!!!"
+
+    result = await service.bulk_upsert(database_tables_data)
+    await session.commit()
+    return result
+
+
 @router.delete(
     "/tables/{entity_id}",
     tags=["DatabaseTable"],
@@ -95,25 +122,77 @@ async def update_tables(
     return result
 
 
+@router.patch(
+    "/tables/{entity_id}/changes",
+    tags=["DatabaseTable"],
+    response_model=DatabaseTableBulkItemSchema,
+)
+async def apply_database_table_changes(
+    change_set: DatabaseTableChangeSetSchema,
+    entity_id: typing.Union[UUID, str] = Depends(get_lookup_filter),
+    service: DatabaseTableService = Depends(_get_service),
+    session: AsyncSession = Depends(get_session),
+) -> DatabaseTableBulkItemSchema:
+    """
+    Aplica um conjunto de alterações a uma instância da classe DatabaseTable.
+    Somente os campos alterados da tabela e das colunas (identificadas pelo
+    nome) são atualizados; as demais colunas são mantidas.
+    """
+    change_set.fields.updated_by = "FIXME!!!"
+
+    result = await service.apply_changes(entity_id, change_set)
+    await session.commit()
+    return result
+
+
 @router.get(
     "/tables/",
     tags=["DatabaseTable"],
     response_model=PaginatedSchema[DatabaseTableListSchema],
     response_model_exclude_none=True,
+    responses={200: {"content": {"application/x-ndjson": {}}}},
 )
 async def find_tables(
     query_options: DatabaseTableQuerySchema = Depends(),
     service: DatabaseTableService = Depends(_get_service),
-) -> PaginatedSchema[DatabaseTableListSchema]:
+) -> typing.Union[PaginatedSchema[DatabaseTableListSchema], StreamingResponse]:
     """
-    Recupera uma lista de instâncias usando as opções de consulta.
+    Recupera uma lista de instâncias usando as opções de consulta. Com a
+    opção stream, retorna todas as instâncias em fluxo (NDJSON).
     """
+    if query_options.stream:
+        return ndjson_response(
+            lambda session: _get_service(session).stream(query_options)
+        )
     tables = await service.find(query_options)
     model = DatabaseTableListSchema()
     tables.items = [model.model_validate(d) for d in tables.items]
     return tables
 
 
+@router.get(
+    "/tables/fingerprints",
+    tags=["DatabaseTable"],
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "content": {"application/x-ndjson": {}},
+            "model": DatabaseTableFingerprintSchema,
+        }
+    },
+)
+async def stream_database_table_fingerprints(
+    provider_id: UUID,
+) -> StreamingResponse:
+    """
+    Recupera, em fluxo (NDJSON), o hash dos metadados das instâncias da
+    classe DatabaseTable de um provedor.
+    """
+    return ndjson_response(
+        lambda session: _get_service(session).stream_fingerprints(provider_id)
+    )
+
+
 @router.get(
     "/tables/{entity_id}",
     tags=["DatabaseTable"],
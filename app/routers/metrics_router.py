@@ -0,0 +1,24 @@
+#
+import logging
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from ..utils.metrics import CONTENT_TYPE, metrics
+
+router = APIRouter()
+log = logging.getLogger(__name__)
+# region Protected\s*
+# endregion\w*
+
+
+@router.get(
+    "/metrics",
+    tags=["Metrics"],
+    response_class=PlainTextResponse,
+    include_in_schema=False,
+)
+async def get_metrics() -> PlainTextResponse:
+    """
+    Retorna as métricas da API no formato texto do Prometheus.
+    """
+    return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
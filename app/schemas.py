@@ -4,10 +4,12 @@ from uuid import UUID
 from typing import Annotated, Optional, TypeVar, Generic, List, Dict
 from pydantic import AfterValidator, BaseModel, Field, ConfigDict, AnyUrl
 
+from .models import AssetChangeKind
 from .models import LinkType
 from .models import SchedulingType
 from .models import TableType
 from .models import DataType
+from .models import MAX_INGESTION_WORKERS
 
 M = TypeVar("M")
 
@@ -951,6 +953,10 @@ class AssetCreateSchema(AssetBaseModel):
     updated_by: Optional[str] = Field(
         default=None, description="Usuário que fez a atualização."
     )
+    fingerprint: Optional[str] = Field(
+        default=None,
+        description="Hash dos metadados obtidos na origem, usado para identificar alterações.",
+    )
 
     # Associations
     domain_id: Optional[UUID] = Field(default=None)
@@ -987,6 +993,10 @@ class AssetUpdateSchema(AssetBaseModel):
     updated_by: Optional[str] = Field(
         default=None, description="Usuário que fez a atualização."
     )
+    fingerprint: Optional[str] = Field(
+        default=None,
+        description="Hash dos metadados obtidos na origem, usado para identificar alterações.",
+    )
 
     # Associations
     domain_id: Optional[UUID] = Field(default=None)
@@ -1025,6 +1035,10 @@ class AssetItemSchema(AssetBaseModel):
         default=None,
         description="Árvore com os ativos que são ancestrais do ativo atual (também o inclue).",
     )
+    fingerprint: Optional[str] = Field(
+        default=None,
+        description="Hash dos metadados obtidos na origem, usado para identificar alterações.",
+    )
 
     # Associations
     domain: Optional["DomainListSchema"] = Field(default=None)
@@ -1088,9 +1102,154 @@ class AssetQuerySchema(BaseQuerySchema):
     tag_ids: Optional[List[UUID]] = Field(default=None, description="Tags")
     query: Optional[str] = Field(default=None, description="Consulta")
     include_column: Optional[bool] = Field(default=None, description="Quando true, indica que a busca também deve ser feita nas colunas. Padrão: False.")
+    stream: Optional[bool] = Field(
+        default=None,
+        description="Quando true, retorna todas as instâncias, sem paginação, "
+        "em formato NDJSON (uma instância por linha).",
+    )
     ...
 
 
+class AssetReconcileSchema(BaseModel):
+    """Used for disabling the assets of a scope not found in the source"""
+
+    provider_id: Optional[UUID] = Field(
+        default=None, description="Provedor (escopo dos bancos de dados)"
+    )
+    database_id: Optional[UUID] = Field(
+        default=None, description="Banco de dados (escopo das tabelas)"
+    )
+    database_schema_id: Optional[UUID] = Field(
+        default=None, description="Esquema (escopo das tabelas)"
+    )
+    fully_qualified_names: List[str] = Field(
+        default_factory=list,
+        description="Nomes completos dos ativos encontrados na origem.",
+    )
+
+
+class AssetReconcileResultSchema(BaseModel):
+    """Result of the reconciliation of the assets of a scope"""
+
+    disabled: List[str] = Field(
+        default_factory=list, description="Nomes dos ativos desabilitados."
+    )
+    disabled_ids: List[UUID] = Field(
+        default_factory=list,
+        description="Identificadores dos ativos desabilitados.",
+    )
+
+
+class AssetChangeCreateSchema(BaseModel):
+    """JSON serialization schema for creating an instance"""
+
+    created_at: Optional[datetime] = Field(
+        default=None, description="Data da alteração."
+    )
+    kind: AssetChangeKind = Field(description="Tipo de alteração.")
+    field: Optional[str] = Field(
+        default=None,
+        description="Campo alterado (coluna.campo, se for uma coluna).",
+    )
+    old_value: Optional[str] = Field(default=None, description="Valor anterior.")
+    new_value: Optional[str] = Field(default=None, description="Novo valor.")
+
+    # Associations
+    asset_id: UUID
+    provider_id: Optional[UUID] = Field(default=None)
+    execution_id: Optional[int] = Field(default=None)
+
+
+class AssetChangeItemSchema(BaseModel):
+    """JSON serialization schema for serializing a single object"""
+
+    id: int
+    created_at: datetime = Field(description="Data da alteração.")
+    kind: AssetChangeKind = Field(description="Tipo de alteração.")
+    field: Optional[str] = Field(
+        default=None,
+        description="Campo alterado (coluna.campo, se for uma coluna).",
+    )
+    old_value: Optional[str] = Field(default=None, description="Valor anterior.")
+    new_value: Optional[str] = Field(default=None, description="Novo valor.")
+
+    # Associations
+    asset_id: UUID
+    provider_id: Optional[UUID] = Field(default=None)
+    execution_id: Optional[int] = Field(default=None)
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class AssetChangeQuerySchema(BaseQuerySchema):
+    """Used for querying data"""
+
+    kind: Optional[AssetChangeKind] = Field(
+        default=None, description="Tipo de alteração"
+    )
+    field: Optional[str] = Field(default=None, description="Campo alterado")
+    execution_id: Optional[int] = Field(default=None, description="Execução")
+    since: Optional[datetime] = Field(
+        default=None, description="Alterações a partir desta data"
+    )
+    until: Optional[datetime] = Field(
+        default=None, description="Alterações anteriores a esta data"
+    )
+
+
+class AssetChangeFeedQuerySchema(BaseModel):
+    """Used for reading the changes in order, using keyset pagination"""
+
+    provider_id: Optional[UUID] = Field(default=None, description="Provedor")
+    after: Optional[int] = Field(
+        default=None,
+        description="Cursor: alterações posteriores a esta (next_cursor).",
+    )
+    limit: int = Field(default=100, description="Número máximo de itens")
+    kind: Optional[AssetChangeKind] = Field(
+        default=None, description="Tipo de alteração"
+    )
+    execution_id: Optional[int] = Field(default=None, description="Execução")
+    since: Optional[datetime] = Field(
+        default=None, description="Alterações a partir desta data"
+    )
+    until: Optional[datetime] = Field(
+        default=None, description="Alterações anteriores a esta data"
+    )
+
+
+class AssetChangeFeedSchema(BaseModel):
+    """A page of the changes feed"""
+
+    items: List[AssetChangeItemSchema] = Field(
+        description="Lista de itens retornados"
+    )
+    next_cursor: Optional[int] = Field(
+        default=None,
+        description=(
+            "Cursor da próxima página (o mesmo informado, se não houver "
+            "novos itens)."
+        ),
+    )
+
+
+class AssetChangeRetentionSchema(BaseModel):
+    """Result of the retention of the changes"""
+
+    cutoff: datetime = Field(
+        description="Alterações anteriores a esta data foram removidas."
+    )
+    dropped_partitions: List[str] = Field(
+        default_factory=list, description="Partições removidas."
+    )
+    created_partitions: List[str] = Field(
+        default_factory=list, description="Partições criadas."
+    )
+    deleted: int = Field(
+        default=0, description="Alterações removidas da partição padrão."
+    )
+
+
 class DatabaseProviderBaseModel(BaseModel): ...
 
 
@@ -1311,6 +1470,12 @@ class DatabaseProviderIngestionCreateSchema(DatabaseProviderIngestionBaseModel):
     apply_semantic_analysis: bool = Field(
         default=False, description="Aplicar análise semântica nas colunas"
     )
+    max_workers: int = Field(
+        default=1,
+        ge=1,
+        le=MAX_INGESTION_WORKERS,
+        description="Número máximo de tarefas de coleta executadas em paralelo (1 = sequencial)",
+    )
 
     # Associations
     provider_id: UUID
@@ -1372,6 +1537,12 @@ class DatabaseProviderIngestionUpdateSchema(DatabaseProviderIngestionBaseModel):
     apply_semantic_analysis: Optional[bool] = Field(
         default=None, description="Aplicar análise semântica nas colunas"
     )
+    max_workers: Optional[int] = Field(
+        default=None,
+        ge=1,
+        le=MAX_INGESTION_WORKERS,
+        description="Número máximo de tarefas de coleta executadas em paralelo (1 = sequencial)",
+    )
 
     # Associations
     provider_id: Optional[UUID] = Field(default=None)
@@ -1434,6 +1605,14 @@ class DatabaseProviderIngestionItemSchema(DatabaseProviderIngestionBaseModel):
     apply_semantic_analysis: bool = Field(
         default=False, description="Aplicar análise semântica nas colunas"
     )
+    max_workers: int = Field(
+        default=1,
+        ge=1,
+        description="Número máximo de tarefas de coleta executadas em paralelo (1 = sequencial)",
+    )
+    next_run_at: Optional[datetime] = Field(
+        default=None, description="Próxima execução agendada"
+    )
 
     # Associations
     provider_id: UUID
@@ -1496,6 +1675,14 @@ class DatabaseProviderIngestionListSchema(DatabaseProviderIngestionBaseModel):
     apply_semantic_analysis: Optional[bool] = Field(
         default=None, description="Aplicar análise semântica nas colunas"
     )
+    max_workers: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="Número máximo de tarefas de coleta executadas em paralelo (1 = sequencial)",
+    )
+    next_run_at: Optional[datetime] = Field(
+        default=None, description="Próxima execução agendada"
+    )
 
     # Extra fields
     provider_id: Optional[UUID] = Field(default=None)  # type: ignore
@@ -1530,8 +1717,15 @@ class DatabaseProviderIngestionExecutionCreateSchema(
         default=None, description="Data/hora de finalização da execução"
     )
     trigger_mode: str = Field(description="Como a execução foi disparada")
+    dry_run: bool = Field(
+        default=False,
+        description="Execução apenas de planejamento (nada é gravado)",
+    )
 
     # Associations
+    resumed_from_id: Optional[int] = Field(
+        default=None, description="Execução retomada por esta execução"
+    )
     triggered_by_id: Optional[UUID] = Field(default=None)
     ingestion_id: UUID
     logs: Optional[List["DatabaseProviderIngestionLogCreateSchema"]] = None
@@ -1560,8 +1754,21 @@ class DatabaseProviderIngestionExecutionUpdateSchema(
     trigger_mode: Optional[str] = Field(
         default=None, description="Como a execução foi disparada"
     )
+    dry_run: Optional[bool] = Field(
+        default=None,
+        description="Execução apenas de planejamento (nada é gravado)",
+    )
+    plan: Optional["DatabaseProviderIngestionPlanSchema"] = Field(
+        default=None, description="Plano da ingestão (execução de planejamento)"
+    )
+    timing: Optional["DatabaseProviderIngestionTimingSchema"] = Field(
+        default=None, description="Tempo e recursos gastos por fase da ingestão"
+    )
 
     # Associations
+    resumed_from_id: Optional[int] = Field(
+        default=None, description="Execução retomada por esta execução"
+    )
     triggered_by_id: Optional[UUID] = Field(default=None)
     ingestion_id: Optional[UUID] = Field(default=None)
     logs: Optional[List["DatabaseProviderIngestionLogUpdateSchema"]] = None
@@ -1587,8 +1794,21 @@ class DatabaseProviderIngestionExecutionItemSchema(
         default=None, description="Data/hora de finalização da execução"
     )
     trigger_mode: str = Field(description="Como a execução foi disparada")
+    dry_run: bool = Field(
+        default=False,
+        description="Execução apenas de planejamento (nada é gravado)",
+    )
+    plan: Optional["DatabaseProviderIngestionPlanSchema"] = Field(
+        default=None, description="Plano da ingestão (execução de planejamento)"
+    )
+    timing: Optional["DatabaseProviderIngestionTimingSchema"] = Field(
+        default=None, description="Tempo e recursos gastos por fase da ingestão"
+    )
 
     # Associations
+    resumed_from_id: Optional[int] = Field(
+        default=None, description="Execução retomada por esta execução"
+    )
     triggered_by: Optional["UserListSchema"] = Field(default=None)
     ingestion: "DatabaseProviderIngestionItemSchema"
 
@@ -1617,8 +1837,18 @@ class DatabaseProviderIngestionExecutionListSchema(
     trigger_mode: Optional[str] = Field(
         default=None, description="Como a execução foi disparada"
     )
+    dry_run: Optional[bool] = Field(
+        default=None,
+        description="Execução apenas de planejamento (nada é gravado)",
+    )
+    timing: Optional["DatabaseProviderIngestionTimingSchema"] = Field(
+        default=None, description="Tempo e recursos gastos por fase da ingestão"
+    )
 
     # Associations
+    resumed_from_id: Optional[int] = Field(
+        default=None, description="Execução retomada por esta execução"
+    )
     triggered_by: Optional["UserListSchema"] = Field(default=None)
     ingestion: Optional["DatabaseProviderIngestionListSchema"] = Field(
         default=None
@@ -1638,6 +1868,129 @@ class DatabaseProviderIngestionExecutionQuerySchema(BaseQuerySchema):
     ...
 
 
+class DatabaseProviderIngestionPlanItemSchema(BaseModel):
+    """Plan of the tables of a schema (or of a database, if the provider
+    does not support schemas)"""
+
+    database: str = Field(description="Nome do banco de dados")
+    schema_name: Optional[str] = Field(
+        default=None, description="Nome do esquema"
+    )
+    exists: bool = Field(
+        description="O esquema (ou banco de dados) já existe no catálogo"
+    )
+    tables: int = Field(default=0, description="Tabelas selecionadas")
+    create: int = Field(default=0, description="Tabelas a serem criadas")
+    update: int = Field(
+        default=0,
+        description="Tabelas já catalogadas (atualizadas se foram alteradas)",
+    )
+    disable: int = Field(default=0, description="Tabelas a serem desabilitadas")
+
+
+class DatabaseProviderIngestionPlanSchema(BaseModel):
+    """Plan of an ingestion: objects selected by the rules, changes to the
+    catalog and estimated cost of the execution"""
+
+    databases: int = Field(default=0, description="Bancos de dados selecionados")
+    databases_create: int = Field(
+        default=0, description="Bancos de dados a serem criados"
+    )
+    databases_ignored: List[str] = Field(
+        default=[], description="Bancos de dados ignorados pelas regras"
+    )
+    schemas: int = Field(default=0, description="Esquemas selecionados")
+    schemas_create: int = Field(default=0, description="Esquemas a serem criados")
+    schemas_ignored: int = Field(
+        default=0, description="Esquemas ignorados pelas regras"
+    )
+    tables: int = Field(default=0, description="Tabelas selecionadas")
+    tables_create: int = Field(default=0, description="Tabelas a serem criadas")
+    tables_update: int = Field(
+        default=0,
+        description="Tabelas já catalogadas (atualizadas se foram alteradas)",
+    )
+    tables_disable: int = Field(
+        default=0, description="Tabelas a serem desabilitadas"
+    )
+    max_workers: int = Field(default=1, description="Paralelismo da coleta")
+    api_calls: int = Field(
+        default=0, description="Estimativa de chamadas à API do catálogo"
+    )
+    source_queries: int = Field(
+        default=0, description="Estimativa de consultas à fonte de dados"
+    )
+    sampled_tables: int = Field(
+        default=0, description="Tabelas cujas amostras serão coletadas"
+    )
+    sampled_rows: int = Field(
+        default=0, description="Estimativa de linhas lidas nas amostras"
+    )
+    items: List[DatabaseProviderIngestionPlanItemSchema] = Field(
+        default=[], description="Plano por esquema (ou banco de dados)"
+    )
+
+
+class DatabaseProviderIngestionPhaseSchema(BaseModel):
+    """Time spent and objects processed by a phase of an ingestion"""
+
+    name: str = Field(description="Nome da fase")
+    calls: int = Field(default=0, description="Número de execuções da fase")
+    total_time: float = Field(
+        default=0.0,
+        description="Tempo total, em segundos (somado entre as tarefas paralelas)",
+    )
+    max_time: float = Field(
+        default=0.0, description="Maior tempo de uma execução, em segundos"
+    )
+    items: int = Field(default=0, description="Objetos lidos ou processados")
+    created: int = Field(default=0, description="Objetos criados")
+    updated: int = Field(default=0, description="Objetos atualizados")
+    skipped: int = Field(
+        default=0, description="Objetos inalterados (não enviados)"
+    )
+    disabled: int = Field(default=0, description="Objetos desabilitados")
+    peak_rss: Optional[float] = Field(
+        default=None,
+        description="Pico de memória residente do processo, em MB, ao fim da fase",
+    )
+
+
+class DatabaseProviderIngestionTimingSchema(BaseModel):
+    """Time and resources spent by an ingestion, by phase"""
+
+    elapsed: float = Field(
+        default=0.0, description="Duração da coleta, em segundos"
+    )
+    peak_rss: Optional[float] = Field(
+        default=None, description="Pico de memória residente do processo, em MB"
+    )
+    phases: List[DatabaseProviderIngestionPhaseSchema] = Field(
+        default=[], description="Tempo e objetos por fase"
+    )
+
+
+class DatabaseProviderIngestionCheckpointCreateSchema(BaseModel):
+    """JSON serialization schema for creating an instance"""
+
+    scope: str = Field(
+        description="Nome completo do banco de dados ou esquema concluído."
+    )
+
+
+class DatabaseProviderIngestionCheckpointItemSchema(BaseModel):
+    """JSON serialization schema for serializing a single object"""
+
+    id: int
+    scope: str = Field(
+        description="Nome completo do banco de dados ou esquema concluído."
+    )
+    created_at: datetime = Field(description="Data de criação.")
+    execution_id: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+
 class DatabaseProviderIngestionLogBaseModel(BaseModel): ...
 
 
@@ -1646,6 +1999,7 @@ class DatabaseProviderIngestionLogCreateSchema(
 ):
     """JSON serialization schema for creating an instance"""
 
+    seq: int = Field(description="Ordem do trecho no log da execução")
     updated_at: Optional[datetime] = Field(
         default=None, description="Última hora de atualização."
     )
@@ -1664,6 +2018,9 @@ class DatabaseProviderIngestionLogUpdateSchema(
 ):
     """Optional model for serialization of updating objects"""
 
+    seq: Optional[int] = Field(
+        default=None, description="Ordem do trecho no log da execução"
+    )
     updated_at: Optional[datetime] = Field(
         default=None, description="Última hora de atualização."
     )
@@ -1683,6 +2040,7 @@ class DatabaseProviderIngestionLogItemSchema(
     """JSON serialization schema for serializing a single object"""
 
     id: int
+    seq: int = Field(description="Ordem do trecho no log da execução")
     updated_at: Optional[datetime] = Field(
         default=None, description="Última hora de atualização."
     )
@@ -1701,6 +2059,9 @@ class DatabaseProviderIngestionLogListSchema(
     """JSON serialization schema for serializing a list of objects"""
 
     id: Optional[int] = None
+    seq: Optional[int] = Field(
+        default=None, description="Ordem do trecho no log da execução"
+    )
     updated_at: Optional[datetime] = Field(
         default=None, description="Última hora de atualização."
     )
@@ -1785,6 +2146,11 @@ class DatabaseQuerySchema(BaseQuerySchema):
     deleted: Optional[bool] = Field(
         default=None, description="Incluir deletados"
     )
+    stream: Optional[bool] = Field(
+        default=None,
+        description="Quando true, retorna todas as instâncias, sem paginação, "
+        "em formato NDJSON (uma instância por linha).",
+    )
     ...
 
 
@@ -1837,6 +2203,11 @@ class DatabaseSchemaQuerySchema(BaseQuerySchema):
     database_id: Optional[UUID] = Field(default=None, description="Database")
     layer_id: Optional[UUID] = Field(default=None, description="Camada")
     query: Optional[str] = Field(default=None, description="Consulta")
+    stream: Optional[bool] = Field(
+        default=None,
+        description="Quando true, retorna todas as instâncias, sem paginação, "
+        "em formato NDJSON (uma instância por linha).",
+    )
     ...
 
 
@@ -1959,9 +2330,47 @@ class DatabaseTableQuerySchema(BaseQuerySchema):
         default=None, description="Incluir deletados"
     )
     query: Optional[str] = Field(default=None, description="Consulta")
+    stream: Optional[bool] = Field(
+        default=None,
+        description="Quando true, retorna todas as instâncias, sem paginação, "
+        "em formato NDJSON (uma instância por linha).",
+    )
     ...
 
 
+class DatabaseTableFingerprintSchema(DatabaseTableBaseModel):
+    """JSON serialization schema for the fingerprint of the metadata"""
+
+    id: UUID
+    fully_qualified_name: str = Field(
+        description="Nome que identifica exclusivamente a instância."
+    )
+    fingerprint: Optional[str] = Field(
+        default=None,
+        description="Hash dos metadados obtidos na origem, usado para identificar alterações.",
+    )
+    deleted: bool = Field(
+        default=False,
+        description="Quando true, indica que a entidade foi excluída temporariamente. Padrão: False.",
+    )
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class DatabaseTableBulkItemSchema(DatabaseTableBaseModel):
+    """JSON serialization schema for the result of a bulk upsert"""
+
+    id: UUID
+    fully_qualified_name: str = Field(
+        description="Nome que identifica exclusivamente a instância."
+    )
+    created: bool = Field(
+        default=False, description="Indica se a instância foi criada."
+    )
+
+    model_config = ConfigDict(from_attributes=True)
+
+
 class DatabaseTableSampleBaseModel(BaseModel): ...
 
 
@@ -2189,6 +2598,31 @@ class TableColumnItemSchema(TableColumnBaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class TableColumnChangeSchema(TableColumnUpdateSchema):
+    """Changed fields of a column, identified by its name"""
+
+    name: str = Field(description="Nome da coluna alterada.")
+
+
+class DatabaseTableChangeSetSchema(BaseModel):
+    """Changes of a table: only the changed fields of the table and of its
+    columns are informed"""
+
+    fields: DatabaseTableUpdateSchema = Field(
+        default_factory=DatabaseTableUpdateSchema,
+        description="Campos alterados da tabela (exceto colunas).",
+    )
+    added_columns: List[TableColumnCreateSchema] = Field(
+        default=[], description="Colunas adicionadas."
+    )
+    modified_columns: List[TableColumnChangeSchema] = Field(
+        default=[], description="Campos alterados das colunas."
+    )
+    removed_columns: List[str] = Field(
+        default=[], description="Nomes das colunas removidas."
+    )
+
+
 class AIModelBaseModel(BaseModel): ...
 
 
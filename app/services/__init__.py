@@ -9,6 +9,9 @@ from app.schemas import BaseQuerySchema
 
 T = typing.TypeVar('T', bound='Base')
 
+# Number of rows fetched at a time by server-side cursors.
+STREAM_BATCH_SIZE = 1000
+
 class BaseService:
     def __init__(self, entity_type, session: AsyncSession):
         self.entity_type = entity_type
@@ -0,0 +1,282 @@
+import datetime
+import logging
+import math
+import os
+import typing
+from uuid import UUID
+
+from sqlalchemy import and_, desc, func, insert, text
+
+from ..utils.decorators import handle_db_exceptions
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from ..schemas import (
+    PaginatedSchema,
+    AssetChangeCreateSchema,
+    AssetChangeFeedQuerySchema,
+    AssetChangeFeedSchema,
+    AssetChangeItemSchema,
+    AssetChangeQuerySchema,
+    AssetChangeRetentionSchema,
+)
+from ..models import Asset, AssetChange, utc_now
+from . import BaseService
+
+log = logging.getLogger(__name__)
+# region Protected\s*
+# Days the changes are kept, if ASSET_CHANGE_RETENTION_DAYS is not defined.
+DEFAULT_RETENTION_DAYS = 90
+
+# Monthly partitions created ahead of the current month.
+PARTITIONS_AHEAD = 1
+
+# Max number of changes returned by a page of the feed.
+MAX_FEED_LIMIT = 1000
+
+# Changes are partitioned by month: tb_asset_change_pYYYYMM holds the
+# changes of the month and tb_asset_change_default the ones of months
+# without a partition.
+_TABLE = AssetChange.__tablename__
+_DEFAULT_PARTITION = f"{_TABLE}_default"
+_PARTITION_PREFIX = f"{_TABLE}_p"
+
+
+def _add_months(value: datetime.date, months: int) -> datetime.date:
+    """Return the first day of the month `months` after value."""
+    month = value.year * 12 + value.month - 1 + months
+    return datetime.date(month // 12, month % 12 + 1, 1)
+
+
+def _partition_name(month: datetime.date) -> str:
+    return f"{_PARTITION_PREFIX}{month:%Y%m}"
+
+
+def _partition_month(name: str) -> typing.Optional[datetime.date]:
+    suffix = name[len(_PARTITION_PREFIX):]
+    if not name.startswith(_PARTITION_PREFIX) or not suffix.isdigit():
+        return None
+    return datetime.date(int(suffix[:4]), int(suffix[4:]), 1)
+
+
+def get_retention_days() -> int:
+    return int(
+        os.environ.get("ASSET_CHANGE_RETENTION_DAYS") or DEFAULT_RETENTION_DAYS
+    )
+# endregion\w*
+
+
+class AssetChangeService(BaseService):
+    """Service class implementing business logic for AssetChange entities"""
+
+    def __init__(self, session: AsyncSession):
+        super().__init__(AssetChange, session)
+        self.session = session
+
+    @handle_db_exceptions("Failed to create {}")
+    async def add_many(
+        self, changes_data: typing.List[AssetChangeCreateSchema]
+    ) -> int:
+        """
+        Create many AssetChange instances using a single statement.
+        Args:
+            changes_data: The changes to be recorded.
+        Returns:
+            int: Number of changes recorded
+        """
+        if not changes_data:
+            return 0
+        now = utc_now()
+        rows = [change.model_dump() for change in changes_data]
+        for row in rows:
+            row["created_at"] = row["created_at"] or now
+        await self.session.execute(insert(AssetChange), rows)
+        return len(rows)
+
+    @handle_db_exceptions("Failed to retrieve {}")
+    async def find_by_asset(
+        self,
+        asset_id: typing.Union[UUID, str],
+        query_options: AssetChangeQuerySchema,
+    ) -> PaginatedSchema[AssetChangeItemSchema]:
+        """
+        Retrieve a paginated list of the changes of an asset, newest first.
+        Args:
+            asset_id: The ID (or FQN) of the asset.
+            query_options: Filters and page.
+        Returns:
+            PaginatedSchema[AssetChangeItemSchema]: Page of changes
+        """
+        page = max(query_options.page, 1)
+        limit = min(max(1, query_options.page_size), 100)
+        offset = (page - 1) * limit
+
+        if isinstance(asset_id, UUID):
+            asset_filter = AssetChange.asset_id == asset_id
+        else:
+            asset_filter = AssetChange.asset_id.in_(
+                select(Asset.id).where(Asset.fully_qualified_name == asset_id)
+            )
+        filters = [asset_filter] + self._get_change_filters(query_options)
+
+        query = (
+            select(AssetChange)
+            .where(and_(*filters))
+            .order_by(desc(AssetChange.id))
+        )
+        rows = (
+            (await self.session.execute(query.offset(offset).limit(limit)))
+            .scalars()
+            .all()
+        )
+        count_query = (
+            select(func.count())
+            .select_from(AssetChange)
+            .where(and_(*filters))
+        )
+        total_rows = (await self.session.execute(count_query)).scalar_one()
+
+        return PaginatedSchema[AssetChangeItemSchema](
+            page_size=limit,
+            page_count=math.ceil(total_rows / limit),
+            page=page,
+            count=total_rows,
+            items=[AssetChangeItemSchema.model_validate(row) for row in rows],
+        )
+
+    @handle_db_exceptions("Failed to retrieve {}")
+    async def feed(
+        self, query_options: AssetChangeFeedQuerySchema
+    ) -> AssetChangeFeedSchema:
+        """
+        Retrieve the changes in the order they were recorded, using keyset
+        pagination: the next page starts after the cursor of the previous
+        one, so reading a page costs the same wherever it is in the feed.
+        Args:
+            query_options: Filters, cursor and size of the page.
+        Returns:
+            AssetChangeFeedSchema: Page of changes and the next cursor
+        """
+        limit = min(max(1, query_options.limit), MAX_FEED_LIMIT)
+        filters = self._get_change_filters(query_options)
+        if query_options.provider_id is not None:
+            filters.append(AssetChange.provider_id == query_options.provider_id)
+        if query_options.after is not None:
+            filters.append(AssetChange.id > query_options.after)
+
+        query = select(AssetChange).order_by(AssetChange.id).limit(limit)
+        if filters:
+            query = query.where(and_(*filters))
+        rows = (await self.session.execute(query)).scalars().all()
+        items = [AssetChangeItemSchema.model_validate(row) for row in rows]
+        # An empty page keeps the cursor, so the feed can be polled for the
+        # changes recorded later.
+        return AssetChangeFeedSchema(
+            items=items,
+            next_cursor=items[-1].id if items else query_options.after,
+        )
+
+    @staticmethod
+    def _get_change_filters(
+        query_options: typing.Union[
+            AssetChangeQuerySchema, AssetChangeFeedQuerySchema
+        ],
+    ) -> typing.List:
+        filters = []
+        if query_options.kind is not None:
+            filters.append(AssetChange.kind == query_options.kind)
+        if getattr(query_options, "field", None) is not None:
+            filters.append(AssetChange.field == query_options.field)
+        if query_options.execution_id is not None:
+            filters.append(
+                AssetChange.execution_id == query_options.execution_id
+            )
+        if query_options.since is not None:
+            filters.append(AssetChange.created_at >= query_options.since)
+        if query_options.until is not None:
+            filters.append(AssetChange.created_at < query_options.until)
+        return filters
+
+    @handle_db_exceptions("Failed to apply retention to {}")
+    async def apply_retention(
+        self,
+        retention_days: typing.Optional[int] = None,
+        now: typing.Optional[datetime.datetime] = None,
+    ) -> AssetChangeRetentionSchema:
+        """
+        Remove the changes older than the retention period and prepare the
+        partitions of the next months. Partitions whose months are entirely
+        before the cutoff are dropped (instead of deleting their rows), so
+        changes are kept for, at least, the retention period.
+        Args:
+            retention_days: Days the changes are kept (default from the
+                ASSET_CHANGE_RETENTION_DAYS environment variable).
+            now: Reference date (default now).
+        Returns:
+            AssetChangeRetentionSchema: Partitions dropped and created
+        """
+        now = now or utc_now()
+        if retention_days is None:
+            retention_days = get_retention_days()
+        cutoff = now - datetime.timedelta(days=retention_days)
+        result = AssetChangeRetentionSchema(cutoff=cutoff)
+
+        partitions = (
+            await self.session.execute(
+                text(
+                    "SELECT c.relname FROM pg_inherits i "
+                    "JOIN pg_class c ON c.oid = i.inhrelid "
+                    "WHERE i.inhparent = CAST(:table AS regclass)"
+                ),
+                {"table": _TABLE},
+            )
+        ).scalars().all()
+
+        for name in sorted(partitions):
+            month = _partition_month(name)
+            if month is not None and _add_months(month, 1) <= cutoff.date():
+                await self.session.execute(text(f"DROP TABLE {name}"))
+                result.dropped_partitions.append(name)
+
+        current_month = now.date().replace(day=1)
+        for months in range(PARTITIONS_AHEAD + 1):
+            month = _add_months(current_month, months)
+            name = _partition_name(month)
+            if name not in partitions:
+                await self._create_partition(name, month)
+                result.created_partitions.append(name)
+
+        deleted = await self.session.execute(
+            text(
+                f"DELETE FROM {_DEFAULT_PARTITION} WHERE created_at < :cutoff"
+            ),
+            {"cutoff": cutoff},
+        )
+        result.deleted = deleted.rowcount
+        return result
+
+    async def _create_partition(self, name: str, month: datetime.date):
+        """Create the partition of a month, moving its changes already
+        written to the default partition (a partition can not be attached
+        while the default one has rows of its range)."""
+        start, end = month, _add_months(month, 1)
+        await self.session.execute(
+            text(f"CREATE TABLE {name} (LIKE {_TABLE} INCLUDING DEFAULTS)")
+        )
+        await self.session.execute(
+            text(
+                f"WITH moved AS (DELETE FROM {_DEFAULT_PARTITION} "
+                "WHERE created_at >= :start AND created_at < :end "
+                f"RETURNING *) INSERT INTO {name} SELECT * FROM moved"
+            ),
+            {
+                "start": datetime.datetime.combine(start, datetime.time()),
+                "end": datetime.datetime.combine(end, datetime.time()),
+            },
+        )
+        await self.session.execute(
+            text(
+                f"ALTER TABLE {_TABLE} ATTACH PARTITION {name} "
+                f"FOR VALUES FROM ('{start}') TO ('{end}')"
+            )
+        )
@@ -0,0 +1,96 @@
+import logging
+from sqlalchemy import String, bindparam, exists, func, update
+
+import app.exceptions as ex
+from ..utils.decorators import handle_db_exceptions
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from ..schemas import (
+    AssetReconcileResultSchema,
+    AssetReconcileSchema,
+)
+from ..models import Asset, Database, DatabaseTable
+from . import BaseService
+
+log = logging.getLogger(__name__)
+# region Protected\s*
+# Column that links the children to the parent, by scope of reconciliation.
+# Providers contain databases; databases and schemas contain tables.
+_RECONCILE_SCOPES = {
+    "provider_id": Database.__table__.c.provider_id,
+    "database_id": DatabaseTable.__table__.c.database_id,
+    "database_schema_id": DatabaseTable.__table__.c.database_schema_id,
+}
+# endregion\w*
+
+
+class AssetService(BaseService):
+    """Service class implementing business logic common to all Asset
+    entities"""
+
+    def __init__(self, session: AsyncSession):
+        super().__init__(Asset, session)
+        self.session = session
+
+    @handle_db_exceptions("Failed to reconcile {}")
+    async def reconcile(
+        self, reconcile_data: AssetReconcileSchema
+    ) -> AssetReconcileResultSchema:
+        """
+        Disable the assets of the scope (a provider, a database or a schema)
+        whose fully qualified name is not in the list of assets found in the
+        source. A single UPDATE, with an anti-join against the names (sent
+        as an array), is executed.
+
+        Args:
+            reconcile_data: Scope and names of the assets found.
+        Returns:
+            AssetReconcileResultSchema: Names and ids of the disabled assets.
+        """
+        scopes = [
+            (column, getattr(reconcile_data, name))
+            for name, column in _RECONCILE_SCOPES.items()
+            if getattr(reconcile_data, name) is not None
+        ]
+        if len(scopes) != 1:
+            raise ex.ValidationException(
+                "Exactly one of provider_id, database_id or "
+                "database_schema_id must be informed."
+            )
+        column, scope_id = scopes[0]
+
+        seen = (
+            func.unnest(
+                bindparam(
+                    "fully_qualified_names",
+                    reconcile_data.fully_qualified_names,
+                    type_=ARRAY(String),
+                )
+            )
+            .table_valued("fully_qualified_name", name="seen")
+            .render_derived()
+        )
+        asset = Asset.__table__
+        stmt = (
+            update(asset)
+            .where(asset.c.id == column.table.c.id)
+            .where(column == scope_id)
+            .where(asset.c.deleted.is_(False))
+            .where(
+                ~exists(
+                    select(1).where(
+                        seen.c.fully_qualified_name
+                        == asset.c.fully_qualified_name
+                    )
+                )
+            )
+            .values(deleted=True)
+            .returning(asset.c.name, asset.c.id)
+        )
+        disabled = sorted((await self.session.execute(stmt)).all())
+        return AssetReconcileResultSchema(
+            disabled=[name for name, _ in disabled],
+            disabled_ids=[id for _, id in disabled],
+        )
@@ -1,27 +1,46 @@
+import json
 import logging
 import math
 import typing
-from sqlalchemy import asc, desc, and_, func
+from uuid import UUID
+from sqlalchemy import asc, desc, and_, func, insert, literal
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 import app.exceptions as ex
 from ..utils.decorators import handle_db_exceptions
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from sqlalchemy.future import select
+from pgqueuer import AsyncpgDriver, Queries
 
 from ..schemas import (
     PaginatedSchema,
+    DatabaseProviderIngestionCheckpointCreateSchema,
+    DatabaseProviderIngestionCheckpointItemSchema,
     DatabaseProviderIngestionExecutionCreateSchema,
     DatabaseProviderIngestionExecutionUpdateSchema,
     DatabaseProviderIngestionExecutionItemSchema,
     DatabaseProviderIngestionExecutionListSchema,
     DatabaseProviderIngestionExecutionQuerySchema,
 )
-from ..models import DatabaseProviderIngestionExecution
+from ..models import (
+    DatabaseProviderIngestionCheckpoint,
+    DatabaseProviderIngestionExecution,
+    DatabaseProviderIngestionLog,
+    utc_now,
+)
 from . import BaseService
 
 log = logging.getLogger(__name__)
 # region Protected\s*
+# Status of the executions that can be resumed.
+RESUMABLE_STATUS = "error"
+
+# Status of the finished executions (the others are still running).
+FINISHED_STATUSES = ("success", RESUMABLE_STATUS)
+
+# Job of the worker that runs the ingestions.
+START_INGESTION_JOB = "start_ingestion"
 # endregion\w*
 
 
@@ -222,6 +241,201 @@ class DatabaseProviderIngestionExecutionService(BaseService):
         else:
             return None
 
+    @handle_db_exceptions("Failed to retrieve {}")
+    async def get_checkpoints(
+        self, database_provider_ingestion_execution_id: int
+    ) -> typing.List[DatabaseProviderIngestionCheckpointItemSchema]:
+        """
+        Retrieve the scopes (databases and schemas) already completed by a
+        DatabaseProviderIngestionExecution instance.
+        Args:
+            database_provider_ingestion_execution_id: The ID of the execution.
+        Returns:
+            List[DatabaseProviderIngestionCheckpointItemSchema]: Checkpoints
+        """
+        result = await self.session.execute(
+            select(DatabaseProviderIngestionCheckpoint)
+            .where(
+                DatabaseProviderIngestionCheckpoint.execution_id
+                == database_provider_ingestion_execution_id
+            )
+            .order_by(DatabaseProviderIngestionCheckpoint.id)
+        )
+        return [
+            DatabaseProviderIngestionCheckpointItemSchema.model_validate(row)
+            for row in result.scalars().all()
+        ]
+
+    @handle_db_exceptions("Failed to retrieve {}")
+    async def get_log(
+        self, database_provider_ingestion_execution_id: int
+    ) -> str:
+        """
+        Retrieve the log of a DatabaseProviderIngestionExecution instance:
+        its chunks, concatenated in the order they were written.
+        Args:
+            database_provider_ingestion_execution_id: The ID of the execution.
+        Returns:
+            str: The log of the execution
+        """
+        result = await self.session.execute(
+            select(DatabaseProviderIngestionLog.log)
+            .where(
+                DatabaseProviderIngestionLog.execution_id
+                == database_provider_ingestion_execution_id
+            )
+            .order_by(DatabaseProviderIngestionLog.seq)
+        )
+        return "\n".join(chunk for chunk in result.scalars() if chunk)
+
+    @handle_db_exceptions("Failed to create {}")
+    async def add_checkpoint(
+        self,
+        database_provider_ingestion_execution_id: int,
+        checkpoint_data: DatabaseProviderIngestionCheckpointCreateSchema,
+    ) -> None:
+        """
+        Record a scope as completed by a DatabaseProviderIngestionExecution
+        instance. Recording the same scope again has no effect.
+        Args:
+            database_provider_ingestion_execution_id: The ID of the execution.
+            checkpoint_data: The completed scope.
+        """
+        await self.session.execute(
+            pg_insert(DatabaseProviderIngestionCheckpoint)
+            .values(
+                execution_id=database_provider_ingestion_execution_id,
+                scope=checkpoint_data.scope,
+                created_at=utc_now(),
+            )
+            .on_conflict_do_nothing(
+                index_elements=["execution_id", "scope"]
+            )
+        )
+
+    @handle_db_exceptions("Failed to start {}")
+    async def start(
+        self,
+        ingestion_id: UUID,
+        mode: str = "full",
+        trigger_mode: str = "manual",
+    ) -> DatabaseProviderIngestionExecution:
+        """
+        Create an execution of the ingestion and enqueue its job (the
+        caller must commit the session). The job is enqueued in the
+        transaction of the session, so workers only see it once the
+        execution is committed, and a rollback discards both.
+        Args:
+            ingestion_id: The ID of the ingestion.
+            mode: full, resume (continue the last execution, which must
+                have failed) or plan (dry run).
+            trigger_mode: manual or scheduled.
+        Returns:
+            DatabaseProviderIngestionExecution: The new execution
+        """
+        execution = DatabaseProviderIngestionExecution(
+            status="preparing",
+            trigger_mode=trigger_mode,
+            triggered_by=None,  # FIXME
+            ingestion_id=ingestion_id,
+            dry_run=mode == "plan",
+        )
+        self.session.add(execution)
+        await self.session.flush()
+        if mode == "resume":
+            await self.resume(execution.id)
+        queries = await self._get_queries()
+        job_ids = await queries.enqueue(
+            START_INGESTION_JOB,
+            payload=json.dumps(
+                {
+                    "ingestion": str(ingestion_id),
+                    "execution": str(execution.id),
+                }
+            ).encode(),
+        )
+        execution.job_id = job_ids[0]
+        await self.session.flush()
+        return execution
+
+    @handle_db_exceptions("Failed to resume {}")
+    async def resume(
+        self, database_provider_ingestion_execution_id: int
+    ) -> int:
+        """
+        Make a new execution continue the last execution of the same
+        ingestion (plan executions are not considered), which must have
+        failed: the execution is linked to the previous one and inherits its
+        checkpoints, so the completed scopes are skipped.
+        Args:
+            database_provider_ingestion_execution_id: The ID of the new execution.
+        Returns:
+            int: The ID of the resumed execution.
+        Raises:
+            ValidationException: If an execution of the ingestion is still
+                running, or if its last execution did not fail.
+        """
+        execution = await self._get(database_provider_ingestion_execution_id)
+        if not execution:
+            raise ex.EntityNotFoundException(
+                "DatabaseProviderIngestionExecution",
+                database_provider_ingestion_execution_id,
+            )
+        previous_executions = select(
+            DatabaseProviderIngestionExecution.id,
+            DatabaseProviderIngestionExecution.status,
+        ).where(
+            DatabaseProviderIngestionExecution.ingestion_id
+            == execution.ingestion_id,
+            DatabaseProviderIngestionExecution.id < execution.id,
+            DatabaseProviderIngestionExecution.dry_run.is_(False),
+        )
+        running = (
+            await self.session.execute(
+                previous_executions.where(
+                    DatabaseProviderIngestionExecution.status.not_in(
+                        FINISHED_STATUSES
+                    )
+                ).limit(1)
+            )
+        ).first()
+        if running is not None:
+            raise ex.ValidationException(
+                f"The execution {running.id} of the ingestion is still "
+                "running, it can not be resumed"
+            )
+        previous = (
+            await self.session.execute(
+                previous_executions.order_by(
+                    DatabaseProviderIngestionExecution.id.desc()
+                ).limit(1)
+            )
+        ).first()
+        if previous is None or previous.status != RESUMABLE_STATUS:
+            raise ex.ValidationException(
+                "The last execution of the ingestion did not fail, there is "
+                "nothing to resume"
+            )
+
+        checkpoint = DatabaseProviderIngestionCheckpoint
+        await self.session.execute(
+            insert(checkpoint).from_select(
+                ["execution_id", "scope", "created_at"],
+                select(
+                    literal(execution.id), checkpoint.scope, checkpoint.created_at
+                ).where(checkpoint.execution_id == previous.id),
+            )
+        )
+        execution.resumed_from_id = previous.id
+        await self.session.flush()
+        return previous.id
+
+    async def _get_queries(self) -> Queries:
+        """Queue of the worker jobs, on the connection of the session."""
+        connection = await self.session.connection()
+        raw_connection = await connection.get_raw_connection()
+        return Queries(AsyncpgDriver(raw_connection.driver_connection))
+
     async def _get(
         self, database_provider_ingestion_execution_id: int
     ) -> typing.Optional[DatabaseProviderIngestionExecution]:
@@ -10,6 +10,7 @@ from sqlalchemy.future import select
 
 from ..schemas import (
     PaginatedSchema,
+    DatabaseProviderIngestionLogCreateSchema,
     DatabaseProviderIngestionLogListSchema,
     DatabaseProviderIngestionLogQuerySchema,
 )
@@ -29,6 +30,23 @@ class DatabaseProviderIngestionLogService(BaseService):
         super().__init__(DatabaseProviderIngestionLog, session)
         self.session = session
 
+    @handle_db_exceptions("Failed to create {}")
+    async def add(
+        self, log_data: DatabaseProviderIngestionLogCreateSchema
+    ) -> DatabaseProviderIngestionLogListSchema:
+        """
+        Create a new DatabaseProviderIngestionLog instance (a chunk of the
+        log of an execution).
+        Args:
+            log_data: The data for the new log entry.
+        Returns:
+            DatabaseProviderIngestionLogListSchema: The created log entry
+        """
+        log_entry = DatabaseProviderIngestionLog(**log_data.model_dump())
+        self.session.add(log_entry)
+        await self.session.flush()
+        return DatabaseProviderIngestionLogListSchema.model_validate(log_entry)
+
     @handle_db_exceptions("Failed to retrieve {}")
     async def find(
         self, query_options: DatabaseProviderIngestionLogQuerySchema
@@ -68,6 +86,12 @@ class DatabaseProviderIngestionLogService(BaseService):
                     getattr(DatabaseProviderIngestionLog, query_options.sort_by)
                 )
             )
+        else:
+            # Chunks in the order they were written
+            query = query.order_by(
+                DatabaseProviderIngestionLog.execution_id,
+                DatabaseProviderIngestionLog.seq,
+            )
         rows = (
             (await self.session.execute(query.offset(offset).limit(limit)))
             .scalars()
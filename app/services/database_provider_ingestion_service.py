@@ -1,3 +1,4 @@
+import datetime
 import logging
 import math
 import typing
@@ -18,11 +19,21 @@ from ..schemas import (
     DatabaseProviderIngestionListSchema,
     DatabaseProviderIngestionQuerySchema,
 )
-from ..models import DatabaseProviderIngestion
+from ..collector.utils.cron_utils import get_next_run, is_valid_cron
+from ..models import DatabaseProviderIngestion, SchedulingType, utc_now
 from . import BaseService
 
 log = logging.getLogger(__name__)
 # region Protected\s*
+# Fields that define when an ingestion runs.
+SCHEDULING_FIELDS = {"scheduling", "scheduling_type", "deleted"}
+
+
+def _is_scheduled(ingestion: DatabaseProviderIngestion) -> bool:
+    return (
+        ingestion.scheduling_type in (SchedulingType.CRON, "CRON")
+        and not ingestion.deleted
+    )
 # endregion\w*
 
 
@@ -50,6 +61,7 @@ class DatabaseProviderIngestionService(BaseService):
         database_provider_ingestion = DatabaseProviderIngestion(
             **database_provider_ingestion_data.model_dump(exclude_unset=True)
         )
+        self.schedule(database_provider_ingestion)
         self.session.add(database_provider_ingestion)
         await self.session.flush()
         await self.session.refresh(database_provider_ingestion)
@@ -104,10 +116,16 @@ class DatabaseProviderIngestionService(BaseService):
                 "DatabaseProviderIngestion", database_provider_ingestion_id
             )
         if database_provider_ingestion_data is not None:
-            for key, value in database_provider_ingestion_data.model_dump(
+            changes = database_provider_ingestion_data.model_dump(
                 exclude_unset=True, exclude={}
-            ).items():
+            )
+            for key, value in changes.items():
                 setattr(database_provider_ingestion, key, value)
+            # A pending run is kept unless the scheduling changed.
+            if SCHEDULING_FIELDS.intersection(changes) or (
+                database_provider_ingestion.next_run_at is None
+            ):
+                self.schedule(database_provider_ingestion)
 
         await self.session.flush()
         await self.session.refresh(database_provider_ingestion)
@@ -202,6 +220,60 @@ class DatabaseProviderIngestionService(BaseService):
         else:
             return None
 
+    @staticmethod
+    def schedule(
+        database_provider_ingestion: DatabaseProviderIngestion,
+        base: typing.Optional[datetime.datetime] = None,
+    ):
+        """
+        Set the next time the ingestion runs (next_run_at), according to its
+        scheduling: the first time its cron expression fires after base
+        (default now), or none if it is not scheduled.
+        Args:
+            database_provider_ingestion: The ingestion.
+            base: Reference date (default now).
+        """
+        if not _is_scheduled(database_provider_ingestion):
+            database_provider_ingestion.next_run_at = None
+            return
+        cron_expression = database_provider_ingestion.scheduling
+        if not is_valid_cron(cron_expression):
+            raise ex.ValidationException(
+                f"Invalid cron expression: {cron_expression}"
+            )
+        database_provider_ingestion.next_run_at = get_next_run(
+            cron_expression, base
+        )
+
+    @handle_db_exceptions("Failed to retrieve {}")
+    async def find_due(
+        self,
+        now: typing.Optional[datetime.datetime] = None,
+        limit: int = 100,
+    ) -> typing.List[DatabaseProviderIngestion]:
+        """
+        Retrieve and lock the scheduled ingestions whose next run is due. Rows
+        locked by another transaction are skipped, so concurrent schedulers
+        never start the same ingestion.
+        Args:
+            now: Reference date (default now).
+            limit: Max number of ingestions returned.
+        Returns:
+            List[DatabaseProviderIngestion]: Due ingestions
+        """
+        query = (
+            select(DatabaseProviderIngestion)
+            .where(
+                DatabaseProviderIngestion.next_run_at <= (now or utc_now()),
+                DatabaseProviderIngestion.scheduling_type == SchedulingType.CRON,
+                DatabaseProviderIngestion.deleted.is_(False),
+            )
+            .order_by(DatabaseProviderIngestion.next_run_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        return list((await self.session.execute(query)).scalars().all())
+
     async def _get(
         self, database_provider_ingestion_id: UUID
     ) -> typing.Optional[DatabaseProviderIngestion]:
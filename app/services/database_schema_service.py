@@ -19,7 +19,7 @@ from ..schemas import (
     DatabaseSchemaQuerySchema,
 )
 from ..models import DatabaseSchema
-from . import BaseService
+from . import STREAM_BATCH_SIZE, BaseService
 
 log = logging.getLogger(__name__)
 # region Protected\s*
@@ -102,22 +102,8 @@ class DatabaseSchemaService(BaseService):
         await self.session.refresh(database_schema)
         return DatabaseSchemaItemSchema.model_validate(database_schema)
 
-    @handle_db_exceptions("Failed to retrieve {}")
-    async def find(
-        self, query_options: DatabaseSchemaQuerySchema
-    ) -> PaginatedSchema[DatabaseSchemaListSchema]:
-        """
-        Retrieve a paginated, sorted list of DatabaseSchema instances.
-
-        Args:
-
-        Returns:
-            List[DatabaseSchema]: List of DatabaseSchema instances
-        """
-        page = max(query_options.page, 1)
-        limit = min(max(1, query_options.page_size), 100)
-        offset = (page - 1) * limit
-
+    def _get_find_query(self, query_options: DatabaseSchemaQuerySchema):
+        """Build the filtered and sorted query used by find() and stream()."""
         query = select(DatabaseSchema)
         filter_opts = {
             "database_id": (DatabaseSchema.database_id, "__eq__"),
@@ -143,6 +129,45 @@ class DatabaseSchemaService(BaseService):
             query = query.order_by(
                 order_func(getattr(DatabaseSchema, query_options.sort_by))
             )
+        return query
+
+    async def stream(
+        self, query_options: DatabaseSchemaQuerySchema
+    ) -> typing.AsyncIterator[DatabaseSchemaListSchema]:
+        """
+        Retrieve all DatabaseSchema instances matching the query options, without
+        pagination, using a server-side cursor.
+
+        Args:
+            query_options: Filters and sorting (page options are ignored).
+        Returns:
+            AsyncIterator[DatabaseSchemaListSchema]: DatabaseSchema instances
+        """
+        query = (
+            self._get_find_query(query_options)
+            .execution_options(yield_per=STREAM_BATCH_SIZE)
+        )
+        result = await self.session.stream_scalars(query)
+        async for row in result:
+            yield DatabaseSchemaListSchema.model_validate(row)
+
+    @handle_db_exceptions("Failed to retrieve {}")
+    async def find(
+        self, query_options: DatabaseSchemaQuerySchema
+    ) -> PaginatedSchema[DatabaseSchemaListSchema]:
+        """
+        Retrieve a paginated, sorted list of DatabaseSchema instances.
+
+        Args:
+
+        Returns:
+            List[DatabaseSchema]: List of DatabaseSchema instances
+        """
+        page = max(query_options.page, 1)
+        limit = min(max(1, query_options.page_size), 100)
+        offset = (page - 1) * limit
+
+        query = self._get_find_query(query_options)
         rows = (
             (await self.session.execute(query.offset(offset).limit(limit)))
             .scalars()
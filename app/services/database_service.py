@@ -19,7 +19,7 @@ from ..schemas import (
     DatabaseQuerySchema,
 )
 from ..models import Database
-from . import BaseService
+from . import STREAM_BATCH_SIZE, BaseService
 
 log = logging.getLogger(__name__)
 # region Protected\s*
@@ -98,22 +98,8 @@ class DatabaseService(BaseService):
         await self.session.refresh(database)
         return DatabaseItemSchema.model_validate(database)
 
-    @handle_db_exceptions("Failed to retrieve {}")
-    async def find(
-        self, query_options: DatabaseQuerySchema
-    ) -> PaginatedSchema[DatabaseListSchema]:
-        """
-        Retrieve a paginated, sorted list of Database instances.
-
-        Args:
-
-        Returns:
-            List[Database]: List of Database instances
-        """
-        page = max(query_options.page, 1)
-        limit = min(max(1, query_options.page_size), 100)
-        offset = (page - 1) * limit
-
+    def _get_find_query(self, query_options: DatabaseQuerySchema):
+        """Build the filtered and sorted query used by find() and stream()."""
         query = select(Database)
         filter_opts = {
             "provider_id": (Database.provider_id, "__eq__"),
@@ -140,6 +126,45 @@ class DatabaseService(BaseService):
             query = query.order_by(
                 order_func(getattr(Database, query_options.sort_by))
             )
+        return query
+
+    async def stream(
+        self, query_options: DatabaseQuerySchema
+    ) -> typing.AsyncIterator[DatabaseListSchema]:
+        """
+        Retrieve all Database instances matching the query options, without
+        pagination, using a server-side cursor.
+
+        Args:
+            query_options: Filters and sorting (page options are ignored).
+        Returns:
+            AsyncIterator[DatabaseListSchema]: Database instances
+        """
+        query = (
+            self._get_find_query(query_options)
+            .execution_options(yield_per=STREAM_BATCH_SIZE)
+        )
+        result = await self.session.stream_scalars(query)
+        async for row in result:
+            yield DatabaseListSchema.model_validate(row)
+
+    @handle_db_exceptions("Failed to retrieve {}")
+    async def find(
+        self, query_options: DatabaseQuerySchema
+    ) -> PaginatedSchema[DatabaseListSchema]:
+        """
+        Retrieve a paginated, sorted list of Database instances.
+
+        Args:
+
+        Returns:
+            List[Database]: List of Database instances
+        """
+        page = max(query_options.page, 1)
+        limit = min(max(1, query_options.page_size), 100)
+        offset = (page - 1) * limit
+
+        query = self._get_find_query(query_options)
         rows = (
             (await self.session.execute(query.offset(offset).limit(limit)))
             .scalars()
@@ -1,29 +1,83 @@
 import logging
 import math
 import typing
+import uuid
 from uuid import UUID
-from sqlalchemy import asc, desc, and_, func
+from sqlalchemy import (
+    asc, desc, and_, bindparam, func, literal, literal_column, text
+)
+from sqlalchemy.dialects.postgresql import ARRAY, REGCONFIG, insert as pg_insert
+from sqlalchemy.types import String, UUID as SaUUID
 
 import app.exceptions as ex
 from ..utils.decorators import handle_db_exceptions
 from ..utils.models import update_related_collection
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import lazyload, selectinload
 from sqlalchemy.future import select
 
 from ..schemas import (
     PaginatedSchema,
+    DatabaseTableBulkItemSchema,
+    DatabaseTableChangeSetSchema,
     DatabaseTableCreateSchema,
+    DatabaseTableFingerprintSchema,
     DatabaseTableUpdateSchema,
     DatabaseTableItemSchema,
     DatabaseTableListSchema,
     DatabaseTableQuerySchema,
 )
-from ..models import DatabaseTable, TableColumn
-from . import BaseService
+from ..models import Asset, Database, DatabaseTable, TableColumn, utc_now
+from . import STREAM_BATCH_SIZE, BaseService
 
 log = logging.getLogger(__name__)
 # region Protected\s*
+# Max number of rows sent in a single INSERT statement (asyncpg limits the
+# number of bind parameters per statement to 32767).
+BULK_CHUNK_SIZE = 500
+
+# Columns of tb_table_column removed from the source, for the tables in the
+# batch. Arrays keep the number of parameters constant.
+_DELETE_MISSING_COLUMNS = text("""
+    DELETE FROM tb_table_column c
+    WHERE c.table_id = ANY(:table_ids)
+    AND NOT EXISTS (
+        SELECT 1 FROM unnest(:keep_table_ids, :keep_names) AS k(table_id, name)
+        WHERE k.table_id = c.table_id AND k.name = c.name
+    )
+""").bindparams(
+    bindparam("table_ids", type_=ARRAY(SaUUID(as_uuid=True))),
+    bindparam("keep_table_ids", type_=ARRAY(SaUUID(as_uuid=True))),
+    bindparam("keep_names", type_=ARRAY(String)),
+)
+
+
+def _chunks(items: typing.List, size: int = BULK_CHUNK_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def _chunks_by_fields(
+    items: typing.List[typing.Tuple[typing.FrozenSet[str], typing.Dict]],
+):
+    """Group the rows by the fields informed in their payload, in chunks,
+    so that the upsert of a chunk only updates the fields informed in all
+    its rows."""
+    groups: typing.Dict[typing.FrozenSet[str], typing.List] = {}
+    for fields, row in items:
+        groups.setdefault(fields, []).append(row)
+    for fields, rows in groups.items():
+        for chunk in _chunks(rows):
+            yield fields, chunk
+
+
+def _search_vector(*parts):
+    """Same content indexed by the before_insert/before_update listeners
+    in models.py, which are not triggered by Core statements."""
+    return func.to_tsvector(
+        literal("portuguese", type_=REGCONFIG),
+        func.concat_ws(" ", *[func.coalesce(p, "None") for p in parts]),
+    )
 # endregion\w*
 
 
@@ -128,22 +182,263 @@ class DatabaseTableService(BaseService):
         await self.session.refresh(database_table)
         return DatabaseTableItemSchema.model_validate(database_table)
 
-    @handle_db_exceptions("Failed to retrieve {}")
-    async def find(
-        self, query_options: DatabaseTableQuerySchema
-    ) -> PaginatedSchema[DatabaseTableListSchema]:
+    @handle_db_exceptions("Failed to update {}.")
+    async def apply_changes(
+        self,
+        database_table_id: typing.Union[UUID, str],
+        change_set: DatabaseTableChangeSetSchema,
+    ) -> DatabaseTableBulkItemSchema:
         """
-        Retrieve a paginated, sorted list of DatabaseTable instances.
+        Apply a change set to a single instance of class DatabaseTable:
+        only the informed fields of the table and of the changed columns
+        (identified by name) are updated, and the columns informed are
+        added or removed. Other columns are kept. Applying the same change
+        set again has no effect.
+        Args:
+            database_table_id: The ID (or FQN) of the DatabaseTable instance.
+            change_set: The changes of the table and of its columns.
+        Returns:
+            DatabaseTableBulkItemSchema: Id of the instance
+        """
+        database_table = await self._get(database_table_id)
+        if not database_table:
+            raise ex.EntityNotFoundException("DatabaseTable", database_table_id)
+        for key, value in change_set.fields.model_dump(
+            exclude_unset=True, exclude={"columns"}
+        ).items():
+            setattr(database_table, key, value)
+
+        columns = {column.name: column for column in database_table.columns}
+        for name in change_set.removed_columns:
+            if name in columns:
+                await self.session.delete(columns.pop(name))
+        for change in change_set.modified_columns:
+            column = columns.get(change.name)
+            if column is None:
+                raise ex.ValidationException(
+                    f"Column {change.name} not found in {database_table_id}."
+                )
+            for key, value in change.model_dump(
+                exclude_unset=True, exclude={"name"}
+            ).items():
+                setattr(column, key, value)
+        for new_column in change_set.added_columns:
+            column = columns.get(new_column.name)
+            if column is None:
+                database_table.columns.append(
+                    TableColumn(**new_column.model_dump())
+                )
+            else:
+                # Already added (e.g. the change set was sent again).
+                for key, value in new_column.model_dump().items():
+                    setattr(column, key, value)
+
+        await self.session.flush()
+        return DatabaseTableBulkItemSchema(
+            id=database_table.id,
+            fully_qualified_name=database_table.fully_qualified_name,
+        )
+
+    @handle_db_exceptions("Failed to upsert {}.")
+    async def bulk_upsert(
+        self, database_tables_data: typing.List[DatabaseTableCreateSchema]
+    ) -> typing.List[DatabaseTableBulkItemSchema]:
+        """
+        Create or update many DatabaseTable instances (and their columns),
+        identified by their fully qualified name, using set-wise statements
+        (INSERT ... ON CONFLICT) instead of one flush per instance.
+        Only the fields informed in the payload are updated in existing
+        instances and columns not informed are removed, as in update().
 
         Args:
+            database_tables_data: The instances to be created or updated.
+        Returns:
+            List[DatabaseTableBulkItemSchema]: Id of each instance
+        """
+        # If the same FQN is informed more than once, the last one wins.
+        by_fqn = {t.fully_qualified_name: t for t in database_tables_data}
+        if not by_fqn:
+            return []
+
+        asset_table = Asset.__table__
+        table_table = DatabaseTable.__table__
+        column_table = TableColumn.__table__
+        immutable = {"id", "fully_qualified_name", "asset_type"}
+
+        # Fields explicitly informed in the payload of each row are the ones
+        # updated in it (rows are upserted in groups of the same fields).
+        # New instances get a new id; existing ones keep theirs, returned by
+        # the upsert of the assets (even if created concurrently).
+        asset_rows, values_by_fqn = [], {}
+        now = utc_now()
+        for fqn, data in by_fqn.items():
+            values = data.model_dump(exclude={"columns"})
+            values.update(
+                id=uuid.uuid4(),
+                asset_type="table",
+                version=values.get("version") or "0.0.0",
+                updated_at=values.get("updated_at") or now,
+            )
+            values_by_fqn[fqn] = values
+            asset_row = {
+                k: v for k, v in values.items() if k in asset_table.c
+            }
+            asset_row["search"] = _search_vector(
+                values.get("name"), values.get("description"),
+                values.get("notes"),
+            )
+            asset_rows.append((frozenset(data.model_fields_set), asset_row))
+
+        def _merged(stmt, table, field, fields):
+            # New value when informed in the payload, current one otherwise.
+            return (
+                getattr(stmt.excluded, field)
+                if field in fields
+                else table.c[field]
+            )
+
+        ids: typing.Dict[str, UUID] = {}
+        created = set()
+        for fields, rows in _chunks_by_fields(asset_rows):
+            stmt = pg_insert(asset_table).values(rows)
+            update_set = {
+                k: stmt.excluded[k]
+                for k in fields | {"updated_at"}
+                if k in asset_table.c and k not in immutable
+            }
+            update_set["search"] = _search_vector(
+                *(
+                    _merged(stmt, asset_table, f, fields)
+                    for f in ("name", "description", "notes")
+                )
+            )
+            result = await self.session.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[asset_table.c.fully_qualified_name],
+                    set_=update_set,
+                ).returning(
+                    asset_table.c.id,
+                    asset_table.c.fully_qualified_name,
+                    # Rows inserted (not updated) by the statement.
+                    literal_column("xmax = 0").label("inserted"),
+                )
+            )
+            for id, fqn, inserted in result.all():
+                ids[fqn] = id
+                if inserted:
+                    created.add(fqn)
+
+        table_rows, column_rows = [], []
+        synced_ids = []
+        for fqn, data in by_fqn.items():
+            values = values_by_fqn[fqn]
+            values["id"] = ids[fqn]
+            table_rows.append(
+                (
+                    frozenset(data.model_fields_set),
+                    {k: v for k, v in values.items() if k in table_table.c},
+                )
+            )
+            if data.columns:
+                synced_ids.append(ids[fqn])
+                for column in data.columns:
+                    column_values = column.model_dump()
+                    column_values["table_id"] = ids[fqn]
+                    column_values["id"] = uuid.uuid4()
+                    column_values["search"] = _search_vector(
+                        column.name, column.description, column.semantic_type
+                    )
+                    column_rows.append(
+                        (frozenset(column.model_fields_set), column_values)
+                    )
+
+        for fields, rows in _chunks_by_fields(table_rows):
+            stmt = pg_insert(table_table).values(rows)
+            update_set = {
+                k: stmt.excluded[k]
+                for k in fields
+                if k in table_table.c and k not in immutable
+            }
+            if update_set:
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[table_table.c.id], set_=update_set
+                )
+            else:
+                stmt = stmt.on_conflict_do_nothing()
+            await self.session.execute(stmt)
+
+        if synced_ids:
+            await self.session.execute(
+                _DELETE_MISSING_COLUMNS,
+                {
+                    "table_ids": synced_ids,
+                    "keep_table_ids": [c["table_id"] for _, c in column_rows],
+                    "keep_names": [c["name"] for _, c in column_rows],
+                },
+            )
+        for fields, rows in _chunks_by_fields(column_rows):
+            stmt = pg_insert(column_table).values(rows)
+            update_set = {
+                k: stmt.excluded[k]
+                for k in fields
+                if k in column_table.c and k not in {"id", "table_id", "name"}
+            }
+            update_set["search"] = _search_vector(
+                *(
+                    _merged(stmt, column_table, f, fields | {"name"})
+                    for f in ("name", "description", "semantic_type")
+                )
+            )
+            await self.session.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[
+                        column_table.c.table_id, column_table.c.name
+                    ],
+                    set_=update_set,
+                )
+            )
+        await self.session.flush()
+
+        return [
+            DatabaseTableBulkItemSchema(
+                id=ids[fqn], fully_qualified_name=fqn, created=fqn in created
+            )
+            for fqn in by_fqn
+        ]
+
+    async def stream_fingerprints(
+        self, provider_id: UUID
+    ) -> typing.AsyncIterator[DatabaseTableFingerprintSchema]:
+        """
+        Retrieve the metadata fingerprint of all DatabaseTable instances of
+        a provider (including the disabled ones), using a server-side cursor.
 
+        Args:
+            provider_id: Id of the DatabaseProvider.
         Returns:
-            List[DatabaseTable]: List of DatabaseTable instances
+            AsyncIterator[DatabaseTableFingerprintSchema]: Fingerprints
         """
-        page = max(query_options.page, 1)
-        limit = min(max(1, query_options.page_size), 100)
-        offset = (page - 1) * limit
+        database_table = Database.__table__
+        query = (
+            select(
+                DatabaseTable.id,
+                DatabaseTable.fully_qualified_name,
+                DatabaseTable.fingerprint,
+                DatabaseTable.deleted,
+            )
+            .join(
+                database_table,
+                database_table.c.id == DatabaseTable.database_id,
+            )
+            .where(database_table.c.provider_id == provider_id)
+            .execution_options(yield_per=STREAM_BATCH_SIZE)
+        )
+        result = await self.session.stream(query)
+        async for row in result:
+            yield DatabaseTableFingerprintSchema.model_validate(row._mapping)
 
+    def _get_find_query(self, query_options: DatabaseTableQuerySchema):
+        """Build the filtered and sorted query used by find() and stream()."""
         query = select(DatabaseTable)
         filter_opts = {
             "database_id": (DatabaseTable.database_id, "__eq__"),
@@ -171,6 +466,48 @@ class DatabaseTableService(BaseService):
             query = query.order_by(
                 order_func(getattr(DatabaseTable, query_options.sort_by))
             )
+        return query
+
+    async def stream(
+        self, query_options: DatabaseTableQuerySchema
+    ) -> typing.AsyncIterator[DatabaseTableListSchema]:
+        """
+        Retrieve all DatabaseTable instances matching the query options, without
+        pagination, using a server-side cursor.
+
+        Args:
+            query_options: Filters and sorting (page options are ignored).
+        Returns:
+            AsyncIterator[DatabaseTableListSchema]: DatabaseTable instances
+        """
+        query = (
+            self._get_find_query(query_options)
+            # Columns are not part of the list schema and joined eager
+            # loading of collections does not work with yield_per.
+            .options(lazyload(DatabaseTable.columns))
+            .execution_options(yield_per=STREAM_BATCH_SIZE)
+        )
+        result = await self.session.stream_scalars(query)
+        async for row in result:
+            yield DatabaseTableListSchema.model_validate(row)
+
+    @handle_db_exceptions("Failed to retrieve {}")
+    async def find(
+        self, query_options: DatabaseTableQuerySchema
+    ) -> PaginatedSchema[DatabaseTableListSchema]:
+        """
+        Retrieve a paginated, sorted list of DatabaseTable instances.
+
+        Args:
+
+        Returns:
+            List[DatabaseTable]: List of DatabaseTable instances
+        """
+        page = max(query_options.page, 1)
+        limit = min(max(1, query_options.page_size), 100)
+        offset = (page - 1) * limit
+
+        query = self._get_find_query(query_options)
         rows = (
             (await self.session.execute(query.offset(offset).limit(limit)))
             .scalars()
@@ -0,0 +1,231 @@
+# Runtime metrics of the API, exposed in the Prometheus text format.
+# Metrics are updated by the HTTP middleware and by SQLAlchemy events, which
+# run in the thread of the event loop, so plain counters (without locks) are
+# used. Histograms have fixed buckets: an observation is a binary search and
+# an increment.
+import bisect
+import contextvars
+import time
+import typing
+from collections import defaultdict
+
+from sqlalchemy import event
+
+# Upper bounds (in seconds) of the buckets of the request latency.
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+# Label of the requests that do not match a route (e.g. 404).
+UNMATCHED_ROUTE = "unmatched"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """Histogram with fixed buckets (cumulative counts are computed only
+    when the metrics are rendered)."""
+
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class RequestStats:
+    """Database queries executed while handling a request."""
+
+    __slots__ = ("queries", "query_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.query_time = 0.0
+
+
+class Metrics:
+    """Registry of the metrics of the API."""
+
+    def __init__(self):
+        self.requests: typing.Dict[typing.Tuple[str, str, str], int] = (
+            defaultdict(int)
+        )
+        self.latency: typing.Dict[typing.Tuple[str, str], Histogram] = (
+            defaultdict(Histogram)
+        )
+        self.queries: typing.Dict[typing.Tuple[str, str], int] = defaultdict(
+            int
+        )
+        self.query_time: typing.Dict[typing.Tuple[str, str], float] = (
+            defaultdict(float)
+        )
+        self.in_flight = 0
+        # Engines whose pools are reported, by name.
+        self.engines: typing.Dict[str, typing.Any] = {}
+
+    def observe_request(
+        self,
+        method: str,
+        route: str,
+        status: int,
+        elapsed: float,
+        stats: RequestStats,
+    ):
+        self.requests[(method, route, str(status))] += 1
+        self.latency[(method, route)].observe(elapsed)
+        if stats.queries:
+            self.queries[(method, route)] += stats.queries
+            self.query_time[(method, route)] += stats.query_time
+
+    def render(self) -> str:
+        """Return the metrics in the Prometheus text format."""
+        lines = [
+            "# HELP http_requests_total Requests handled, by route and status.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route, status), value in list(self.requests.items()):
+            lines.append(
+                f"http_requests_total{_labels(method=method, route=route, status=status)} {value}"
+            )
+
+        lines += [
+            "# HELP http_request_duration_seconds Latency of the requests, by route.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route), histogram in list(self.latency.items()):
+            cumulative = 0
+            bounds = [str(b) for b in LATENCY_BUCKETS] + ["+Inf"]
+            for bound, count in zip(bounds, histogram.counts):
+                cumulative += count
+                lines.append(
+                    "http_request_duration_seconds_bucket"
+                    f"{_labels(method=method, route=route, le=bound)} {cumulative}"
+                )
+            labels = _labels(method=method, route=route)
+            lines.append(
+                f"http_request_duration_seconds_sum{labels} {histogram.sum}"
+            )
+            lines.append(
+                f"http_request_duration_seconds_count{labels} {histogram.count}"
+            )
+
+        lines += [
+            "# HELP http_requests_in_flight Requests being handled.",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+            "# HELP db_queries_total Database queries executed, by route.",
+            "# TYPE db_queries_total counter",
+        ]
+        for (method, route), value in list(self.queries.items()):
+            lines.append(
+                f"db_queries_total{_labels(method=method, route=route)} {value}"
+            )
+        lines += [
+            "# HELP db_query_duration_seconds_total Time spent in database queries, by route.",
+            "# TYPE db_query_duration_seconds_total counter",
+        ]
+        for (method, route), value in list(self.query_time.items()):
+            lines.append(
+                "db_query_duration_seconds_total"
+                f"{_labels(method=method, route=route)} {value}"
+            )
+
+        # QueuePool.overflow() is negative while the pool is not full.
+        pool_metrics = (
+            ("db_pool_size", "Connections kept by the pool.", "size", None),
+            ("db_pool_checked_out", "Connections in use.", "checkedout", None),
+            (
+                "db_pool_checked_in",
+                "Idle connections in the pool.",
+                "checkedin",
+                None,
+            ),
+            (
+                "db_pool_overflow",
+                "Connections opened beyond the pool size.",
+                "overflow",
+                0,
+            ),
+        )
+        for name, help_text, method, minimum in pool_metrics:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+            for engine_name, engine in self.engines.items():
+                func = getattr(engine.pool, method, None)
+                if func is None:
+                    continue
+                value = func()
+                if minimum is not None:
+                    value = max(minimum, value)
+                lines.append(f"{name}{_labels(engine=engine_name)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(**labels: str) -> str:
+    values = ",".join(
+        '{}="{}"'.format(
+            name,
+            str(value)
+            .replace("\\", "\\\\")
+            .replace('"', '\\"')
+            .replace("\n", "\\n"),
+        )
+        for name, value in labels.items()
+    )
+    return "{" + values + "}"
+
+
+metrics = Metrics()
+
+_request_stats: contextvars.ContextVar[typing.Optional[RequestStats]] = (
+    contextvars.ContextVar("request_stats", default=None)
+)
+
+
+def instrument_engine(name: str, engine):
+    """Report the pool of the (async) engine and count its queries in the
+    request being handled."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    metrics.engines[name] = sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, params, context, many):
+        context.query_start = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, params, context, many):
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.query_time += time.perf_counter() - context.query_start
+
+
+async def track_request(request, call_next):
+    """Middleware recording the count, latency and database queries of the
+    requests, by route (the path template, not the requested path)."""
+    stats = RequestStats()
+    token = _request_stats.set(stats)
+    metrics.in_flight += 1
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics.in_flight -= 1
+        _request_stats.reset(token)
+        route = request.scope.get("route")
+        metrics.observe_request(
+            request.method,
+            getattr(route, "path", UNMATCHED_ROUTE),
+            status,
+            elapsed,
+            stats,
+        )
@@ -1,6 +1,7 @@
 from fastapi import Request
 
 from .i18n import active_translation
+from .metrics import track_request
 
 
 def add_middlewares(app):
@@ -9,3 +10,6 @@ def add_middlewares(app):
         active_translation(request.headers.get("accept-language", None))
         response = await call_next(request)
         return response
+
+    # Added last, so it is the outermost middleware (whole request time).
+    app.middleware("http")(track_request)
@@ -7,9 +7,12 @@ from httpx import ASGITransport, AsyncClient
 
 from app.main import app
 from app.routers import (
+    asset_change_router,
+    asset_router,
     database_provider_router,
     database_provider_type_router,
     database_provider_ingestion_router,
+    database_provider_ingestion_execution_router,
     database_provider_connection_router,
     database_router,
     database_table_router,
@@ -19,9 +22,14 @@ from app.routers import (
     layer_router,
     tag_router,
 )
+from app.services.asset_change_service import AssetChangeService
+from app.services.asset_service import AssetService
 from app.services.database_provider_connection_service import (
     DatabaseProviderConnectionService,
 )
+from app.services.database_provider_ingestion_execution_service import (
+    DatabaseProviderIngestionExecutionService,
+)
 from app.services.database_provider_ingestion_service import (
     DatabaseProviderIngestionService,
 )
@@ -30,12 +38,41 @@ from app.services.database_provider_type_service import (
     DatabaseProviderTypeService,
 )
 from app.services.database_service import DatabaseService
+from app.services.database_table_service import DatabaseTableService
 from app.services.domain_service import DomainService
 from app.services.a_i_model_service import AIModelService
 from app.services.layer_service import LayerService
 from app.services.tag_service import TagService
 
 
+@pytest.fixture
+def mock_asset_service():
+    (mocked, original_dependency, get_service_ref) = mock_service(
+        AssetService, asset_router
+    )
+    yield mocked
+    restore_mock(original_dependency, get_service_ref)
+
+
+@pytest.fixture
+def mock_asset_change_service():
+    (mocked, original_dependency, get_service_ref) = mock_service(
+        AssetChangeService, asset_change_router
+    )
+    yield mocked
+    restore_mock(original_dependency, get_service_ref)
+
+
+@pytest.fixture
+def mock_database_provider_ingestion_execution_service():
+    (mocked, original_dependency, get_service_ref) = mock_service(
+        DatabaseProviderIngestionExecutionService,
+        database_provider_ingestion_execution_router,
+    )
+    yield mocked
+    restore_mock(original_dependency, get_service_ref)
+
+
 @pytest.fixture
 def mock_tag_service():
     (mocked, original_dependency, get_service_ref) = mock_service(
@@ -120,7 +157,7 @@ def mock_database_schema_service():
 @pytest.fixture
 def mock_database_table_service():
     (mocked, original_dependency, get_service_ref) = mock_service(
-        DatabaseService, database_table_router
+        DatabaseTableService, database_table_router
     )
     yield mocked
     restore_mock(original_dependency, get_service_ref)
@@ -0,0 +1,116 @@
+import datetime
+import uuid
+
+import pytest
+from fastapi import status
+
+from app.schemas import (
+    AssetChangeCreateSchema,
+    AssetChangeFeedSchema,
+    AssetChangeItemSchema,
+    AssetChangeRetentionSchema,
+    PaginatedSchema,
+)
+
+
+def _change(change_id, asset_id, **kwargs):
+    return AssetChangeItemSchema(
+        id=change_id,
+        created_at=datetime.datetime(2025, 2, 28),
+        kind="COLUMN_UPDATED",
+        field="id.data_type",
+        old_value="INT",
+        new_value="BIGINT",
+        asset_id=asset_id,
+        **kwargs,
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_asset_changes_feed(async_client, mock_asset_change_service):
+    """Test reading the changes of a provider after a cursor."""
+    provider_id = uuid.uuid4()
+    expected_response = AssetChangeFeedSchema(
+        items=[_change(11, uuid.uuid4(), provider_id=provider_id)],
+        next_cursor=11,
+    )
+    mock_asset_change_service.feed.return_value = expected_response
+
+    response = await async_client.get(
+        "/changes/",
+        params={"provider_id": str(provider_id), "after": 10, "limit": 1},
+    )
+
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert response.json() == expected_response.model_dump(mode="json")
+    (query_options,), _ = mock_asset_change_service.feed.call_args
+    assert query_options.provider_id == provider_id
+    assert query_options.after == 10
+    assert query_options.limit == 1
+
+
+@pytest.mark.asyncio
+async def test_add_asset_changes(async_client, mock_asset_change_service):
+    """Test recording a batch of changes."""
+    asset_id = uuid.uuid4()
+    test_data = [
+        {"asset_id": str(asset_id), "kind": "CREATED"},
+        {"asset_id": str(asset_id), "kind": "COLUMN_ADDED", "field": "email"},
+    ]
+    mock_asset_change_service.add_many.return_value = 2
+
+    response = await async_client.post("/changes/bulk", json=test_data)
+
+    assert response.status_code == status.HTTP_201_CREATED, response.text
+    assert response.json()["count"] == 2
+    mock_asset_change_service.add_many.assert_called_once_with(
+        [AssetChangeCreateSchema(**item) for item in test_data]
+    )
+
+
+@pytest.mark.asyncio
+async def test_apply_asset_changes_retention(
+    async_client, mock_asset_change_service
+):
+    """Test removing the changes older than the retention period."""
+    expected_response = AssetChangeRetentionSchema(
+        cutoff=datetime.datetime(2025, 1, 1),
+        dropped_partitions=["tb_asset_change_p202411"],
+        created_partitions=["tb_asset_change_p202504"],
+    )
+    mock_asset_change_service.apply_retention.return_value = expected_response
+
+    response = await async_client.post(
+        "/changes/retention", params={"retention_days": 30}
+    )
+
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert response.json() == expected_response.model_dump(mode="json")
+    mock_asset_change_service.apply_retention.assert_called_once_with(30)
+
+
+@pytest.mark.asyncio
+async def test_find_asset_changes(
+    async_client, mock_asset_change_service, test_uuid
+):
+    """Test getting the changes of an asset."""
+    expected_response = PaginatedSchema[AssetChangeItemSchema](
+        page=1,
+        page_size=20,
+        page_count=1,
+        count=1,
+        items=[_change(1, test_uuid)],
+    )
+    mock_asset_change_service.find_by_asset.return_value = expected_response
+
+    response = await async_client.get(
+        f"/assets/{test_uuid}/changes", params={"kind": "COLUMN_UPDATED"}
+    )
+
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert response.json() == expected_response.model_dump(mode="json")
+    (asset_id, query_options), _ = (
+        mock_asset_change_service.find_by_asset.call_args
+    )
+    assert asset_id == test_uuid
+    assert query_options.kind == "COLUMN_UPDATED"
@@ -0,0 +1,31 @@
+import uuid
+
+import pytest
+from fastapi import status
+
+from app.schemas import AssetReconcileResultSchema, AssetReconcileSchema
+
+
+@pytest.mark.asyncio
+async def test_reconcile_assets(async_client, mock_asset_service):
+    """Test disabling the assets of a scope not found in the source."""
+    database_id = uuid.uuid4()
+    test_data = {
+        "database_id": str(database_id),
+        "fully_qualified_names": ["tb.provider.db.table1"],
+    }
+    disabled_id = uuid.uuid4()
+    mock_asset_service.reconcile.return_value = AssetReconcileResultSchema(
+        disabled=["table2"], disabled_ids=[disabled_id]
+    )
+
+    response = await async_client.post("/assets/reconcile", json=test_data)
+
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert response.json() == {
+        "disabled": ["table2"],
+        "disabled_ids": [str(disabled_id)],
+    }
+    mock_asset_service.reconcile.assert_called_once_with(
+        AssetReconcileSchema(**test_data)
+    )
@@ -0,0 +1,144 @@
+import datetime
+import uuid
+
+import pytest
+from fastapi import status
+
+from app.schemas import (
+    DatabaseProviderIngestionCheckpointCreateSchema,
+    DatabaseProviderIngestionCheckpointItemSchema,
+    DatabaseProviderIngestionExecutionItemSchema,
+    DatabaseProviderIngestionExecutionUpdateSchema,
+    DatabaseProviderIngestionItemSchema,
+)
+
+
+@pytest.mark.asyncio
+async def test_get_checkpoints(
+    async_client, mock_database_provider_ingestion_execution_service
+):
+    """Test retrieving the scopes completed by an execution."""
+    mock_database_provider_ingestion_execution_service.get_checkpoints.return_value = [
+        DatabaseProviderIngestionCheckpointItemSchema(
+            id=1,
+            scope="db.provider.db1",
+            created_at=datetime.datetime(2024, 1, 1),
+            execution_id=10,
+        )
+    ]
+
+    response = await async_client.get("/executions/10/checkpoints")
+
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert [c["scope"] for c in response.json()] == ["db.provider.db1"]
+    mock_database_provider_ingestion_execution_service.get_checkpoints.assert_called_once_with(
+        10
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_execution_log(
+    async_client, mock_database_provider_ingestion_execution_service
+):
+    """Test retrieving the log of an execution."""
+    mock_database_provider_ingestion_execution_service.get_log.return_value = (
+        "line 1\nline 2"
+    )
+
+    response = await async_client.get("/executions/10/log")
+
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert response.text == "line 1\nline 2"
+    assert response.headers["content-type"].startswith("text/plain")
+    mock_database_provider_ingestion_execution_service.get_log.assert_called_once_with(
+        10
+    )
+
+
+@pytest.mark.asyncio
+async def test_add_checkpoint(
+    async_client, mock_database_provider_ingestion_execution_service
+):
+    """Test recording a scope as completed by an execution."""
+    test_data = {"scope": "schm.provider.db1.public"}
+
+    response = await async_client.post(
+        "/executions/10/checkpoints", json=test_data
+    )
+
+    assert response.status_code == status.HTTP_201_CREATED, response.text
+    mock_database_provider_ingestion_execution_service.add_checkpoint.assert_called_once_with(
+        10, DatabaseProviderIngestionCheckpointCreateSchema(**test_data)
+    )
+
+
+@pytest.mark.asyncio
+async def test_update_execution_plan(
+    async_client, mock_database_provider_ingestion_execution_service
+):
+    """Test storing the plan of a dry-run execution."""
+    test_data = {"plan": {"databases": 1, "tables": 10, "tables_create": 10}}
+    mock_database_provider_ingestion_execution_service.update.return_value = (
+        DatabaseProviderIngestionExecutionItemSchema(
+            id=10,
+            created_at=datetime.datetime(2024, 1, 1),
+            status="success",
+            trigger_mode="manual",
+            dry_run=True,
+            ingestion=DatabaseProviderIngestionItemSchema(
+                id=uuid.uuid4(),
+                name="Ingestion",
+                type="metadata",
+                provider_id=uuid.uuid4(),
+            ),
+            **test_data,
+        )
+    )
+
+    response = await async_client.patch("/executions/10", json=test_data)
+
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert response.json()["plan"]["tables_create"] == 10
+    mock_database_provider_ingestion_execution_service.update.assert_called_once_with(
+        10, DatabaseProviderIngestionExecutionUpdateSchema(**test_data)
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_execution_timing(
+    async_client, mock_database_provider_ingestion_execution_service
+):
+    """Test retrieving the time spent by an execution in each phase."""
+    timing = {
+        "elapsed": 12.5,
+        "peak_rss": 180.0,
+        "phases": [
+            {"name": "reflect", "calls": 3, "total_time": 8.0, "items": 40},
+            {"name": "api_write", "calls": 5, "created": 30, "skipped": 10},
+        ],
+    }
+    mock_database_provider_ingestion_execution_service.get.return_value = (
+        DatabaseProviderIngestionExecutionItemSchema(
+            id=10,
+            created_at=datetime.datetime(2024, 1, 1),
+            status="success",
+            trigger_mode="manual",
+            ingestion=DatabaseProviderIngestionItemSchema(
+                id=uuid.uuid4(),
+                name="Ingestion",
+                type="metadata",
+                provider_id=uuid.uuid4(),
+            ),
+            timing=timing,
+        )
+    )
+
+    response = await async_client.get("/executions/10/timing")
+
+    assert response.status_code == status.HTTP_200_OK, response.text
+    phases = {p["name"]: p for p in response.json()["phases"]}
+    assert phases["reflect"]["items"] == 40
+    assert phases["api_write"]["created"] == 30
+    mock_database_provider_ingestion_execution_service.get.assert_called_once_with(
+        10
+    )
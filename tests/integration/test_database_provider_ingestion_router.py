@@ -5,6 +5,7 @@ from datetime import datetime
 import pytest
 from fastapi import status
 
+import app.exceptions as ex
 from app.schemas import (
     DatabaseProviderIngestionItemSchema,
     DatabaseProviderIngestionListSchema,
@@ -109,6 +110,37 @@ async def test_update_database_provider_ingestion(
     mock_database_provider_ingestion_service.update.assert_called_once()
 
 
+@pytest.mark.asyncio
+async def test_update_database_provider_ingestion_invalid_cron(
+    async_client, mock_database_provider_ingestion_service, test_uuid
+):
+    """Test updating a DatabaseProviderIngestion with an invalid cron."""
+    mock_database_provider_ingestion_service.update.side_effect = (
+        ex.ValidationException("Invalid cron expression: bad")
+    )
+
+    response = await async_client.patch(
+        f"/ingestions/{test_uuid}",
+        json={"scheduling": "bad", "scheduling_type": "CRON"},
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json() == {"error": "Invalid cron expression: bad"}
+
+
+@pytest.mark.asyncio
+async def test_update_database_provider_ingestion_too_many_workers(
+    async_client, mock_database_provider_ingestion_service, test_uuid
+):
+    """Test updating a DatabaseProviderIngestion with too many workers."""
+    response = await async_client.patch(
+        f"/ingestions/{test_uuid}", json={"max_workers": 1000}
+    )
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    mock_database_provider_ingestion_service.update.assert_not_called()
+
+
 @pytest.mark.asyncio
 async def test_find_database_provider_ingestions(
     async_client, mock_database_provider_ingestion_service
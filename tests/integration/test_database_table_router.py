@@ -5,7 +5,11 @@ from datetime import datetime
 import pytest
 from fastapi import status
 
+import app.routers
+from app.routers import database_table_router
 from app.schemas import (
+    DatabaseTableBulkItemSchema,
+    DatabaseTableFingerprintSchema,
     DatabaseTableItemSchema,
     DatabaseTableListSchema,
     PaginatedSchema,
@@ -57,6 +61,126 @@ async def test_add_database_table(async_client, mock_database_table_service):
     )
 
 
+@pytest.mark.asyncio
+async def test_bulk_upsert_database_tables(
+    async_client, mock_database_table_service
+):
+    """Test creating or updating many DatabaseTable entries at once."""
+    database_id = str(uuid.uuid4())
+    test_data = [
+        {
+            "name": f"table{i}",
+            "fully_qualified_name": f"tb.provider.db.table{i}",
+            "display_name": f"table{i}",
+            "database_id": database_id,
+            "columns": [
+                {"name": "id", "display_name": "id", "data_type": "INT"}
+            ],
+        }
+        for i in range(2)
+    ]
+    expected_response = [
+        DatabaseTableBulkItemSchema(
+            id=uuid.uuid4(),
+            fully_qualified_name=item["fully_qualified_name"],
+            created=True,
+        )
+        for item in test_data
+    ]
+    mock_database_table_service.bulk_upsert.return_value = expected_response
+
+    response = await async_client.post("/tables/bulk", json=test_data)
+
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert response.json() == [
+        r.model_dump(mode="json") for r in expected_response
+    ]
+    (sent,), _ = mock_database_table_service.bulk_upsert.call_args
+    assert [t.fully_qualified_name for t in sent] == [
+        item["fully_qualified_name"] for item in test_data
+    ]
+
+
+@pytest.mark.asyncio
+async def test_stream_database_table_fingerprints(async_client, monkeypatch):
+    """Test streaming the fingerprints of the tables of a provider."""
+    provider_id = uuid.uuid4()
+    expected = [
+        DatabaseTableFingerprintSchema(
+            id=uuid.uuid4(),
+            fully_qualified_name=f"tb.provider.db.table{i}",
+            fingerprint=f"hash{i}",
+        )
+        for i in range(2)
+    ]
+
+    async def _stream(requested_provider_id):
+        assert requested_provider_id == provider_id
+        for item in expected:
+            yield item
+
+    service = AsyncMock(spec=DatabaseTableService)
+    service.stream_fingerprints = _stream
+    session = AsyncMock()
+    session.__aenter__.return_value = session
+    monkeypatch.setattr(app.routers, "AsyncSessionLocal", lambda: session)
+    monkeypatch.setattr(
+        database_table_router, "_get_service", lambda _session: service
+    )
+
+    response = await async_client.get(
+        "/tables/fingerprints", params={"provider_id": str(provider_id)}
+    )
+
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert [
+        DatabaseTableFingerprintSchema.model_validate_json(line)
+        for line in response.text.splitlines()
+    ] == expected
+
+
+@pytest.mark.asyncio
+async def test_stream_database_tables(async_client, monkeypatch):
+    """Test listing all the tables, without paging, as NDJSON."""
+    database_id = uuid.uuid4()
+    expected = [
+        DatabaseTableListSchema(
+            id=uuid.uuid4(),
+            name=f"table{i}",
+            fully_qualified_name=f"tb.provider.db.table{i}",
+            deleted=False,
+        )
+        for i in range(3)
+    ]
+
+    async def _stream(query_options):
+        assert query_options.database_id == database_id
+        for item in expected:
+            yield item
+
+    service = AsyncMock(spec=DatabaseTableService)
+    service.stream = _stream
+    session = AsyncMock()
+    session.__aenter__.return_value = session
+    monkeypatch.setattr(app.routers, "AsyncSessionLocal", lambda: session)
+    monkeypatch.setattr(
+        database_table_router, "_get_service", lambda _session: service
+    )
+
+    response = await async_client.get(
+        "/tables/",
+        params={"database_id": str(database_id), "stream": "true"},
+    )
+
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert [
+        DatabaseTableListSchema.model_validate_json(line)
+        for line in response.text.splitlines()
+    ] == expected
+
+
 @pytest.mark.asyncio
 async def test_delete_database_table(
     async_client, mock_database_table_service, test_uuid
@@ -99,6 +223,46 @@ async def test_update_database_table(
     mock_database_table_service.update.assert_called_once()
 
 
+@pytest.mark.asyncio
+async def test_apply_database_table_changes(
+    async_client, mock_database_table_service, test_uuid
+):
+    """Test applying only the changes of a DatabaseTable entry."""
+    test_data = {
+        "fields": {"version": "2.0.0", "fingerprint": "abc"},
+        "added_columns": [
+            {"name": "email", "display_name": "email", "data_type": "VARCHAR"}
+        ],
+        "modified_columns": [{"name": "id", "data_type": "BIGINT"}],
+        "removed_columns": ["old"],
+    }
+    expected_response = DatabaseTableBulkItemSchema(
+        id=test_uuid, fully_qualified_name="tb.provider.db.table"
+    )
+    mock_database_table_service.apply_changes.return_value = expected_response
+
+    response = await async_client.patch(
+        f"/tables/{test_uuid}/changes", json=test_data
+    )
+
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert response.json() == expected_response.model_dump(mode="json")
+    (entity_id, change_set), _ = (
+        mock_database_table_service.apply_changes.call_args
+    )
+    assert entity_id == test_uuid
+    assert change_set.fields.model_dump(exclude_unset=True) == {
+        "version": "2.0.0",
+        "fingerprint": "abc",
+        "updated_by": "FIXME!!!",
+    }
+    assert change_set.modified_columns[0].model_dump(exclude_unset=True) == {
+        "name": "id",
+        "data_type": "BIGINT",
+    }
+    assert change_set.removed_columns == ["old"]
+
+
 @pytest.mark.asyncio
 async def test_find_database_tables(async_client, mock_database_table_service):
     """Test getting a list of DatabaseTable entries."""
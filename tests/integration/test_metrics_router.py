@@ -0,0 +1,26 @@
+import pytest
+from fastapi import status
+
+
+@pytest.mark.asyncio
+async def test_get_metrics(async_client, mock_tag_service, test_uuid):
+    """Test that requests are reported by route template."""
+    mock_tag_service.get.return_value = None
+    await async_client.get(f"/tags/{test_uuid}")
+
+    response = await async_client.get("/metrics")
+
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert (
+        'http_requests_total{method="GET",route="/tags/{tag_id}",status="404"}'
+        in body
+    )
+    assert (
+        'http_request_duration_seconds_bucket{method="GET",'
+        'route="/tags/{tag_id}",le="+Inf"}' in body
+    )
+    assert str(test_uuid) not in body
+    assert "http_requests_in_flight 1" in body
+    assert 'db_pool_checked_out{engine="default"}' in body
@@ -1,16 +1,24 @@
 import datetime
+import os
 import uuid
 
 from pydantic_core import Url
 import pytest
 import pytest_asyncio
+from sqlalchemy import delete
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
 
 from alembic.config import Config
 from alembic import command
 from app.database import Base
+from app.models import (
+    DatabaseProvider,
+    DatabaseProviderIngestion,
+    DatabaseProviderIngestionExecution,
+    SchedulingType,
+)
 from app.schemas import (
     AIModelCreateSchema,
     DatabaseCreateSchema,
@@ -24,6 +32,7 @@ from app.schemas import (
     TagCreateSchema,
 )
 from app.services.a_i_model_service import AIModelService
+from app.services.asset_service import AssetService
 from app.services.database_provider_connection_service import (
     DatabaseProviderConnectionService,
 )
@@ -97,6 +106,99 @@ async def async_session(async_engine):
             await session.close()
 
 
+@pytest_asyncio.fixture(scope="function")
+async def pg_engine(setup_test_db):
+    """Create an engine of the Postgres database (DB_URL) migrated by
+    setup_test_db, for features that depend on Postgres (e.g. ON CONFLICT,
+    SKIP LOCKED and advisory locks)."""
+    url = os.environ.get("DB_URL", "")
+    if not url.startswith("postgresql"):
+        pytest.skip("DB_URL is not a Postgres database")
+    engine = create_async_engine(url, poolclass=NullPool)
+    try:
+        yield engine
+    finally:
+        await engine.dispose()
+
+
+@pytest_asyncio.fixture(scope="function")
+async def pg_session(pg_engine):
+    """Create a test session of the Postgres database"""
+    async with AsyncSession(pg_engine, expire_on_commit=False) as session:
+        yield session
+        await session.rollback()  # rollback after each test.
+
+
+@pytest_asyncio.fixture
+async def pg_database(pg_session):
+    """Create a provider and a database in the Postgres database"""
+    provider = await DatabaseProviderService(pg_session).add(
+        DatabaseProviderCreateSchema(
+            name=f"provider {uuid.uuid4().hex[:8]}",
+            fully_qualified_name=f"test.{uuid.uuid4().hex}",
+            display_name="Provider name",
+            updated_by="tester",
+            provider_type_id="POSTGRESQL",
+        )
+    )
+    return await DatabaseService(pg_session).add(
+        DatabaseCreateSchema(
+            name="db",
+            display_name="db",
+            fully_qualified_name=f"{provider.fully_qualified_name}.db",
+            updated_by="tester",
+            provider_id=provider.id,
+        )
+    )
+
+
+@pytest_asyncio.fixture
+async def due_ingestion(pg_engine):
+    """Create a scheduled ingestion whose next run is due. It is committed,
+    so that concurrent sessions see it, and removed after the test."""
+    async with AsyncSession(pg_engine, expire_on_commit=False) as session:
+        provider = await DatabaseProviderService(session).add(
+            DatabaseProviderCreateSchema(
+                name=f"provider {uuid.uuid4().hex[:8]}",
+                fully_qualified_name=f"test.{uuid.uuid4().hex}",
+                display_name="Provider name",
+                updated_by="tester",
+                provider_type_id="POSTGRESQL",
+            )
+        )
+        ingestion = DatabaseProviderIngestion(
+            name="Scheduled ingestion",
+            type="ingestion",
+            provider_id=provider.id,
+            scheduling_type=SchedulingType.CRON,
+            scheduling="0 3 * * *",
+            next_run_at=datetime.datetime(2000, 1, 1),
+        )
+        session.add(ingestion)
+        await session.commit()
+    try:
+        yield ingestion
+    finally:
+        async with AsyncSession(pg_engine) as session:
+            await session.execute(
+                delete(DatabaseProviderIngestionExecution).where(
+                    DatabaseProviderIngestionExecution.ingestion_id
+                    == ingestion.id
+                )
+            )
+            await session.execute(
+                delete(DatabaseProviderIngestion).where(
+                    DatabaseProviderIngestion.id == ingestion.id
+                )
+            )
+            await session.execute(
+                delete(DatabaseProvider).where(
+                    DatabaseProvider.id == provider.id
+                )
+            )
+            await session.commit()
+
+
 @pytest_asyncio.fixture
 async def domain_service(async_session):
     """Create a DomainService instance"""
@@ -124,6 +226,11 @@ async def database_provider_connection_service(async_session):
     return DatabaseProviderConnectionService(async_session)
 
 
+@pytest_asyncio.fixture
+async def asset_service(async_session):
+    return AssetService(async_session)
+
+
 @pytest_asyncio.fixture
 async def database_service(async_session):
     return DatabaseService(async_session)
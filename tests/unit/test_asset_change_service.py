@@ -0,0 +1,37 @@
+import pytest
+
+from app.models import AssetChangeKind
+from app.schemas import AssetChangeCreateSchema, AssetChangeFeedQuerySchema
+from app.services.asset_change_service import AssetChangeService
+
+
+@pytest.mark.asyncio
+async def test_feed_asset_changes(pg_session, pg_database):
+    """Test reading the changes of a provider page by page"""
+    service = AssetChangeService(pg_session)
+    await service.add_many(
+        [
+            AssetChangeCreateSchema(
+                kind=AssetChangeKind.COLUMN_ADDED,
+                field=name,
+                asset_id=pg_database.id,
+                provider_id=pg_database.provider.id,
+            )
+            for name in ["a", "b", "c"]
+        ]
+    )
+
+    def _options(after):
+        return AssetChangeFeedQuerySchema(
+            provider_id=pg_database.provider.id, after=after, limit=2
+        )
+
+    first = await service.feed(_options(None))
+    assert [c.field for c in first.items] == ["a", "b"]
+    second = await service.feed(_options(first.next_cursor))
+    assert [c.field for c in second.items] == ["c"]
+    assert second.next_cursor == second.items[-1].id
+    # No new changes: the cursor is kept.
+    empty = await service.feed(_options(second.next_cursor))
+    assert empty.items == []
+    assert empty.next_cursor == second.next_cursor
@@ -0,0 +1,54 @@
+import pytest
+from app.exceptions import ValidationException
+from app.schemas import AssetReconcileSchema
+from app.services.asset_service import AssetService
+from app.services.database_table_service import DatabaseTableService
+
+
+@pytest.mark.asyncio
+async def test_reconcile_tables(
+    pg_session, pg_database, sample_database_table_data
+):
+    """Test disabling the tables of a database not found in the source"""
+    asset_service = AssetService(pg_session)
+    database_table_service = DatabaseTableService(pg_session)
+    prefix = pg_database.fully_qualified_name
+    tables = []
+    for name in ["kept", "gone"]:
+        data = sample_database_table_data.model_copy()
+        data.name = name
+        data.fully_qualified_name = f"{prefix}.{name}"
+        data.database_id = pg_database.id
+        data.database_schema_id = None
+        data.deleted = False
+        tables.append(await database_table_service.add(data))
+
+    result = await asset_service.reconcile(
+        AssetReconcileSchema(
+            database_id=pg_database.id,
+            fully_qualified_names=[f"{prefix}.kept"],
+        )
+    )
+    assert result.disabled == ["gone"]
+    assert result.disabled_ids == [tables[1].id]
+
+    kept = await database_table_service.get(tables[0].id)
+    gone = await database_table_service.get(tables[1].id)
+    assert not kept.deleted
+    assert gone.deleted
+
+    # Assets already disabled are not reported again.
+    result = await asset_service.reconcile(
+        AssetReconcileSchema(
+            database_id=pg_database.id,
+            fully_qualified_names=[f"{prefix}.kept"],
+        )
+    )
+    assert result.disabled == []
+
+
+@pytest.mark.asyncio
+async def test_reconcile_requires_one_scope(asset_service: AssetService):
+    """Test reconciling without a scope (or with more than one)"""
+    with pytest.raises(ValidationException):
+        await asset_service.reconcile(AssetReconcileSchema())
@@ -0,0 +1,169 @@
+import asyncio
+import datetime
+import json
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import sessionmaker
+
+import app.collector.data_collection_scheduling_engine as scheduling_engine
+from app.collector.data_collection_scheduling_engine import (
+    DataCollectionSchedulingEngine,
+)
+from app.models import (
+    DatabaseProviderIngestion,
+    DatabaseProviderIngestionExecution,
+    utc_now,
+)
+from app.services.asset_change_service import AssetChangeService
+from app.services.database_provider_ingestion_execution_service import (
+    DatabaseProviderIngestionExecutionService,
+)
+
+
+class Queue:
+    """Queue of the worker jobs. Enqueuing waits until the queue is
+    released (it is released by default)."""
+
+    def __init__(self):
+        self.jobs = []
+        self.entered = asyncio.Event()
+        self.released = asyncio.Event()
+        self.released.set()
+        self.error = None
+
+    async def enqueue(self, entrypoint, payload):
+        self.entered.set()
+        await self.released.wait()
+        if self.error:
+            raise self.error
+        self.jobs.append(json.loads(payload))
+        return [len(self.jobs)]
+
+
+@pytest.fixture
+def pg_scheduler(pg_engine, monkeypatch):
+    """Run the scheduler on the test database"""
+    monkeypatch.setattr(
+        scheduling_engine,
+        "AsyncSessionLocal",
+        sessionmaker(pg_engine, class_=AsyncSession, expire_on_commit=False),
+    )
+
+
+@pytest_asyncio.fixture
+async def queue(pg_scheduler, monkeypatch):
+    """Run the scheduler with a fake queue"""
+    queue = Queue()
+
+    async def get_queries(self):
+        return queue
+
+    monkeypatch.setattr(
+        DatabaseProviderIngestionExecutionService, "_get_queries", get_queries
+    )
+    return queue
+
+
+async def get_state(pg_engine, ingestion_id):
+    async with AsyncSession(pg_engine) as session:
+        ingestion = await session.get(DatabaseProviderIngestion, ingestion_id)
+        executions = (
+            (
+                await session.execute(
+                    select(DatabaseProviderIngestionExecution).where(
+                        DatabaseProviderIngestionExecution.ingestion_id
+                        == ingestion_id
+                    )
+                )
+            )
+            .unique()
+            .scalars()
+            .all()
+        )
+        return ingestion.next_run_at, executions
+
+
+@pytest.mark.asyncio
+async def test_execute_engine(pg_engine, due_ingestion, queue):
+    """Test starting the due ingestions"""
+    before = utc_now()
+    started = await DataCollectionSchedulingEngine().execute_engine()
+    assert started == 1
+
+    next_run_at, executions = await get_state(pg_engine, due_ingestion.id)
+    assert len(executions) == 1
+    assert executions[0].trigger_mode == "scheduled"
+    assert executions[0].job_id == 1
+    assert queue.jobs == [
+        {
+            "ingestion": str(due_ingestion.id),
+            "execution": str(executions[0].id),
+        }
+    ]
+    # Runs missed are not repeated: the next run is after now
+    assert before < next_run_at <= before + datetime.timedelta(days=1)
+
+    # Not due anymore
+    assert await DataCollectionSchedulingEngine().execute_engine() == 0
+
+
+@pytest.mark.asyncio
+async def test_execute_engine_concurrently(pg_engine, due_ingestion, queue):
+    """Test that only the scheduler holding the lock fires"""
+    queue.released.clear()
+    leader = asyncio.create_task(
+        DataCollectionSchedulingEngine().execute_engine()
+    )
+    # The leader holds the lock while enqueuing
+    await asyncio.wait_for(queue.entered.wait(), 10)
+    follower = asyncio.create_task(
+        DataCollectionSchedulingEngine().execute_engine()
+    )
+    assert await asyncio.wait_for(follower, 10) == 0
+
+    queue.released.set()
+    assert await asyncio.wait_for(leader, 10) == 1
+    _, executions = await get_state(pg_engine, due_ingestion.id)
+    assert len(executions) == 1
+    assert len(queue.jobs) == 1
+
+
+@pytest.mark.asyncio
+async def test_execute_engine_failure(pg_engine, due_ingestion, queue):
+    """Test that a failed tick keeps the ingestion due and starts nothing"""
+    queue.error = RuntimeError("Queue unavailable")
+    with pytest.raises(RuntimeError):
+        await DataCollectionSchedulingEngine().execute_engine()
+
+    next_run_at, executions = await get_state(pg_engine, due_ingestion.id)
+    assert next_run_at == due_ingestion.next_run_at
+    assert executions == []
+
+
+@pytest.mark.asyncio
+async def test_apply_retention(pg_scheduler, monkeypatch):
+    """Test that only one scheduler applies the retention at a time"""
+    entered, released = asyncio.Event(), asyncio.Event()
+    calls = []
+    apply_retention = AssetChangeService.apply_retention
+
+    async def blocking_apply_retention(self, *args, **kwargs):
+        calls.append(self)
+        entered.set()
+        await released.wait()
+        return await apply_retention(self, *args, **kwargs)
+
+    monkeypatch.setattr(
+        AssetChangeService, "apply_retention", blocking_apply_retention
+    )
+    leader = asyncio.create_task(
+        DataCollectionSchedulingEngine().apply_retention()
+    )
+    await asyncio.wait_for(entered.wait(), 10)
+    assert await DataCollectionSchedulingEngine().apply_retention() is False
+
+    released.set()
+    assert await asyncio.wait_for(leader, 10) is True
+    assert len(calls) == 1
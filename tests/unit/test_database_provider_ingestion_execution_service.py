@@ -0,0 +1,147 @@
+import uuid
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app.exceptions import ValidationException
+
+from app.models import (
+    DatabaseProviderIngestionCheckpoint,
+    DatabaseProviderIngestionExecution,
+    DatabaseProviderIngestionLog,
+)
+from app.schemas import (
+    DatabaseProviderCreateSchema,
+    DatabaseProviderIngestionCreateSchema,
+)
+from app.services.database_provider_ingestion_execution_service import (
+    DatabaseProviderIngestionExecutionService,
+)
+from app.services.database_provider_ingestion_service import (
+    DatabaseProviderIngestionService,
+)
+from app.services.database_provider_service import DatabaseProviderService
+
+
+async def create_execution(
+    session, ingestion_id=None, **kwargs
+) -> DatabaseProviderIngestionExecution:
+    if ingestion_id is None:
+        ingestion_id = await create_ingestion(session)
+    execution = DatabaseProviderIngestionExecution(
+        **{"status": "running", "trigger_mode": "manual", **kwargs},
+        ingestion_id=ingestion_id,
+    )
+    session.add(execution)
+    await session.flush()
+    return execution
+
+
+async def create_ingestion(session):
+    provider = await DatabaseProviderService(session).add(
+        DatabaseProviderCreateSchema(
+            name=f"provider {uuid.uuid4().hex[:8]}",
+            fully_qualified_name=f"test.{uuid.uuid4().hex}",
+            display_name="Provider name",
+            updated_by="tester",
+            provider_type_id="POSTGRESQL",
+        )
+    )
+    ingestion = await DatabaseProviderIngestionService(session).add(
+        DatabaseProviderIngestionCreateSchema(
+            name="Ingestion", type="ingestion", provider_id=provider.id
+        )
+    )
+    return ingestion.id
+
+
+@pytest.mark.asyncio
+async def test_get_execution_log(pg_session):
+    """Test retrieving the log of an execution in the order of its chunks"""
+    execution = await create_execution(pg_session)
+    # Written out of order (e.g. by concurrent flushes)
+    for seq, chunk in [(2, "line 3"), (0, "line 1"), (1, ""), (3, "line 4")]:
+        pg_session.add(
+            DatabaseProviderIngestionLog(
+                seq=seq,
+                log=chunk,
+                status="running",
+                execution_id=execution.id,
+                ingestion_id=execution.ingestion_id,
+            )
+        )
+    await pg_session.flush()
+
+    service = DatabaseProviderIngestionExecutionService(pg_session)
+    assert await service.get_log(execution.id) == "line 1\nline 3\nline 4"
+    assert await service.get_log(-1) == ""
+
+
+@pytest.mark.asyncio
+async def test_add_execution_log_same_seq(pg_session):
+    """Test that a chunk can not be written twice to the log"""
+    execution = await create_execution(pg_session)
+    for chunk in ["line 1", "line 1 again"]:
+        pg_session.add(
+            DatabaseProviderIngestionLog(
+                seq=0,
+                log=chunk,
+                status="running",
+                execution_id=execution.id,
+                ingestion_id=execution.ingestion_id,
+            )
+        )
+    with pytest.raises(IntegrityError):
+        await pg_session.flush()
+
+
+@pytest.mark.asyncio
+async def test_resume_execution(pg_session):
+    """Test resuming the last failed execution, ignoring plan executions"""
+    failed = await create_execution(pg_session, status="error")
+    ingestion_id = failed.ingestion_id
+    pg_session.add(
+        DatabaseProviderIngestionCheckpoint(
+            scope="db.provider.db1", execution_id=failed.id
+        )
+    )
+    await create_execution(
+        pg_session, ingestion_id, status="success", dry_run=True
+    )
+    execution = await create_execution(
+        pg_session, ingestion_id, status="preparing"
+    )
+
+    service = DatabaseProviderIngestionExecutionService(pg_session)
+    assert await service.resume(execution.id) == failed.id
+    assert execution.resumed_from_id == failed.id
+    checkpoints = await service.get_checkpoints(execution.id)
+    assert [c.scope for c in checkpoints] == ["db.provider.db1"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "status, message", [("success", "did not fail"), ("running", "running")]
+)
+async def test_resume_execution_not_failed(pg_session, status, message):
+    """Test that an execution is not resumed if the last one did not fail
+    or is still running"""
+    previous = await create_execution(pg_session, status=status)
+    execution = await create_execution(
+        pg_session, previous.ingestion_id, status="preparing"
+    )
+    with pytest.raises(ValidationException) as ve:
+        await DatabaseProviderIngestionExecutionService(pg_session).resume(
+            execution.id
+        )
+    assert message in str(ve.value)
+    assert execution.resumed_from_id is None
+
+
+@pytest.mark.asyncio
+async def test_resume_execution_without_previous(pg_session):
+    """Test resuming the first execution of an ingestion"""
+    execution = await create_execution(pg_session, status="preparing")
+    with pytest.raises(ValidationException):
+        await DatabaseProviderIngestionExecutionService(pg_session).resume(
+            execution.id
+        )
@@ -1,6 +1,11 @@
+import datetime
+import os
+import time
 import pytest
 import uuid
-from app.exceptions import EntityNotFoundException
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.exceptions import EntityNotFoundException, ValidationException
+from app.models import DatabaseProviderIngestion, SchedulingType
 from app.schemas import (
     DatabaseProviderIngestionCreateSchema,
     DatabaseProviderIngestionQuerySchema,
@@ -241,3 +246,110 @@ async def test_update_nonexistent_database_provider_ingestion(
             )
         )
     assert "not found" in str(nfe.value)
+
+
+@pytest.fixture
+def server_timezone():
+    """Change the local timezone of the server during the test"""
+    previous = os.environ.get("TZ")
+
+    def set_timezone(name):
+        os.environ["TZ"] = name
+        time.tzset()
+
+    yield set_timezone
+    if previous is None:
+        os.environ.pop("TZ", None)
+    else:
+        os.environ["TZ"] = previous
+    time.tzset()
+
+
+def test_schedule_database_provider_ingestion(server_timezone):
+    """Test computing the next run in the timezone of the server"""
+    server_timezone("America/Sao_Paulo")  # UTC-3
+    ingestion = DatabaseProviderIngestion(
+        scheduling_type=SchedulingType.CRON, scheduling="0 3 * * *"
+    )
+
+    # 02:00 local time: runs at 03:00 of the same day
+    DatabaseProviderIngestionService.schedule(
+        ingestion, datetime.datetime(2026, 1, 1, 5, 0)
+    )
+    assert ingestion.next_run_at == datetime.datetime(2026, 1, 1, 6, 0)
+
+    # 09:00 local time: runs at 03:00 of the next day
+    DatabaseProviderIngestionService.schedule(
+        ingestion, datetime.datetime(2026, 1, 1, 12, 0)
+    )
+    assert ingestion.next_run_at == datetime.datetime(2026, 1, 2, 6, 0)
+
+
+def test_schedule_database_provider_ingestion_without_catch_up(
+    server_timezone,
+):
+    """Test that missed runs are not repeated: the next run is computed from
+    the reference date, not from the previous run"""
+    server_timezone("UTC")
+    ingestion = DatabaseProviderIngestion(
+        scheduling_type=SchedulingType.CRON,
+        scheduling="0 3 * * *",
+        next_run_at=datetime.datetime(2000, 1, 1, 3, 0),
+    )
+    DatabaseProviderIngestionService.schedule(
+        ingestion, datetime.datetime(2026, 1, 1, 12, 0)
+    )
+    assert ingestion.next_run_at == datetime.datetime(2026, 1, 2, 3, 0)
+
+
+def test_schedule_database_provider_ingestion_not_scheduled():
+    """Test the next run of manual ingestions and invalid cron expressions"""
+    ingestion = DatabaseProviderIngestion(
+        scheduling_type=SchedulingType.MANUAL,
+        scheduling="0 3 * * *",
+        next_run_at=datetime.datetime(2026, 1, 1),
+    )
+    DatabaseProviderIngestionService.schedule(ingestion)
+    assert ingestion.next_run_at is None
+
+    ingestion.scheduling_type = SchedulingType.CRON
+    ingestion.scheduling = "every day"
+    with pytest.raises(ValidationException):
+        DatabaseProviderIngestionService.schedule(ingestion)
+
+
+@pytest.mark.asyncio
+async def test_find_due_database_provider_ingestions(
+    pg_engine, due_ingestion
+):
+    """Test retrieving the ingestions whose next run is due"""
+    async with AsyncSession(pg_engine) as session:
+        service = DatabaseProviderIngestionService(session)
+        due = await service.find_due()
+        assert due_ingestion.id in [ingestion.id for ingestion in due]
+
+        due = await service.find_due(datetime.datetime(1999, 1, 1))
+        assert due_ingestion.id not in [ingestion.id for ingestion in due]
+        await session.rollback()
+
+
+@pytest.mark.asyncio
+async def test_find_due_database_provider_ingestions_skip_locked(
+    pg_engine, due_ingestion
+):
+    """Test that the ingestions locked by a scheduler are skipped by the
+    others"""
+    async with AsyncSession(pg_engine) as first, AsyncSession(
+        pg_engine
+    ) as second:
+        due = await DatabaseProviderIngestionService(first).find_due()
+        assert due_ingestion.id in [ingestion.id for ingestion in due]
+
+        due = await DatabaseProviderIngestionService(second).find_due()
+        assert due_ingestion.id not in [ingestion.id for ingestion in due]
+
+        # Released by the first transaction
+        await first.rollback()
+        due = await DatabaseProviderIngestionService(second).find_due()
+        assert due_ingestion.id in [ingestion.id for ingestion in due]
+        await second.rollback()
@@ -1,13 +1,29 @@
+import asyncio
 import pytest
 import uuid
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.exceptions import EntityNotFoundException
-from app.models import DataType
+from app.models import (
+    Asset,
+    Database,
+    DatabaseProvider,
+    DatabaseTable,
+    DataType,
+    TableColumn,
+)
 from app.schemas import (
+    DatabaseCreateSchema,
+    DatabaseProviderCreateSchema,
+    DatabaseTableChangeSetSchema,
     DatabaseTableCreateSchema,
     DatabaseTableQuerySchema,
     DatabaseTableUpdateSchema,
+    TableColumnChangeSchema,
     TableColumnCreateSchema,
 )
+from app.services.database_provider_service import DatabaseProviderService
+from app.services.database_service import DatabaseService
 from app.services.database_table_service import DatabaseTableService
 
 
@@ -131,6 +147,265 @@ async def test_find_database_tables(
     )
 
 
+@pytest.mark.asyncio
+async def test_bulk_upsert_database_tables(pg_session, pg_database):
+    """Test creating and then updating database_tables in a batch"""
+    database_table_service = DatabaseTableService(pg_session)
+
+    def _table(i, column_names):
+        return DatabaseTableCreateSchema(
+            name=f"DatabaseTable {i}",
+            deleted=False,
+            database_id=pg_database.id,
+            display_name=f"table.test{i}",
+            fully_qualified_name=f"{pg_database.fully_qualified_name}.t{i}",
+            updated_by="tester",
+            columns=[
+                TableColumnCreateSchema(
+                    name=name, display_name=name, data_type=DataType.INT
+                )
+                for name in column_names
+            ],
+        )
+
+    created = await database_table_service.bulk_upsert(
+        [_table(i, ["a", "b"]) for i in range(2)]
+    )
+    assert [c.created for c in created] == [True, True]
+
+    updated = await database_table_service.bulk_upsert(
+        [_table(0, ["a", "c"])]
+    )
+    assert updated[0].id == created[0].id
+    assert updated[0].created is False
+
+    database_table = await database_table_service.get(created[0].id)
+    assert sorted(c.name for c in database_table.columns) == ["a", "c"]
+
+
+@pytest.mark.asyncio
+async def test_bulk_upsert_updates_only_informed_fields(
+    pg_session, pg_database
+):
+    """Test that each table of a batch only updates its informed fields"""
+    service = DatabaseTableService(pg_session)
+
+    def _table(i, **fields):
+        return DatabaseTableCreateSchema(
+            name=f"DatabaseTable {i}",
+            database_id=pg_database.id,
+            display_name=f"table.test{i}",
+            fully_qualified_name=f"{pg_database.fully_qualified_name}.t{i}",
+            updated_by="tester",
+            columns=[
+                TableColumnCreateSchema(
+                    name="a", display_name="a", data_type=DataType.INT,
+                    # Columns have no notes.
+                    **{k: v for k, v in fields.items() if k != "notes"},
+                )
+            ],
+            **fields,
+        )
+
+    created = await service.bulk_upsert(
+        [
+            _table(i, description=f"desc{i}", notes=f"notes{i}")
+            for i in range(2)
+        ]
+    )
+    await service.bulk_upsert(
+        [_table(0, notes="new notes"), _table(1, description="new desc")]
+    )
+    pg_session.expire_all()
+
+    table0 = await service.get(created[0].id)
+    assert (table0.description, table0.notes) == ("desc0", "new notes")
+    assert table0.columns[0].description == "desc0"
+    table1 = await service.get(created[1].id)
+    assert (table1.description, table1.notes) == ("new desc", "notes1")
+    assert table1.columns[0].description == "new desc"
+
+
+@pytest.mark.asyncio
+async def test_bulk_upsert_database_tables_concurrently(pg_engine):
+    """Test that tables created by concurrent batches share the same id"""
+    async with AsyncSession(pg_engine, expire_on_commit=False) as session:
+        provider = await DatabaseProviderService(session).add(
+            DatabaseProviderCreateSchema(
+                name=f"provider {uuid.uuid4().hex[:8]}",
+                fully_qualified_name=f"test.{uuid.uuid4().hex}",
+                display_name="Provider name",
+                updated_by="tester",
+                provider_type_id="POSTGRESQL",
+            )
+        )
+        database = await DatabaseService(session).add(
+            DatabaseCreateSchema(
+                name="db",
+                display_name="db",
+                fully_qualified_name=f"{provider.fully_qualified_name}.db",
+                updated_by="tester",
+                provider_id=provider.id,
+            )
+        )
+        await session.commit()
+
+    table = DatabaseTableCreateSchema(
+        name="DatabaseTable",
+        database_id=database.id,
+        display_name="table.test",
+        fully_qualified_name=f"{database.fully_qualified_name}.t",
+        updated_by="tester",
+        columns=[
+            TableColumnCreateSchema(
+                name="a", display_name="a", data_type=DataType.INT
+            )
+        ],
+    )
+    first = AsyncSession(pg_engine)
+    second = AsyncSession(pg_engine)
+    try:
+        created = await DatabaseTableService(first).bulk_upsert([table])
+        # Waits for the first batch, which inserted the same table.
+        upserted = asyncio.create_task(
+            DatabaseTableService(second).bulk_upsert([table])
+        )
+        await asyncio.sleep(0.5)
+        assert not upserted.done()
+        await first.commit()
+        updated = await asyncio.wait_for(upserted, 10)
+        await second.commit()
+
+        assert created[0].created is True
+        assert updated[0].created is False
+        assert updated[0].id == created[0].id
+    finally:
+        await first.close()
+        await second.close()
+        async with AsyncSession(pg_engine) as session:
+            for model, condition in [
+                (TableColumn, TableColumn.table_id.in_(
+                    select(DatabaseTable.id).where(
+                        DatabaseTable.database_id == database.id
+                    )
+                )),
+                (DatabaseTable, DatabaseTable.database_id == database.id),
+                (Database, Database.id == database.id),
+                (DatabaseProvider, DatabaseProvider.id == provider.id),
+                (Asset, Asset.fully_qualified_name.startswith(
+                    provider.fully_qualified_name
+                )),
+            ]:
+                await session.execute(delete(model).where(condition))
+            await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_apply_database_table_changes(
+    pg_session, pg_database, sample_database_table_data
+):
+    """Test applying only the changed fields and columns of a database_table"""
+    database_table_service = DatabaseTableService(pg_session)
+    sample_database_table_data.database_id = pg_database.id
+    sample_database_table_data.database_schema_id = None
+    sample_database_table_data.fully_qualified_name = (
+        f"{pg_database.fully_qualified_name}.table"
+    )
+    sample_database_table_data.columns = [
+        TableColumnCreateSchema(
+            name=name, display_name=name, data_type=DataType.INT,
+            description=f"Column {name}",
+        )
+        for name in ["a", "b"]
+    ]
+    created = await database_table_service.add(sample_database_table_data)
+
+    change_set = DatabaseTableChangeSetSchema(
+        fields=DatabaseTableUpdateSchema(version="1.0.0"),
+        added_columns=[
+            TableColumnCreateSchema(
+                name="c", display_name="c", data_type=DataType.VARCHAR
+            )
+        ],
+        modified_columns=[
+            TableColumnChangeSchema(name="a", data_type=DataType.BIGINT)
+        ],
+        removed_columns=["b"],
+    )
+    result = await database_table_service.apply_changes(created.id, change_set)
+    assert result.id == created.id
+    # Applying the same changes again has no effect.
+    await database_table_service.apply_changes(created.id, change_set)
+
+    database_table = await database_table_service.get(created.id)
+    assert database_table.version == "1.0.0"
+    assert database_table.name == sample_database_table_data.name
+    columns = {c.name: c for c in database_table.columns}
+    assert sorted(columns) == ["a", "c"]
+    assert columns["a"].data_type == DataType.BIGINT
+    # Fields not informed are kept.
+    assert columns["a"].description == "Column a"
+
+
+@pytest.mark.asyncio
+async def test_stream_fingerprints(
+    pg_session, pg_database, sample_database_table_data
+):
+    """Test retrieving the fingerprints of the tables of a provider"""
+    database_table_service = DatabaseTableService(pg_session)
+    sample_database_table_data.database_id = pg_database.id
+    sample_database_table_data.database_schema_id = None
+    sample_database_table_data.fully_qualified_name = (
+        f"{pg_database.fully_qualified_name}.table"
+    )
+    sample_database_table_data.fingerprint = "abc"
+    database_table = await database_table_service.add(
+        sample_database_table_data
+    )
+
+    fingerprints = [
+        f
+        async for f in database_table_service.stream_fingerprints(
+            pg_database.provider.id
+        )
+    ]
+    assert len(fingerprints) == 1
+    assert fingerprints[0].id == database_table.id
+    assert fingerprints[0].fingerprint == "abc"
+
+    other = [
+        f async for f in database_table_service.stream_fingerprints(uuid.uuid4())
+    ]
+    assert other == []
+
+
+@pytest.mark.asyncio
+async def test_stream_database_tables(
+    pg_session, pg_database, sample_database_table_data
+):
+    """Test retrieving all the tables of a database, without paging"""
+    database_table_service = DatabaseTableService(pg_session)
+    names = [f"table_{i}" for i in range(25)]
+    for name in names:
+        data = sample_database_table_data.model_copy()
+        data.name = name
+        data.fully_qualified_name = f"{pg_database.fully_qualified_name}.{name}"
+        data.database_id = pg_database.id
+        data.database_schema_id = None
+        await database_table_service.add(data)
+
+    tables = [
+        t
+        async for t in database_table_service.stream(
+            DatabaseTableQuerySchema(
+                database_id=pg_database.id,
+                sort_by="name",
+            )
+        )
+    ]
+    assert [t.name for t in tables] == sorted(names)
+
+
 @pytest.mark.asyncio
 async def test_get_nonexistent_database_table(database_table_service):
     """Test retrieving a non-existent database_table"""
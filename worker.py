@@ -1,24 +1,123 @@
+import collections
+import datetime
 import json
 import os
+import typing
 import asyncio
 import asyncpg
-from fastapi import Request
+from concurrent.futures import ThreadPoolExecutor
 from pgqueuer import PgQueuer, Queries
 from pgqueuer.db import AsyncpgDriver
 from pgqueuer.models import Job
-from sqlalchemy import update
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import select, update
 
 from app.collector import runner
-from app.collector.utils.logging_config import setup_collector_logger
+from app.collector.data_collection_sink import get_loop
+from app.collector.utils.logging_config import (
+    execution_log,
+    setup_collector_logger,
+)
+from app.database import AsyncSessionLocal
 from app.models import (
+    DatabaseProviderIngestion,
     DatabaseProviderIngestionExecution,
-    DatabaseProviderIngestionLog,
+    utc_now,
+)
+from app.schemas import DatabaseProviderIngestionLogCreateSchema
+from app.services.database_provider_ingestion_log_service import (
+    DatabaseProviderIngestionLogService,
 )
 from dotenv import load_dotenv
 load_dotenv()
 
+# Ingestions run at the same time by the worker (each one in a thread, so
+# the event loop keeps dequeuing jobs and sending heartbeats).
+MAX_JOBS = int(os.getenv("WORKER_MAX_JOBS", "4"))
+
+# Ingestions of the same provider run at the same time by the worker.
+MAX_JOBS_PER_PROVIDER = int(os.getenv("WORKER_MAX_JOBS_PER_PROVIDER", "1"))
+
+# Delay (in seconds) before a job of a provider at its limit is dequeued
+# again.
+PROVIDER_RETRY_DELAY = int(os.getenv("WORKER_PROVIDER_RETRY_DELAY", "30"))
+
+logger = setup_collector_logger("app.collector")
+
+
+def _run(coroutine):
+    """Run a coroutine in the background loop shared with the collector
+    sinks (the connections of app.database must not be shared between
+    loops). Used from the threads of the execution log, too."""
+    return asyncio.run_coroutine_threadsafe(coroutine, get_loop()).result()
+
+
+async def _write_log(
+    execution_id: int, ingestion_id: str, seq: int, chunk: str, status: str
+):
+    async with AsyncSessionLocal() as session:  # type: ignore
+        await DatabaseProviderIngestionLogService(session).add(
+            DatabaseProviderIngestionLogCreateSchema(
+                execution_id=execution_id,
+                ingestion_id=ingestion_id,
+                seq=seq,
+                log=chunk,
+                status=status,
+                updated_at=utc_now(),
+            )
+        )
+        await session.commit()
+
+
+async def _get_provider_id(ingestion_id: str):
+    async with AsyncSessionLocal() as session:  # type: ignore
+        return (
+            await session.execute(
+                select(DatabaseProviderIngestion.provider_id).where(
+                    DatabaseProviderIngestion.id == ingestion_id
+                )
+            )
+        ).scalar_one_or_none()
+
+
+async def _update_execution(execution_id: int, **values):
+    async with AsyncSessionLocal() as session:  # type: ignore
+        await session.execute(
+            update(DatabaseProviderIngestionExecution)
+            .where(DatabaseProviderIngestionExecution.id == execution_id)
+            .values(**values)
+        )
+        await session.commit()
+
+
+def _execute(job_id, payload: dict):
+    """Run an ingestion (synchronous, in a thread of the pool) and record
+    its log and final status."""
+    execution_id = int(payload["execution"])
+    ingestion_id = payload["ingestion"]
+
+    # The log is written in chunks while the execution runs; the last
+    # chunk has the final status.
+    def write(seq: int, chunk: str, status: str):
+        _run(_write_log(execution_id, ingestion_id, seq, chunk, status))
+
+    with execution_log(write) as log:
+        logger.info(f"Processando mensagem {job_id}: {json.dumps(payload)}")
+        status = "success"
+        retries = 1
+        for attempt in range(retries):
+            try:
+                runner.execute(payload["execution"])
+                logger.info("Mensagem processada com sucesso.")
+                break
+            except Exception as e:
+                logger.warning(f"Tentativa {attempt + 1} falhou: {str(e)}")
+                # await asyncio.sleep(30)
+                if attempt == retries - 1:
+                    logger.error(f"Error {str(e)}", exc_info=True)
+                    status = "error"
+        log.close(status)
+    _run(_update_execution(execution_id, status=status))
+
 
 async def main() -> PgQueuer:
     connection = await asyncpg.connect(
@@ -26,59 +125,64 @@ async def main() -> PgQueuer:
     )
     driver = AsyncpgDriver(connection)
     pgq = PgQueuer(driver)
+    queries = Queries(driver)
+    executor = ThreadPoolExecutor(MAX_JOBS, thread_name_prefix="ingestion")
+    # Jobs running per provider (providers without jobs are removed).
+    provider_jobs: typing.Counter[typing.Any] = collections.Counter()
 
     # Entrypoint for jobs whose entrypoint is named 'fetch'.
-    @pgq.entrypoint("start_ingestion")
+    @pgq.entrypoint("start_ingestion", concurrency_limit=MAX_JOBS)
     async def process_message(job: Job) -> None:
         if job.payload is not None:
-            logger, memory_stream = setup_collector_logger("app.collector")
             payload = json.loads(job.payload.decode())
-            logger.info(f"Processando mensagem {job.id}: {job.payload.decode()}")
-
-            db_url = os.getenv("DB_URL", "")
-            engine = create_async_engine(db_url, echo=True)
-
-            async_session = sessionmaker(
-                bind=engine,  # type: ignore
-                class_=AsyncSession,
-                expire_on_commit=False,
-            )  # type: ignore
-
-            status = "success"
-            retries = 1
-            for attempt in range(retries):
-                try:
-                    runner.execute(payload["execution"])
-                    logger.info("Mensagem processada com sucesso.")
-                    break
-                except Exception as e:
-                    logger.warning(f"Tentativa {attempt + 1} falhou: {str(e)}")
-                    # await asyncio.sleep(30)
-                    if attempt == retries - 1:
-                        logger.error(f"Error {str(e)}", exc_info=True)
-                        status = "error"
-            execution_id = int(payload["execution"])
-            async with async_session() as session:  # type: ignore
-                log_entry = DatabaseProviderIngestionLog(
-                    execution_id=execution_id,
-                    ingestion_id=payload["ingestion"],
-                    log=str(memory_stream.getvalue()),
-                    status=status,
+            provider_id = await asyncio.wrap_future(
+                asyncio.run_coroutine_threadsafe(
+                    _get_provider_id(payload["ingestion"]), get_loop()
                 )
-                session.add(log_entry)
-
-
-                await session.execute(
-                    update(DatabaseProviderIngestionExecution)
-                    .where(DatabaseProviderIngestionExecution.id == execution_id)
-                    .values(status=status)
+            )
+            if provider_jobs[provider_id] >= MAX_JOBS_PER_PROVIDER:
+                # Waiting here would hold a slot of the worker that jobs of
+                # other providers could use: the job is enqueued again.
+                job_ids = await queries.enqueue(
+                    job.entrypoint,
+                    job.payload,
+                    job.priority,
+                    execute_after=datetime.timedelta(
+                        seconds=PROVIDER_RETRY_DELAY
+                    ),
                 )
-
-                await session.commit()
+                await asyncio.wrap_future(
+                    asyncio.run_coroutine_threadsafe(
+                        _update_execution(
+                            int(payload["execution"]), job_id=job_ids[0]
+                        ),
+                        get_loop(),
+                    )
+                )
+                logger.info(
+                    "Provider %s at its limit, job %s deferred (new job %s).",
+                    provider_id,
+                    job.id,
+                    job_ids[0],
+                )
+                return
+            provider_jobs[provider_id] += 1
+            try:
+                await asyncio.get_running_loop().run_in_executor(
+                    executor, _execute, job.id, payload
+                )
+            finally:
+                provider_jobs[provider_id] -= 1
+                if not provider_jobs[provider_id]:
+                    del provider_jobs[provider_id]
         # raise ValueError("Simulated error")
 
-    await pgq.run()
-    
+    try:
+        await pgq.run(max_concurrent_tasks=MAX_JOBS)
+    finally:
+        executor.shutdown(wait=False)
+
+
 if __name__ == "__main__":
     ENABLE_SCHEDULER = eval(os.environ["ENABLE_SCHEDULER"])
     if ENABLE_SCHEDULER == True: